@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Throughput Benchmark
+
+This script measures end-to-end automation throughput without touching the
+production CRM: it starts the mock CRM, generates synthetic workbooks, drives
+run.py against them and records invoices per second. Each result is compared
+with the previous run of the same scenario so regressions show up.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import logging
+import tempfile
+import subprocess
+import urllib.request
+
+import pandas as pd
+
+from mock_crm import FIRST_BOOKING_NUMBER, SUPPLIERS
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='End-to-end throughput benchmark against the mock CRM')
+
+    parser.add_argument('--sizes', default='100,1000,10000', help='Comma-separated workbook sizes (default: 100,1000,10000)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of parallel browser sessions (default: 1)')
+    parser.add_argument('--backend', choices=['selenium', 'playwright'], help='Browser backend (default: browser.backend from the configuration)')
+    parser.add_argument('--port', type=int, default=5055, help='Port for the mock CRM (default: 5055)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Mock CRM latency per response in seconds (default: 0)')
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help='Mock CRM random extra latency in seconds (default: 0)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of mock CRM requests that fail (default: 0)')
+    parser.add_argument('--config', default='config.json', help='Base configuration file (default: config.json)')
+    parser.add_argument('--output', default='benchmark_results.jsonl', help='File the results are appended to (default: benchmark_results.jsonl)')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Slowdown versus the previous result reported as regression (default: 0.1)')
+    parser.add_argument('--show-browser', action='store_true', help='Run the browser visibly instead of headless')
+
+    return parser.parse_args()
+
+
+def write_workbook(path, rows):
+    """
+    Write a synthetic workbook with the default column mapping of run.py
+
+    Args:
+        path: Path of the .xlsx file
+        rows: Number of invoice rows
+    """
+    data = pd.DataFrame({
+        'Booking No': [f"SZ{FIRST_BOOKING_NUMBER + i}" for i in range(rows)],
+        'Supplier': [SUPPLIERS[i % len(SUPPLIERS)] for i in range(rows)],
+        'Actual Net Cost': [round(100 + (i * 7.31) % 900, 2) for i in range(rows)]
+    })
+    data.to_excel(path, index=False)
+
+
+def mock_config(base_config, base_url, work_dir, backend=None):
+    """
+    Point a configuration at the mock CRM, keep all run state in work_dir and
+    disable rate control
+
+    Args:
+        base_config: Configuration dictionary to start from
+        base_url: Base URL of the mock CRM, e.g. http://127.0.0.1:5055
+        work_dir: Directory for profiles, indexes, journals and reports
+        backend: Optional browser backend ('selenium' or 'playwright')
+
+    Returns:
+        New configuration dictionary
+    """
+    config = json.loads(json.dumps(base_config))
+    crm_config = config.setdefault('crm', {})
+    crm_config['url'] = f"{base_url}/login"
+    crm_config['session_probe_url'] = f"{base_url}/crm/booking-list"
+    crm_config['booking_list_url'] = f"{base_url}/crm/booking-list"
+    crm_config.setdefault('booking_index', {})['path'] = os.path.join(work_dir, 'booking_index.sqlite3')
+
+    browser_config = config.setdefault('browser', {})
+    if backend:
+        browser_config['backend'] = backend
+    browser_config['user_data_dir'] = os.path.join(work_dir, 'browser_profile')
+    browser_config['cookie_file'] = os.path.join(work_dir, 'browser_profile', 'cookies.json')
+    browser_config.setdefault('screenshots', {})['directory'] = os.path.join(work_dir, 'screenshots')
+
+    # Rate control and its time-of-day schedule (which applies even when disabled)
+    # would make runs at different times incomparable
+    rate_config = config.setdefault('rate_control', {})
+    rate_config['enabled'] = False
+    rate_config['schedule'] = []
+
+    config.setdefault('journal', {})['path'] = os.path.join(work_dir, 'progress_journal.jsonl')
+    config.setdefault('timing', {})['report_path'] = os.path.join(work_dir, 'timing_report.json')
+    return config
+
+
+def start_mock(args, bookings):
+    """
+    Start the mock CRM in a subprocess and wait until it answers
+
+    Returns:
+        The subprocess.Popen of the server
+    """
+    command = [
+        sys.executable, os.path.join(SCRIPT_DIR, 'mock_crm.py'),
+        '--port', str(args.port),
+        '--bookings', str(bookings),
+        '--latency', str(args.latency),
+        '--latency-jitter', str(args.latency_jitter),
+        '--failure-rate', str(args.failure_rate)
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{args.port}/login", timeout=2)
+            return process
+        except Exception:
+            if process.poll() is not None:
+                break
+            time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError("Mock CRM did not start")
+
+
+def run_scenario(args, base_config, size):
+    """
+    Run run.py once against a fresh workbook of the given size
+
+    Returns:
+        Dictionary with the benchmark result
+    """
+    work_dir = tempfile.mkdtemp(prefix=f"crm-benchmark-{size}-")
+    try:
+        excel_path = os.path.join(work_dir, 'invoices.xlsx')
+        write_workbook(excel_path, size)
+
+        config = mock_config(base_config, f"http://127.0.0.1:{args.port}", work_dir, args.backend)
+        config_path = os.path.join(work_dir, 'config.json')
+        with open(config_path, 'w') as f:
+            json.dump(config, f, indent=2)
+
+        command = [
+            sys.executable, os.path.join(SCRIPT_DIR, 'run.py'),
+            '--excel', excel_path,
+            '--config', config_path,
+            '--username', 'admin',
+            '--password', 'admin',
+            '--workers', str(args.workers)
+        ]
+        if not args.show_browser:
+            command.append('--headless')
+
+        logger.info(f"Running {size} invoices with {args.workers} worker(s)...")
+        start = time.time()
+        completed = subprocess.run(command, cwd=work_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        seconds = time.time() - start
+
+        report = {}
+        report_path = config['timing']['report_path']
+        if os.path.exists(report_path):
+            with open(report_path, 'r') as f:
+                report = json.load(f)
+
+        return {
+            'timestamp': time.time(),
+            'size': size,
+            'workers': args.workers,
+            'backend': config['browser'].get('backend', 'selenium'),
+            'latency': args.latency,
+            'failure_rate': args.failure_rate,
+            'returncode': completed.returncode,
+            'seconds': round(seconds, 2),
+            'invoices': report.get('invoices', 0),
+            'invoices_per_second': round(report.get('invoices', 0) / seconds, 3) if seconds else 0,
+            'sleep_seconds': report.get('sleep_seconds'),
+            'wait_seconds': report.get('wait_seconds')
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def previous_result(output_path, result):
+    """Find the last recorded result of the same scenario"""
+    if not os.path.exists(output_path):
+        return None
+
+    scenario = ('size', 'workers', 'backend', 'latency', 'failure_rate')
+    previous = None
+    with open(output_path, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            entry.setdefault('backend', 'selenium')  # Results recorded before backends were selectable
+            if all(entry.get(key) == result[key] for key in scenario):
+                previous = entry
+    return previous
+
+
+def main():
+    """Main function to run the benchmark"""
+    args = parse_args()
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+
+    with open(args.config, 'r') as f:
+        base_config = json.load(f)
+
+    mock = start_mock(args, max(sizes))
+    regressions = 0
+    try:
+        for size in sizes:
+            result = run_scenario(args, base_config, size)
+            previous = previous_result(args.output, result)
+
+            with open(args.output, 'a') as f:
+                f.write(json.dumps(result) + '\n')
+
+            logger.info(
+                f"{size} rows: {result['invoices']} invoices in {result['seconds']}s "
+                f"= {result['invoices_per_second']} invoices/sec (exit code {result['returncode']})"
+            )
+            if previous and previous.get('invoices_per_second'):
+                change = result['invoices_per_second'] / previous['invoices_per_second'] - 1
+                logger.info(f"{size} rows: {change:+.1%} versus previous run ({previous['invoices_per_second']} invoices/sec)")
+                if change < -args.tolerance:
+                    logger.warning(f"{size} rows: throughput regression of {-change:.1%}")
+                    regressions += 1
+    finally:
+        mock.terminate()
+        mock.wait()
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
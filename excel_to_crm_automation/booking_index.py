@@ -0,0 +1,200 @@
+"""
+Booking Index Module
+
+This module keeps a local SQLite index of booking numbers and their booking
+detail URLs, so invoices can be opened directly instead of searched for. It also
+remembers the values last written for each booking.
+"""
+import re
+import time
+import sqlite3
+import logging
+import threading
+
+
+def normalize_booking_number(booking_number):
+    """
+    Normalize a booking number for use as an index key
+
+    Args:
+        booking_number: Booking number with or without "SZ" prefix
+
+    Returns:
+        Normalized booking number (upper case, no "SZ" prefix, no spaces)
+    """
+    value = re.sub(r'\s+', '', str(booking_number or '')).upper()
+    if value.startswith('SZ'):
+        value = value[2:].lstrip('-')
+    return value
+
+
+class BookingIndex:
+    def __init__(self, db_path='booking_index.sqlite3'):
+        """
+        Initialize the booking index
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        self.connection = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS bookings ("
+            "booking_number TEXT PRIMARY KEY, "
+            "url TEXT NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS written_values ("
+            "booking_number TEXT PRIMARY KEY, "
+            "supplier TEXT, "
+            "actual_net TEXT, "
+            "written_at REAL NOT NULL)"
+        )
+        self.connection.commit()
+
+    def get(self, booking_number):
+        """
+        Look up the booking detail URL for a booking number
+
+        Args:
+            booking_number: Booking number with or without "SZ" prefix
+
+        Returns:
+            Booking detail URL, or None if the booking is not indexed
+        """
+        key = normalize_booking_number(booking_number)
+        if not key:
+            return None
+
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT url FROM bookings WHERE booking_number = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, booking_number, url):
+        """
+        Store the booking detail URL for a booking number
+
+        Args:
+            booking_number: Booking number with or without "SZ" prefix
+            url: Booking detail URL
+
+        Returns:
+            Boolean indicating if the entry was stored
+        """
+        return self.put_many([(booking_number, url)]) == 1
+
+    def put_many(self, entries):
+        """
+        Store several booking detail URLs in one transaction
+
+        Args:
+            entries: Iterable of (booking_number, url) tuples
+
+        Returns:
+            Number of entries stored
+        """
+        now = time.time()
+        rows = []
+        for booking_number, url in entries:
+            key = normalize_booking_number(booking_number)
+            if key and url:
+                rows.append((key, url, now))
+        if not rows:
+            return 0
+
+        try:
+            with self._lock, self.connection:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO bookings (booking_number, url, updated_at) VALUES (?, ?, ?)",
+                    rows
+                )
+            return len(rows)
+        except sqlite3.Error as e:
+            self.logger.error(f"Error writing to booking index: {str(e)}")
+            return 0
+
+    def remove(self, booking_number):
+        """
+        Remove a booking from the index (e.g. when its URL no longer works)
+
+        Args:
+            booking_number: Booking number with or without "SZ" prefix
+        """
+        key = normalize_booking_number(booking_number)
+        try:
+            with self._lock, self.connection:
+                self.connection.execute("DELETE FROM bookings WHERE booking_number = ?", (key,))
+        except sqlite3.Error as e:
+            self.logger.error(f"Error removing {key} from booking index: {str(e)}")
+
+    def get_written_values(self, booking_number):
+        """
+        Look up the values last written for a booking
+
+        Args:
+            booking_number: Booking number with or without "SZ" prefix
+
+        Returns:
+            Dictionary with 'supplier' and 'actual_net_cost', or None if nothing was written yet
+        """
+        key = normalize_booking_number(booking_number)
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT supplier, actual_net FROM written_values WHERE booking_number = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        return {'supplier': row[0], 'actual_net_cost': row[1]}
+
+    def put_written_values(self, booking_number, supplier, actual_net):
+        """
+        Remember the values written for a booking
+
+        Empty values keep the previously remembered value, like the CRM form does.
+
+        Args:
+            booking_number: Booking number with or without "SZ" prefix
+            supplier: Supplier written (may be empty)
+            actual_net: Actual net cost written (may be empty)
+        """
+        key = normalize_booking_number(booking_number)
+        if not key:
+            return
+        try:
+            with self._lock, self.connection:
+                self.connection.execute(
+                    "INSERT INTO written_values (booking_number, supplier, actual_net, written_at) "
+                    "VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(booking_number) DO UPDATE SET "
+                    "supplier = COALESCE(excluded.supplier, supplier), "
+                    "actual_net = COALESCE(excluded.actual_net, actual_net), "
+                    "written_at = excluded.written_at",
+                    (key, str(supplier) if supplier else None, str(actual_net) if actual_net else None, time.time())
+                )
+        except sqlite3.Error as e:
+            self.logger.error(f"Error remembering written values for {key}: {str(e)}")
+
+    def count(self):
+        """
+        Get the number of indexed bookings
+
+        Returns:
+            Integer indicating the number of entries
+        """
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM bookings").fetchone()[0]
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            try:
+                self.connection.close()
+            except sqlite3.Error as e:
+                self.logger.error(f"Error closing booking index: {str(e)}")
@@ -0,0 +1,459 @@
+"""
+Browser Backend Module
+
+This module defines the browser interface CRMAutomator drives, the settings and
+helpers shared by its implementations (Selenium in browser_controller.py,
+Playwright in playwright_controller.py), and create_browser, which picks the
+implementation configured in browser.backend.
+"""
+import os
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+from screenshot_writer import ScreenshotWriter
+from timing import timed
+from driver_lifecycle import DriverLifecycle
+
+
+# Implementations selectable with browser.backend
+BACKENDS = ('selenium', 'playwright')
+
+# Readiness conditions understood by wait_for_condition
+WAIT_CONDITIONS = (
+    'visible',        # element located by 'locator' is visible
+    'rows_rendered',  # rows located by 'locator' were re-rendered (old rows went stale)
+    'spinner_gone',   # element located by 'locator' is hidden or removed
+    'ready_state',    # document.readyState is 'complete'
+    'url_changed',    # current URL differs from the URL before the action
+    'url_contains',   # current URL contains 'value'
+    'sleep',          # fixed sleep of 'seconds' (only when explicitly configured)
+    'none',           # do not wait at all
+)
+
+PAGE_LOAD_STRATEGIES = ('normal', 'eager', 'none')
+
+# URL patterns blocked for each resource type in browser.block_resources.resource_types
+RESOURCE_TYPE_PATTERNS = {
+    'image': ('*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp'),
+    'font': ('*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'),
+    'media': ('*.mp4', '*.webm', '*.ogg', '*.mp3', '*.wav'),
+    'stylesheet': ('*.css',),
+}
+
+# Sets form fields through the native value setters (so frameworks that track the
+# value notice the change), dispatches input/change events and reads the values back
+FILL_FIELDS_SCRIPT = """
+    function find(by, value) {
+        switch (by) {
+            case 'xpath':
+                return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            case 'css selector':
+                return document.querySelector(value);
+            case 'id':
+                return document.getElementById(value);
+            case 'name':
+                return document.getElementsByName(value)[0] || null;
+            case 'class name':
+                return document.getElementsByClassName(value)[0] || null;
+            case 'tag name':
+                return document.getElementsByTagName(value)[0] || null;
+        }
+        return null;
+    }
+    var results = [];
+    for (var i = 0; i < arguments[0].length; i++) {
+        var field = arguments[0][i];
+        var element = find(field[0], field[1]);
+        if (!element) {
+            results.push(null);
+            continue;
+        }
+        var text = field[2];
+        var prototype = HTMLInputElement.prototype;
+        if (element.tagName === 'TEXTAREA') {
+            prototype = HTMLTextAreaElement.prototype;
+        } else if (element.tagName === 'SELECT') {
+            prototype = HTMLSelectElement.prototype;
+            for (var j = 0; j < element.options.length; j++) {
+                var option = element.options[j];
+                if (option.value === text || option.text.trim().toLowerCase() === text.trim().toLowerCase()) {
+                    text = option.value;
+                    break;
+                }
+            }
+        }
+        element.focus();
+        Object.getOwnPropertyDescriptor(prototype, 'value').set.call(element, text);
+        element.dispatchEvent(new Event('input', {bubbles: true}));
+        element.dispatchEvent(new Event('change', {bubbles: true}));
+        element.blur();
+        if (element.tagName === 'SELECT') {
+            results.push(element.selectedIndex >= 0 ? element.options[element.selectedIndex].text : '');
+        } else {
+            results.push(element.value);
+        }
+    }
+    return results;
+"""
+
+# Reads every row of a table with its cell texts and the href of its link
+EXTRACT_TABLE_SCRIPT = """
+    var rows = document.querySelectorAll(arguments[0]);
+    var results = [];
+    for (var i = 0; i < rows.length; i++) {
+        var cells = [];
+        var columns = rows[i].querySelectorAll('td');
+        for (var j = 0; j < columns.length; j++) {
+            cells.push(columns[j].textContent.trim());
+        }
+        if (!cells.length) {
+            continue;
+        }
+        var link = arguments[1] ? rows[i].querySelector(arguments[1]) : null;
+        results.push({cells: cells, href: link ? link.href : null});
+    }
+    return results;
+"""
+
+# Screenshot kinds captured by each screenshot policy
+SCREENSHOT_POLICIES = {
+    'off': (),
+    'on_failure': ('failure',),
+    'on_save': ('failure', 'save'),
+    'all': ('failure', 'save', 'step'),
+}
+
+
+def create_browser(config=None, worker_id=None):
+    """
+    Create the browser implementation selected by browser.backend
+
+    Args:
+        config: Dictionary containing configuration options
+        worker_id: Optional worker index (see BrowserBackend)
+
+    Returns:
+        BrowserController ('selenium', the default) or PlaywrightController ('playwright')
+    """
+    backend = (config or {}).get('browser', {}).get('backend', 'selenium')
+    if backend not in BACKENDS:
+        logging.getLogger(__name__).warning(f"Unknown browser backend '{backend}', using 'selenium'")
+        backend = 'selenium'
+
+    # Imported here so each backend's library is only needed when it is used
+    if backend == 'playwright':
+        from playwright_controller import PlaywrightController
+        return PlaywrightController(config, worker_id=worker_id)
+
+    from browser_controller import BrowserController
+    return BrowserController(config, worker_id=worker_id)
+
+
+class BrowserBackend(ABC):
+    """
+    Browser session driven by CRMAutomator
+
+    Locator types are Selenium's By values ('xpath', 'css selector', 'id', ...),
+    as produced by locators.compile_locators; tab handles are opaque strings.
+    """
+
+    def __init__(self, config=None, worker_id=None):
+        """
+        Initialize the settings shared by all backends
+
+        Args:
+            config: Dictionary containing configuration options
+            worker_id: Optional worker index; parallel sessions each get their own
+                profile directory because Chrome locks a profile to one process
+        """
+        self.config = config or {}
+        browser_config = self.config.get('browser', {})
+        self.timeout = browser_config.get('timeout', self.config.get('timeout', 10))  # Default timeout for waits
+        self.logger = logging.getLogger(type(self).__module__)
+
+        # Persistent session settings (empty values disable them)
+        self.user_data_dir = None
+        if browser_config.get('user_data_dir'):
+            profile_name = 'default' if worker_id is None else f"worker-{worker_id}"
+            self.user_data_dir = os.path.abspath(os.path.join(browser_config['user_data_dir'], profile_name))
+        self.cookie_file = browser_config.get('cookie_file') or None
+
+        self.page_load_strategy = browser_config.get('page_load_strategy', 'normal')
+        self._start_thread = None
+        self._start_result = False
+
+        # Tracks the browser processes so they can be recycled and reaped after crashes
+        self.lifecycle = DriverLifecycle(self.config)
+
+        # Resource blocking; network stats are only collected when wanted
+        block_config = browser_config.get('block_resources', {})
+        self.block_resources = block_config.get('enabled', False)
+        self.blocked_url_patterns = self._blocked_url_patterns(block_config)
+        self.collect_stats = self.block_resources and block_config.get('stats', True)
+        self.network_stats = {'requests': 0, 'transferred_bytes': 0, 'blocked_requests': 0}
+
+        # Screenshot settings; files are written by a background thread
+        screenshot_config = browser_config.get('screenshots', {})
+        self.screenshot_policy = screenshot_config.get('policy', 'on_failure')
+        if self.screenshot_policy not in SCREENSHOT_POLICIES:
+            self.logger.warning(f"Unknown screenshot policy '{self.screenshot_policy}', using 'on_failure'")
+            self.screenshot_policy = 'on_failure'
+        self.screenshot_dir = screenshot_config.get('directory', 'screenshots')
+        self._screenshot_writer = None
+
+    def __del__(self):
+        """Ensure the browser is closed when object is destroyed"""
+        self.close()
+
+    def start_browser_async(self, headless=False, page_load_strategy=None):
+        """
+        Start the browser session in a background thread
+
+        Lets the browser launch while other start-up work (e.g. parsing the
+        Excel file) is still running. Call wait_for_browser before using it.
+
+        Args:
+            headless: Boolean indicating if browser should run in headless mode
+            page_load_strategy: Optional page load strategy ('normal', 'eager' or 'none')
+        """
+        def run():
+            self._start_result = self.start_browser(headless, page_load_strategy)
+
+        self._start_result = False
+        self._start_thread = threading.Thread(target=run, name="browser-prewarm", daemon=True)
+        self._start_thread.start()
+
+    def wait_for_browser(self, timeout=None):
+        """
+        Wait for a browser started with start_browser_async
+
+        Args:
+            timeout: Maximum time to wait in seconds (None waits until start-up finished)
+
+        Returns:
+            Boolean indicating if the browser was started successfully
+        """
+        if self._start_thread:
+            self._start_thread.join(timeout)
+            if self._start_thread.is_alive():
+                return False
+            self._start_thread = None
+            return self._start_result
+        return self.is_running()
+
+    def _blocked_url_patterns(self, block_config):
+        """
+        Build the list of blocked URL patterns from the block_resources configuration
+
+        Args:
+            block_config: The 'browser.block_resources' configuration section
+
+        Returns:
+            List of URL patterns ('*' wildcards) to block
+        """
+        patterns = list(block_config.get('url_patterns', []))
+        for resource_type in block_config.get('resource_types', []):
+            if resource_type not in RESOURCE_TYPE_PATTERNS:
+                self.logger.warning(f"Unknown resource type to block: {resource_type}")
+                continue
+            patterns.extend(RESOURCE_TYPE_PATTERNS[resource_type])
+        return patterns
+
+    def _network_summary(self):
+        """
+        Get the network stats with the estimate of the bytes avoided
+
+        Returns:
+            Dictionary with 'requests', 'transferred_bytes', 'blocked_requests' and
+            'estimated_bytes_avoided' (blocked requests times the average size of
+            the requests that were loaded)
+        """
+        stats = dict(self.network_stats)
+        average_size = stats['transferred_bytes'] / stats['requests'] if stats['requests'] else 0
+        stats['estimated_bytes_avoided'] = int(stats['blocked_requests'] * average_size)
+        return stats
+
+    def _log_network_stats(self):
+        """Log the network stats of the session"""
+        stats = self.collect_network_stats()
+        self.logger.info(
+            f"Network: {stats['requests']} requests ({stats['transferred_bytes']} bytes) loaded, "
+            f"{stats['blocked_requests']} blocked (~{stats['estimated_bytes_avoided']} bytes avoided)"
+        )
+
+    def _wants_screenshot(self, kind):
+        """Check if the screenshot policy captures screenshots of a kind"""
+        return kind in SCREENSHOT_POLICIES[self.screenshot_policy]
+
+    def _submit_screenshot(self, file_path, png_data):
+        """
+        Hand a captured screenshot to the background writer
+
+        Args:
+            file_path: Path to save the screenshot; a bare file name is placed
+                in the configured screenshot directory
+            png_data: PNG bytes
+
+        Returns:
+            Boolean indicating if the screenshot was queued
+        """
+        if not os.path.dirname(file_path):
+            file_path = os.path.join(self.screenshot_dir, file_path)
+        if not self._screenshot_writer:
+            self._screenshot_writer = ScreenshotWriter()
+        return self._screenshot_writer.submit(file_path, png_data)
+
+    def _close_screenshot_writer(self):
+        """Flush and stop the background screenshot writer"""
+        if self._screenshot_writer:
+            self._screenshot_writer.close()
+            self._screenshot_writer = None
+
+    @timed('browser.extract_table')
+    def extract_table(self, row_selector, link_selector=None):
+        """
+        Read all rows of a table in one script call
+
+        Args:
+            row_selector: CSS selector of the table rows (rows without cells, such
+                as header rows, are left out)
+            link_selector: Optional CSS selector of the link inside each row
+
+        Returns:
+            List of dictionaries with 'cells' (list of cell texts) and 'href' (URL
+            of the row's link or None), or None if the script failed
+        """
+        rows = self.execute_script(EXTRACT_TABLE_SCRIPT, row_selector, link_selector)
+        return rows if isinstance(rows, list) else None
+
+    def save_cookies(self, file_path=None):
+        """
+        Save the cookies of the current session to a JSON cookie jar
+
+        Args:
+            file_path: Path of the cookie jar (defaults to browser.cookie_file)
+
+        Returns:
+            Boolean indicating if cookies were saved
+        """
+        file_path = file_path or self.cookie_file
+        if not self.is_running() or not file_path:
+            return False
+
+        try:
+            cookies = self.get_cookies()
+            if not cookies:
+                return False
+
+            directory = os.path.dirname(os.path.abspath(file_path))
+            os.makedirs(directory, exist_ok=True)
+
+            # Write to a temporary file first so parallel sessions never read a partial jar
+            temp_path = f"{file_path}.{os.getpid()}.{id(self)}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(cookies, f)
+            os.replace(temp_path, file_path)
+            return True
+        except Exception as e:
+            self.logger.error(f"Error saving cookies: {str(e)}")
+            return False
+
+    def _condition_list(self, condition):
+        """Normalize a condition or list of conditions to a list"""
+        if isinstance(condition, list):
+            return condition
+        return [condition]
+
+    @abstractmethod
+    def start_browser(self, headless=False, page_load_strategy=None):
+        """Start the browser session; returns a boolean indicating success"""
+
+    @abstractmethod
+    def is_running(self):
+        """Check if the browser session is started"""
+
+    @abstractmethod
+    def close(self):
+        """Close the browser session (saving cookies when a cookie jar is configured)"""
+
+    @abstractmethod
+    def collect_network_stats(self):
+        """Get the network stats of the session (see _network_summary)"""
+
+    @abstractmethod
+    def current_url(self):
+        """Get the URL of the active tab, or '' if the browser is not running"""
+
+    @abstractmethod
+    def navigate_to(self, url):
+        """Navigate the active tab to a URL; returns a boolean indicating success"""
+
+    @abstractmethod
+    def current_tab(self):
+        """Get the handle of the active tab, or None"""
+
+    @abstractmethod
+    def tab_handles(self):
+        """Get the handles of all open tabs"""
+
+    @abstractmethod
+    def open_tab(self):
+        """Open a new blank tab without leaving the active one; returns its handle or None"""
+
+    @abstractmethod
+    def load_in_tab(self, handle, url):
+        """Start loading a URL in another tab without waiting; returns a boolean"""
+
+    @abstractmethod
+    def switch_to_tab(self, handle):
+        """Make another tab the active one; returns a boolean"""
+
+    @abstractmethod
+    def wait_for_element(self, locator_type, locator_value, timeout=None):
+        """Wait for an element to be visible; returns a truthy element handle or None"""
+
+    @abstractmethod
+    def click_element(self, locator_type, locator_value, wait_time=0, cached=False):
+        """Click an element; returns a boolean indicating success"""
+
+    @abstractmethod
+    def input_text(self, locator_type, locator_value, text, clear_first=True, cached=False):
+        """Type text into an element; returns a boolean indicating success"""
+
+    @abstractmethod
+    def fill_fields(self, fields):
+        """Set several (locator_type, locator_value, text) fields in one call; see FILL_FIELDS_SCRIPT"""
+
+    @abstractmethod
+    def get_text(self, locator_type, locator_value):
+        """Get the visible text of an element, or '' if it is not found"""
+
+    @abstractmethod
+    def get_text_content(self, locator_type, locator_value):
+        """Get the textContent of the first matching element without waiting, or None if there is none"""
+
+    @abstractmethod
+    def execute_script(self, script, *args):
+        """Run a Selenium-style script ('return ...', arguments[i]) and return its result, or None"""
+
+    @abstractmethod
+    def get_cookies(self):
+        """Get the session cookies as Selenium-style dictionaries"""
+
+    @abstractmethod
+    def take_screenshot(self, file_path, kind='step'):
+        """Capture a screenshot if the screenshot policy allows it; returns a boolean"""
+
+    @abstractmethod
+    def begin_wait(self, condition):
+        """Capture the page state a condition needs before the triggering action"""
+
+    @abstractmethod
+    def wait_for_condition(self, condition, state=None):
+        """Wait until a readiness condition (or all in a list) holds; returns a boolean"""
+
+    @abstractmethod
+    def load_cookies(self, file_path=None):
+        """Load cookies from a JSON cookie jar into the session; returns a boolean"""
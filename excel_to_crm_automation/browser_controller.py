@@ -1,10 +1,13 @@
 """
 Browser Controller Module
 
-This module handles browser automation for CRM updates.
+This module handles browser automation for CRM updates with Selenium.
 """
+import os
+import re
+import json
 import time
-import logging
+import threading
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -13,33 +16,56 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
+from selenium.common.exceptions import (
+    TimeoutException, NoSuchElementException, ElementClickInterceptedException, StaleElementReferenceException
+)
 from webdriver_manager.chrome import ChromeDriverManager
 
+from timing import timed, recorder, WAIT
+from browser_backend import (
+    BrowserBackend,
+    WAIT_CONDITIONS,
+    PAGE_LOAD_STRATEGIES,
+    FILL_FIELDS_SCRIPT
+)
 
-class BrowserController:
-    def __init__(self, config=None):
+
+# Serializes driver resolution so parallel sessions do not download the driver twice
+_DRIVER_LOCK = threading.Lock()
+
+
+class BrowserController(BrowserBackend):
+    def __init__(self, config=None, worker_id=None):
         """
         Initialize the browser controller
         
         Args:
             config: Dictionary containing configuration options
+            worker_id: Optional worker index; parallel sessions each get their own
+                profile directory because Chrome locks a profile to one process
         """
-        self.config = config or {}
         self.driver = None
-        self.timeout = self.config.get('timeout', 10)  # Default timeout for waits
-        self.logger = logging.getLogger(__name__)
-    
-    def __del__(self):
-        """Ensure driver is closed when object is destroyed"""
-        self.close()
+        super().__init__(config, worker_id)
+        browser_config = self.config.get('browser', {})
+        
+        # Driver resolution settings
+        self.driver_version = browser_config.get('driver_version') or None
+        self.driver_cache = browser_config.get('driver_cache', '.chromedriver_cache.json')
+        
+        # Element handles reused across invoices, keyed by locator and only
+        # valid for the page generation they were found in
+        self._page_generation = 0
+        self._element_cache = {}
     
-    def start_browser(self, headless=False):
+    @timed('browser.start_browser')
+    def start_browser(self, headless=False, page_load_strategy=None):
         """
         Start the browser session
         
         Args:
             headless: Boolean indicating if browser should run in headless mode
+            page_load_strategy: Optional page load strategy ('normal', 'eager' or 'none'),
+                defaults to browser.page_load_strategy
             
         Returns:
             Boolean indicating if browser was started successfully
@@ -53,12 +79,30 @@ class BrowserController:
             chrome_options.add_argument("--disable-gpu")
             chrome_options.add_argument("--window-size=1920,1080")
             
+            # 'eager' and 'none' return from navigation before all resources are loaded;
+            # the configured wait conditions decide when a page is ready
+            strategy = page_load_strategy or self.page_load_strategy
+            if strategy in PAGE_LOAD_STRATEGIES:
+                chrome_options.page_load_strategy = strategy
+            else:
+                self.logger.warning(f"Unknown page load strategy '{strategy}', using 'normal'")
+            
+            # Reuse a persistent profile so cookies and the HTTP cache survive between runs
+            if self.user_data_dir:
+                os.makedirs(self.user_data_dir, exist_ok=True)
+                chrome_options.add_argument(f"--user-data-dir={self.user_data_dir}")
+                
+            if self.collect_stats:
+                chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+            
+            driver_path = self.resolve_driver_path()
             try:
-                # First try using the WebDriver Manager for automatic driver management
-                service = Service(ChromeDriverManager().install())
+                if not driver_path:
+                    raise RuntimeError("ChromeDriver path could not be resolved")
+                service = Service(driver_path)
                 self.driver = webdriver.Chrome(service=service, options=chrome_options)
             except Exception as driver_error:
-                self.logger.warning(f"Failed to use WebDriverManager: {str(driver_error)}")
+                self.logger.warning(f"Failed to start Chrome with resolved driver: {str(driver_error)}")
                 
                 # Fallback to the default Chrome driver path
                 try:
@@ -67,22 +111,161 @@ class BrowserController:
                     self.logger.error(f"Failed to start Chrome with default path: {str(fallback_error)}")
                     return False
             
-            self.driver.maximize_window()
+            # The window size is already set by the options; headless windows cannot be maximized
+            if not headless:
+                self.driver.maximize_window()
+            
+            self.lifecycle.register(self)
+            
+            if self.block_resources:
+                self.apply_resource_blocking()
+            
+            if self.cookie_file:
+                self.load_cookies()
             return True
         except Exception as e:
             self.logger.error(f"Error starting browser: {str(e)}")
             return False
     
+    def resolve_driver_path(self):
+        """
+        Resolve the ChromeDriver executable, reusing the path cached on disk
+        
+        WebDriver Manager is only asked (which may mean a network round-trip)
+        when there is no cached path, the cached file is gone, or its version
+        does not match browser.driver_version.
+        
+        Returns:
+            Path to the ChromeDriver executable, or None if it could not be resolved
+        """
+        with _DRIVER_LOCK:
+            cached = {}
+            if self.driver_cache and os.path.exists(self.driver_cache):
+                try:
+                    with open(self.driver_cache, 'r') as f:
+                        cached = json.load(f)
+                except Exception as e:
+                    self.logger.warning(f"Ignoring unreadable driver cache {self.driver_cache}: {str(e)}")
+                    
+            cached_path = cached.get('path')
+            if cached_path and os.path.exists(cached_path):
+                cached_version = str(cached.get('version') or '')
+                pinned = str(self.driver_version or '')
+                if not pinned or cached_version == pinned or cached_version.startswith(pinned + '.'):
+                    return cached_path
+                    
+            try:
+                if self.driver_version:
+                    driver_path = ChromeDriverManager(driver_version=self.driver_version).install()
+                else:
+                    driver_path = ChromeDriverManager().install()
+            except Exception as e:
+                self.logger.warning(f"Failed to use WebDriverManager: {str(e)}")
+                return None
+                
+            version_match = re.search(r'(\d+\.\d+\.\d+\.\d+)', driver_path)
+            if self.driver_cache:
+                try:
+                    with open(self.driver_cache, 'w') as f:
+                        json.dump({
+                            'path': driver_path,
+                            'version': version_match.group(1) if version_match else self.driver_version,
+                            'resolved_at': time.time()
+                        }, f, indent=2)
+                except Exception as e:
+                    self.logger.warning(f"Could not write driver cache {self.driver_cache}: {str(e)}")
+            return driver_path
+    
+    def apply_resource_blocking(self):
+        """
+        Block the configured URL patterns for the whole session
+        
+        Uses Network.setBlockedURLs of the DevTools protocol, so blocked requests
+        still show up (as blocked) in the performance log used for the stats.
+        
+        Returns:
+            Boolean indicating if resource blocking was applied
+        """
+        if not self.driver or not self.blocked_url_patterns:
+            return False
+            
+        try:
+            self._block_urls_in_current_tab()
+            self.logger.info(f"Blocking {len(self.blocked_url_patterns)} URL patterns")
+            return True
+        except Exception as e:
+            self.logger.warning(f"Could not block URLs through DevTools: {str(e)}")
+            return False
+            
+    def _block_urls_in_current_tab(self):
+        """Send the blocked URL patterns to the tab the driver is switched to (DevTools commands are per tab)"""
+        self.driver.execute_cdp_cmd('Network.enable', {})
+        self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.blocked_url_patterns})
+    
+    def collect_network_stats(self):
+        """
+        Add the network events logged since the last call to the network stats
+        
+        Returns:
+            Dictionary with 'requests', 'transferred_bytes', 'blocked_requests' and
+            'estimated_bytes_avoided' (blocked requests times the average size of
+            the requests that were loaded)
+        """
+        if self.driver and self.collect_stats:
+            try:
+                for entry in self.driver.get_log('performance'):
+                    message = json.loads(entry['message']).get('message', {})
+                    method = message.get('method')
+                    params = message.get('params', {})
+                    if method == 'Network.loadingFinished':
+                        self.network_stats['requests'] += 1
+                        self.network_stats['transferred_bytes'] += int(params.get('encodedDataLength', 0))
+                    elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+                        self.network_stats['blocked_requests'] += 1
+            except Exception as e:
+                self.logger.debug(f"Could not read performance log: {str(e)}")
+        return self._network_summary()
+    
     def close(self):
         """Close the browser session"""
         if self.driver:
+            driver_pid = self.lifecycle.driver_pid(self)
             try:
+                if self.collect_stats:
+                    self._log_network_stats()
+                if self.cookie_file:
+                    self.save_cookies()
                 self.driver.quit()
             except Exception as e:
                 self.logger.error(f"Error closing browser: {str(e)}")
+                # The driver did not shut down cleanly, make sure no processes are left
+                if driver_pid:
+                    self.lifecycle.kill_process_tree(driver_pid)
             finally:
                 self.driver = None
+                self.lifecycle.unregister(self, driver_pid)
+                
+        self._close_screenshot_writer()
     
+    def is_running(self):
+        """
+        Check if the browser session is started
+        
+        Returns:
+            Boolean indicating if a driver is running
+        """
+        return self.driver is not None
+    
+    def current_url(self):
+        """
+        Get the URL of the active tab
+        
+        Returns:
+            Current URL, or an empty string if the browser is not running
+        """
+        return self.driver.current_url if self.driver else ''
+    
+    @timed('browser.navigate_to')
     def navigate_to(self, url):
         """
         Navigate to a specific URL
@@ -97,12 +280,123 @@ class BrowserController:
             return False
             
         try:
+            # Drain the performance log so it does not grow for the whole run
+            if self.collect_stats:
+                self.collect_network_stats()
+            self._page_generation += 1
             self.driver.get(url)
             return True
         except Exception as e:
             self.logger.error(f"Error navigating to {url}: {str(e)}")
             return False
     
+    def current_tab(self):
+        """
+        Get the window handle of the active tab
+        
+        Returns:
+            Window handle, or None if the browser is not running
+        """
+        try:
+            return self.driver.current_window_handle if self.driver else None
+        except Exception as e:
+            self.logger.error(f"Error reading the active tab: {str(e)}")
+            return None
+    
+    def tab_handles(self):
+        """
+        Get the window handles of all open tabs
+        
+        Returns:
+            List of window handles
+        """
+        try:
+            return list(self.driver.window_handles) if self.driver else []
+        except Exception as e:
+            self.logger.error(f"Error listing tabs: {str(e)}")
+            return []
+    
+    def open_tab(self):
+        """
+        Open a new blank tab without leaving the active one
+        
+        Returns:
+            Window handle of the new tab, or None on error
+        """
+        current = self.current_tab()
+        if not current:
+            return None
+            
+        try:
+            self.driver.switch_to.new_window('tab')
+            handle = self.driver.current_window_handle
+            # Blocking only applies to the tab it was sent to, so apply it before the first load
+            if self.block_resources and self.blocked_url_patterns:
+                try:
+                    self._block_urls_in_current_tab()
+                except Exception as e:
+                    self.logger.warning(f"Could not block URLs in the new tab: {str(e)}")
+            self.driver.switch_to.window(current)
+            return handle
+        except Exception as e:
+            self.logger.error(f"Error opening a tab: {str(e)}")
+            return None
+    
+    @timed('browser.load_in_tab')
+    def load_in_tab(self, handle, url):
+        """
+        Start loading a URL in another tab and return to the active tab immediately
+        
+        The navigation is started from JavaScript, so this does not wait for the
+        page to load; it keeps loading while the active tab is used.
+        
+        Args:
+            handle: Window handle of the tab to load the URL in
+            url: URL to load
+            
+        Returns:
+            Boolean indicating if the navigation was started
+        """
+        current = self.current_tab()
+        if not current or handle == current:
+            return False
+            
+        try:
+            self.driver.switch_to.window(handle)
+            self.driver.execute_script("window.location.href = arguments[0];", url)
+            return True
+        except Exception as e:
+            self.logger.error(f"Error loading {url} in a background tab: {str(e)}")
+            return False
+        finally:
+            try:
+                self.driver.switch_to.window(current)
+            except Exception as e:
+                self.logger.error(f"Error returning to the active tab: {str(e)}")
+    
+    def switch_to_tab(self, handle):
+        """
+        Make another tab the active one
+        
+        Args:
+            handle: Window handle of the tab
+            
+        Returns:
+            Boolean indicating if the tab is now active
+        """
+        if not self.driver:
+            return False
+            
+        try:
+            self.driver.switch_to.window(handle)
+            # Cached element handles belong to the previous tab's page
+            self._page_generation += 1
+            return True
+        except Exception as e:
+            self.logger.error(f"Error switching tabs: {str(e)}")
+            return False
+    
+    @timed('browser.wait_for_element', WAIT)
     def wait_for_element(self, locator_type, locator_value, timeout=None):
         """
         Wait for an element to be visible on the page
@@ -132,6 +426,7 @@ class BrowserController:
             self.logger.error(f"Error waiting for element: {str(e)}")
             return None
     
+    @timed('browser.find_element')
     def find_element(self, locator_type, locator_value):
         """
         Find an element on the page
@@ -155,7 +450,8 @@ class BrowserController:
             self.logger.error(f"Error finding element: {str(e)}")
             return None
     
-    def click_element(self, locator_type, locator_value, wait_time=0):
+    @timed('browser.click_element')
+    def click_element(self, locator_type, locator_value, wait_time=0, cached=False):
         """
         Click on an element
         
@@ -163,6 +459,8 @@ class BrowserController:
             locator_type: Type of locator (e.g., By.ID, By.XPATH)
             locator_value: Value of the locator
             wait_time: Time to wait after clicking (in seconds)
+            cached: Boolean indicating if the element handle may be reused from
+                an earlier call on the same page
             
         Returns:
             Boolean indicating if click was successful
@@ -170,30 +468,38 @@ class BrowserController:
         if not self.driver:
             return False
             
-        element = self.wait_for_element(locator_type, locator_value)
+        element = self._resolve_element(locator_type, locator_value, cached)
         if not element:
             return False
             
         try:
-            element.click()
-            if wait_time > 0:
-                time.sleep(wait_time)
-            return True
-        except ElementClickInterceptedException:
-            # Try with JavaScript if normal click fails
+            return self._click(element, wait_time)
+        except StaleElementReferenceException:
+            # The page was re-rendered since the handle was found, resolve it again
+            element = self._resolve_element(locator_type, locator_value, cached, refresh=True)
+            if not element:
+                return False
             try:
-                self.driver.execute_script("arguments[0].click();", element)
-                if wait_time > 0:
-                    time.sleep(wait_time)
-                return True
+                return self._click(element, wait_time)
             except Exception as e:
-                self.logger.error(f"Error clicking element with JavaScript: {str(e)}")
+                self.logger.error(f"Error clicking element: {str(e)}")
                 return False
         except Exception as e:
             self.logger.error(f"Error clicking element: {str(e)}")
             return False
     
-    def input_text(self, locator_type, locator_value, text, clear_first=True):
+    def _click(self, element, wait_time):
+        """Click an element, falling back to a JavaScript click if the click is intercepted"""
+        try:
+            element.click()
+        except ElementClickInterceptedException:
+            # Try with JavaScript if normal click fails
+            self.driver.execute_script("arguments[0].click();", element)
+        recorder.sleep(wait_time, 'browser.click_wait')
+        return True
+    
+    @timed('browser.input_text')
+    def input_text(self, locator_type, locator_value, text, clear_first=True, cached=False):
         """
         Input text into an element
         
@@ -202,6 +508,8 @@ class BrowserController:
             locator_value: Value of the locator
             text: Text to input
             clear_first: Boolean indicating if field should be cleared first
+            cached: Boolean indicating if the element handle may be reused from
+                an earlier call on the same page
             
         Returns:
             Boolean indicating if input was successful
@@ -209,19 +517,88 @@ class BrowserController:
         if not self.driver:
             return False
             
-        element = self.wait_for_element(locator_type, locator_value)
+        element = self._resolve_element(locator_type, locator_value, cached)
         if not element:
             return False
             
         try:
-            if clear_first:
-                element.clear()
-            element.send_keys(text)
-            return True
+            return self._type(element, text, clear_first)
+        except StaleElementReferenceException:
+            # The page was re-rendered since the handle was found, resolve it again
+            element = self._resolve_element(locator_type, locator_value, cached, refresh=True)
+            if not element:
+                return False
+            try:
+                return self._type(element, text, clear_first)
+            except Exception as e:
+                self.logger.error(f"Error inputting text: {str(e)}")
+                return False
         except Exception as e:
             self.logger.error(f"Error inputting text: {str(e)}")
             return False
     
+    def _type(self, element, text, clear_first):
+        """Type text into an element"""
+        if clear_first:
+            element.clear()
+        element.send_keys(text)
+        return True
+    
+    def _resolve_element(self, locator_type, locator_value, cached=False, refresh=False):
+        """
+        Get a visible element, reusing a cached handle when allowed
+        
+        Args:
+            locator_type: Type of locator (e.g., By.ID, By.XPATH)
+            locator_value: Value of the locator
+            cached: Boolean indicating if the handle cache may be used
+            refresh: Boolean indicating if a cached handle must be replaced
+            
+        Returns:
+            WebElement if found, None otherwise
+        """
+        key = (locator_type, locator_value)
+        if cached and not refresh:
+            entry = self._element_cache.get(key)
+            if entry and entry[0] == self._page_generation:
+                return entry[1]
+                
+        element = self.wait_for_element(locator_type, locator_value)
+        if cached:
+            if element:
+                self._element_cache[key] = (self._page_generation, element)
+            else:
+                self._element_cache.pop(key, None)
+        return element
+    
+    @timed('browser.fill_fields')
+    def fill_fields(self, fields):
+        """
+        Set several form fields in a single script call
+        
+        Args:
+            fields: List of (locator_type, locator_value, text) tuples; locator types
+                other than XPATH, CSS_SELECTOR, ID, NAME, CLASS_NAME and TAG_NAME are
+                not supported
+            
+        Returns:
+            List with the value each field holds afterwards (the visible option
+            text for selects, None for fields that were not found), or None if
+            the script failed
+        """
+        if not self.driver:
+            return None
+            
+        try:
+            return self.driver.execute_script(
+                FILL_FIELDS_SCRIPT,
+                [[locator_type, locator_value, str(text)] for locator_type, locator_value, text in fields]
+            )
+        except Exception as e:
+            self.logger.error(f"Error filling fields: {str(e)}")
+            return None
+    
+    @timed('browser.get_text')
     def get_text(self, locator_type, locator_value):
         """
         Get text from an element
@@ -246,6 +623,26 @@ class BrowserController:
             self.logger.error(f"Error getting text: {str(e)}")
             return ""
     
+    def get_text_content(self, locator_type, locator_value):
+        """
+        Get the textContent of an element without waiting for it to be visible
+        
+        Args:
+            locator_type: Type of locator (e.g., By.ID, By.XPATH)
+            locator_value: Value of the locator
+            
+        Returns:
+            textContent of the first matching element, or None if there is none
+        """
+        if not self.driver:
+            return None
+            
+        elements = self.driver.find_elements(locator_type, locator_value)
+        if not elements:
+            return None
+        return elements[0].get_attribute('textContent') or ''
+    
+    @timed('browser.execute_script')
     def execute_script(self, script, *args):
         """
         Execute JavaScript on the page
@@ -266,22 +663,190 @@ class BrowserController:
             self.logger.error(f"Error executing script: {str(e)}")
             return None
     
-    def take_screenshot(self, file_path):
+    @timed('browser.take_screenshot')
+    def take_screenshot(self, file_path, kind='step'):
         """
-        Take a screenshot of the current page
+        Take a screenshot of the current page if the screenshot policy allows it
+        
+        The PNG data is captured here and written to disk by a background thread.
         
         Args:
-            file_path: Path to save the screenshot
+            file_path: Path to save the screenshot; a bare file name is placed
+                in the configured screenshot directory
+            kind: Kind of screenshot: 'step', 'save' or 'failure'
             
         Returns:
             Boolean indicating if screenshot was taken successfully
         """
+        if not self.driver or not self._wants_screenshot(kind):
+            return False
+            
+        try:
+            return self._submit_screenshot(file_path, self.driver.get_screenshot_as_png())
+        except Exception as e:
+            self.logger.error(f"Error taking screenshot: {str(e)}")
+            return False
+    
+    def begin_wait(self, condition):
+        """
+        Capture the page state a condition needs before the triggering action
+        
+        Conditions such as 'url_changed' and 'rows_rendered' compare against the
+        page as it was before a click, so call this first and pass the result
+        to wait_for_condition afterwards.
+        
+        Args:
+            condition: Condition dictionary (or list of them) from the configuration
+            
+        Returns:
+            Dictionary with the captured state
+        """
+        state = {'url': None, 'anchors': {}}
+        if not self.driver or not condition:
+            return state
+            
+        try:
+            state['url'] = self.driver.current_url
+            for index, item in enumerate(self._condition_list(condition)):
+                if item.get('type') == 'rows_rendered' and item.get('locator'):
+                    locator_type, locator_value = self._locator_tuple(item['locator'])
+                    rows = self.driver.find_elements(locator_type, locator_value)
+                    state['anchors'][index] = rows[0] if rows else None
+        except Exception as e:
+            self.logger.warning(f"Could not capture page state before wait: {str(e)}")
+        return state
+    
+    def wait_for_condition(self, condition, state=None):
+        """
+        Wait until a readiness condition (or all conditions in a list) holds
+        
+        Args:
+            condition: Condition dictionary, e.g. {"type": "visible", "locator": {...}},
+                or a list of such dictionaries; each may set its own "timeout"
+            state: State captured by begin_wait before the triggering action
+            
+        Returns:
+            Boolean indicating if the page became ready before the timeout
+        """
         if not self.driver:
             return False
+        if not condition:
+            return True
+            
+        state = state or {'url': None, 'anchors': {}}
+        for index, item in enumerate(self._condition_list(condition)):
+            if not self._wait_for_single_condition(item, state.get('url'), state['anchors'].get(index)):
+                return False
+        return True
+    
+    def _wait_for_single_condition(self, condition, previous_url, anchor):
+        """
+        Wait for one readiness condition
+        
+        Args:
+            condition: Condition dictionary
+            previous_url: URL before the triggering action (for 'url_changed')
+            anchor: First row element before the triggering action (for 'rows_rendered')
+            
+        Returns:
+            Boolean indicating if the condition was met before the timeout
+        """
+        condition_type = condition.get('type', 'ready_state')
+        timeout = condition.get('timeout', self.timeout)
+        
+        if condition_type == 'none':
+            return True
+        if condition_type == 'sleep':
+            recorder.sleep(condition.get('seconds', 0), 'browser.wait_sleep')
+            return True
+        if condition_type not in WAIT_CONDITIONS:
+            self.logger.error(f"Unknown wait condition: {condition_type}")
+            return False
             
+        wait = WebDriverWait(self.driver, timeout)
         try:
-            self.driver.save_screenshot(file_path)
+            with recorder.span(f"browser.wait_{condition_type}", WAIT):
+                self._until_condition(wait, condition_type, condition, previous_url, anchor)
             return True
+        except TimeoutException:
+            self.logger.warning(f"Timeout waiting for condition: {condition}")
+            return False
         except Exception as e:
-            self.logger.error(f"Error taking screenshot: {str(e)}")
-            return False
\ No newline at end of file
+            self.logger.error(f"Error waiting for condition {condition}: {str(e)}")
+            return False
+    
+    def _until_condition(self, wait, condition_type, condition, previous_url, anchor):
+        """Block until a (non-sleep) condition holds; raises TimeoutException otherwise"""
+        if condition_type == 'ready_state':
+            wait.until(lambda driver: driver.execute_script("return document.readyState") == 'complete')
+        elif condition_type == 'url_changed':
+            wait.until(lambda driver: driver.current_url != previous_url)
+        elif condition_type == 'url_contains':
+            wait.until(EC.url_contains(condition.get('value', '')))
+        else:
+            locator = self._locator_tuple(condition.get('locator', {}))
+            if condition_type == 'visible':
+                wait.until(EC.visibility_of_element_located(locator))
+            elif condition_type == 'spinner_gone':
+                wait.until(EC.invisibility_of_element_located(locator))
+            elif condition_type == 'rows_rendered':
+                if anchor is not None:
+                    wait.until(EC.staleness_of(anchor))
+                wait.until(EC.presence_of_element_located(locator))
+    
+    def _locator_tuple(self, locator):
+        """Convert a locator dictionary from the configuration to a (By, value) tuple"""
+        return (getattr(By, locator.get('type', 'XPATH').upper()), locator.get('value', ''))
+    
+    def get_cookies(self):
+        """
+        Get the cookies of the current session
+        
+        Returns:
+            List of cookie dictionaries
+        """
+        return self.driver.get_cookies() if self.driver else []
+    
+    def load_cookies(self, file_path=None):
+        """
+        Load cookies from a JSON cookie jar into the current session
+        
+        Cookies are set through the DevTools protocol, so no page of the CRM
+        domain has to be opened first.
+        
+        Args:
+            file_path: Path of the cookie jar (defaults to browser.cookie_file)
+            
+        Returns:
+            Boolean indicating if cookies were loaded
+        """
+        file_path = file_path or self.cookie_file
+        if not self.driver or not file_path or not os.path.exists(file_path):
+            return False
+            
+        try:
+            with open(file_path, 'r') as f:
+                cookies = json.load(f)
+                
+            cdp_cookies = []
+            for cookie in cookies:
+                cdp_cookie = {
+                    'name': cookie['name'],
+                    'value': cookie['value'],
+                    'domain': cookie.get('domain', ''),
+                    'path': cookie.get('path', '/'),
+                    'secure': cookie.get('secure', False),
+                    'httpOnly': cookie.get('httpOnly', False)
+                }
+                if 'expiry' in cookie:
+                    cdp_cookie['expires'] = cookie['expiry']
+                if cookie.get('sameSite'):
+                    cdp_cookie['sameSite'] = cookie['sameSite']
+                cdp_cookies.append(cdp_cookie)
+                
+            self.driver.execute_cdp_cmd('Network.setCookies', {'cookies': cdp_cookies})
+            self.logger.info(f"Loaded {len(cdp_cookies)} cookies from {file_path}")
+            return True
+        except Exception as e:
+            self.logger.warning(f"Could not load cookies from {file_path}: {str(e)}")
+            return False
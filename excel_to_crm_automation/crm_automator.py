@@ -3,44 +3,182 @@ CRM Automator Module
 
 This module handles the automation of updating the CRM system with data from Excel.
 """
-import os
+import re
 import time
 import logging
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
+import threading
 
-from browser_controller import BrowserController
+from browser_backend import create_browser
+from locators import compile_locators
+from booking_index import BookingIndex
+from http_engine import HttpFormEngine
+from value_compare import is_unchanged, values_match
+from timing import timed, recorder
+from retry_scheduler import (
+    RetryScheduler,
+    InvoiceError,
+    classify_error,
+    RETRYABLE_CATEGORIES,
+    BREAKER_CATEGORIES,
+    NOT_FOUND,
+    SESSION_EXPIRED
+)
+
+
+# Wait used for steps that have no condition configured in crm.waits
+DEFAULT_WAIT = {'type': 'ready_state'}
+
+# Booking number in a Bookings List row, e.g. 'SZ1234' or 'SZ-1234'
+BOOKING_NUMBER_PATTERN = re.compile(r'SZ\s*-?\s*(\d+)', re.IGNORECASE)
+
+# Invoice data keys and the field_mappings entries they are written to
+FIELD_ALIASES = {
+    'supplier': 'supplier_field',
+    'actual_net_cost': 'actual_net_field'
+}
 
 
 class CRMAutomator:
-    def __init__(self, config=None):
+    def __init__(self, config=None, worker_id=None):
         """
         Initialize the CRM automator with configuration
         
         Args:
             config: Dictionary containing configuration options
+            worker_id: Optional worker index when running several sessions in parallel
         """
         self.config = config or {}
-        self.browser = BrowserController(config)
+        self.browser = create_browser(config, worker_id=worker_id)
         self.logger = logging.getLogger(__name__)
         
         # Get CRM configuration
         crm_config = self.config.get('crm', {})
         self.crm_url = crm_config.get('url', '')
+        self.session_probe_url = crm_config.get('session_probe_url', '')
+        self.booking_list_url = crm_config.get('booking_list_url', '') or self.session_probe_url
         self.field_mappings = crm_config.get('field_mappings', {})
         
-    def start(self, headless=False):
+        # Locators from the configuration, compiled once
+        self.locators = compile_locators(crm_config)
+        
+        # Fill all mapped fields with one script call instead of typing into each
+        self.bulk_fill = crm_config.get('bulk_fill', True)
+        
+        # Search results are read as one table and matched by booking number
+        table_config = crm_config.get('booking_table', {})
+        self.booking_table = table_config.get('enabled', True)
+        self.table_row_selector = table_config.get('row_selector', '#bookings tr')
+        self.table_link_selector = table_config.get('link_selector', "a[href*='/crm/booking/']")
+        self._search_matches = []
+        
+        # Readiness condition for each step, see BrowserBackend.wait_for_condition
+        self.waits = crm_config.get('waits', {})
+        
+        # Local index of booking number -> booking detail URL
+        self.booking_index = None
+        index_config = crm_config.get('booking_index', {})
+        if index_config.get('enabled'):
+            try:
+                self.booking_index = BookingIndex(index_config.get('path', 'booking_index.sqlite3'))
+            except Exception as e:
+                self.logger.warning(f"Booking index disabled: {str(e)}")
+        
+        # Optional engine that submits the Actual Net form over plain HTTP
+        self.http_engine = None
+        if crm_config.get('http_fast_path', {}).get('enabled'):
+            engine = HttpFormEngine(self.config)
+            if engine.is_available():
+                self.http_engine = engine
+            else:
+                self.logger.warning("HTTP fast path disabled: supplier and actual net fields must use 'name' locators")
+        
+        # Read-before-write: skip the save when the CRM ('page') or the values
+        # last written by this tool ('cache') already match the invoice
+        compare_config = crm_config.get('compare', {})
+        self.compare_enabled = compare_config.get('enabled', False)
+        self.compare_source = compare_config.get('source', 'page')
+        self.compare_tolerance = compare_config.get('amount_tolerance', 0.005)
+        
+        # Multi-tab pipelining: booking pages of upcoming invoices load in spare
+        # tabs while the current invoice is saved
+        self.pipeline_depth = crm_config.get('pipeline', {}).get('depth', 0)
+        self.upcoming_invoices = None
+        self._prefetched = {}
+        
+        # Start options are kept so the browser can be recycled during long runs
+        self._start_options = {'headless': False, 'page_load_strategy': None}
+        self.invoices_since_start = 0
+        
+        # Optional ProgressJournal shared by all sessions of a run
+        self.journal = None
+        
+        # Where the last attempt was handled: 'cache' (compare cache skip), 'http'
+        # (fast path) or 'browser'; the rate controller only counts browser attempts
+        self.last_attempt_path = None
+        
+    def start(self, headless=False, page_load_strategy=None, background=False):
         """
         Start the browser for CRM automation
         
         Args:
             headless: Boolean indicating if browser should run in headless mode
+            page_load_strategy: Optional page load strategy ('normal', 'eager' or 'none')
+            background: Boolean indicating if the browser should be started in a
+                background thread; call wait_until_started before using it
+            
+        Returns:
+            Boolean indicating if browser was started successfully (always True
+            when started in the background)
+        """
+        self._start_options = {'headless': headless, 'page_load_strategy': page_load_strategy}
+        self.invoices_since_start = 0
+        self._prefetched = {}
+        if background:
+            self.browser.start_browser_async(headless, page_load_strategy)
+            return True
+        return self.browser.start_browser(headless, page_load_strategy)
+    
+    def recycle_if_needed(self, username=None, password=None):
+        """
+        Replace the browser with a fresh one after browser.lifecycle limits are reached
+        
+        Chrome's memory grows over long runs; a new session starts from the saved
+        profile and cookies, logs in again if needed and returns to the Bookings List.
+        
+        Args:
+            username: Optional username for re-login
+            password: Optional password for re-login
+            
+        Returns:
+            Boolean indicating if the browser was recycled
+        """
+        if not self.browser.is_running() or not self.browser.lifecycle.should_recycle(self.browser, self.invoices_since_start):
+            return False
+            
+        self.browser.close()
+        if self.http_engine:
+            self.http_engine.has_cookies = False
+        if not self.start(**self._start_options):
+            self.logger.error("Failed to restart the browser")
+            return False
+            
+        if not self.ensure_logged_in(username, password):
+            self.logger.error("Failed to log in again after restarting the browser")
+        return True
+    
+    def wait_until_started(self, timeout=None):
+        """
+        Wait for a browser started in the background
+        
+        Args:
+            timeout: Maximum time to wait in seconds
             
         Returns:
             Boolean indicating if browser was started successfully
         """
-        return self.browser.start_browser(headless)
+        return self.browser.wait_for_browser(timeout)
     
+    @timed('crm.login_to_crm')
     def login_to_crm(self, username, password):
         """
         Login to the CRM system
@@ -53,10 +191,6 @@ class CRMAutomator:
             Boolean indicating if login was successful
         """
         try:
-            # Get login configuration
-            crm_config = self.config.get('crm', {})
-            login_config = crm_config.get('login', {})
-            
             # Check if the URL is set
             if not self.crm_url:
                 self.logger.error("CRM URL is not set")
@@ -68,23 +202,22 @@ class CRMAutomator:
                 return False
                 
             # Get field locators
-            username_field = login_config.get('username_field', {})
-            password_field = login_config.get('password_field', {})
-            login_button = login_config.get('login_button', {})
+            username_field = self.locators.get('username_field')
+            password_field = self.locators.get('password_field')
+            login_button = self.locators.get('login_button')
             
             # Check if field locators are properly set
             if not username_field or not password_field or not login_button:
                 self.logger.error("Login field locators are incomplete")
                 return False
                 
-            # Wait for the page to load
-            time.sleep(2)
+            # Wait for the login form to be ready
+            self._wait_for_step('login_page')
             
             # Enter username
-            username_locator_type = getattr(By, username_field.get('type', 'XPATH').upper())
             if not self.browser.input_text(
-                username_locator_type,
-                username_field.get('value', ''),
+                username_field.by,
+                username_field.value,
                 username,
                 clear_first=True
             ):
@@ -92,10 +225,9 @@ class CRMAutomator:
                 return False
                 
             # Enter password
-            password_locator_type = getattr(By, password_field.get('type', 'XPATH').upper())
             if not self.browser.input_text(
-                password_locator_type,
-                password_field.get('value', ''),
+                password_field.by,
+                password_field.value,
                 password,
                 clear_first=True
             ):
@@ -103,29 +235,91 @@ class CRMAutomator:
                 return False
                 
             # Click login button
-            login_button_type = getattr(By, login_button.get('type', 'XPATH').upper())
-            if not self.browser.click_element(
-                login_button_type,
-                login_button.get('value', '')
-            ):
+            wait_state = self._begin_step('after_login')
+            if not self.browser.click_element(login_button.by, login_button.value):
                 self.logger.error("Failed to click login button")
                 return False
                 
             # Wait for the dashboard to load
-            time.sleep(5)
+            self._wait_for_step('after_login', wait_state)
             
             # Check if login was successful
-            if "login" in self.browser.driver.current_url.lower():
+            if "login" in self.browser.current_url().lower():
                 self.logger.error("Login failed, still on login page")
                 return False
                 
             self.logger.info("Successfully logged in to CRM")
+            self.browser.save_cookies()
             return True
             
         except Exception as e:
             self.logger.error(f"Error during login: {str(e)}")
             return False
     
+    @timed('crm.is_session_valid')
+    def is_session_valid(self):
+        """
+        Check if the browser already holds an authenticated CRM session
+        
+        Opens the configured session probe page (normally the booking list) once;
+        if the CRM does not redirect to the login page the saved session is still valid.
+        
+        Returns:
+            Boolean indicating if the session is valid
+        """
+        if not self.session_probe_url:
+            return False
+            
+        try:
+            wait_state = self._begin_step('session_probe')
+            if not self.browser.navigate_to(self.session_probe_url):
+                return False
+            self._wait_for_step('session_probe', wait_state)
+            
+            if "login" in self.browser.current_url().lower():
+                self.logger.info("Saved CRM session is not valid, login required")
+                return False
+                
+            self.logger.info("Reusing saved CRM session")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error checking CRM session: {str(e)}")
+            return False
+    
+    def ensure_logged_in(self, username=None, password=None):
+        """
+        Make sure the browser is logged in and on the booking list
+        
+        A saved session is reused when it is still valid; otherwise the
+        credentials are used to log in and navigate to the CRM module.
+        
+        Args:
+            username: Optional username for CRM login
+            password: Optional password for CRM login
+            
+        Returns:
+            Boolean indicating if the browser is logged in
+        """
+        if self.is_session_valid():
+            return True
+            
+        if not (username and password):
+            return False
+            
+        if not self.login_to_crm(username, password):
+            return False
+            
+        return self.navigate_to_crm_module()
+    
+    def save_session(self):
+        """
+        Save the current session cookies (e.g. after a manual login)
+        
+        Returns:
+            Boolean indicating if the session was saved
+        """
+        return self.browser.save_cookies()
+    
     def navigate_to_crm_module(self):
         """
         Navigate to the CRM module from the dashboard
@@ -134,41 +328,31 @@ class CRMAutomator:
             Boolean indicating if navigation was successful
         """
         try:
-            # Get navigation configuration
-            crm_config = self.config.get('crm', {})
-            nav_config = crm_config.get('navigation', {})
-            
             # Get CRM module locator
-            crm_module = nav_config.get('crm_module', {})
+            crm_module = self.locators.get('crm_module')
             if not crm_module:
                 self.logger.error("CRM module locator is not configured")
                 return False
                 
             # Click on CRM module
-            crm_module_type = getattr(By, crm_module.get('type', 'XPATH').upper())
-            if not self.browser.click_element(
-                crm_module_type,
-                crm_module.get('value', '')
-            ):
+            wait_state = self._begin_step('after_crm_module')
+            if not self.browser.click_element(crm_module.by, crm_module.value):
                 self.logger.error("Failed to click on CRM module")
                 return False
                 
             # Wait for the CRM page to load
-            time.sleep(3)
+            self._wait_for_step('after_crm_module', wait_state)
             
             # Check if we need to navigate to booking list
-            booking_list = nav_config.get('booking_list', {})
+            booking_list = self.locators.get('booking_list')
             if booking_list:
-                booking_list_type = getattr(By, booking_list.get('type', 'XPATH').upper())
-                if not self.browser.click_element(
-                    booking_list_type,
-                    booking_list.get('value', '')
-                ):
+                wait_state = self._begin_step('after_booking_list')
+                if not self.browser.click_element(booking_list.by, booking_list.value):
                     self.logger.error("Failed to click on Booking List")
                     return False
                     
                 # Wait for booking list to load
-                time.sleep(3)
+                self._wait_for_step('after_booking_list', wait_state)
                 
             return True
             
@@ -176,6 +360,45 @@ class CRMAutomator:
             self.logger.error(f"Error navigating to CRM module: {str(e)}")
             return False
     
+    @timed('crm.navigate_to_booking_list')
+    def navigate_to_booking_list(self, username=None, password=None):
+        """
+        Make sure the browser is on the Bookings List page
+        
+        Args:
+            username: Optional username for re-login if needed
+            password: Optional password for re-login if needed
+            
+        Returns:
+            Boolean indicating if the Bookings List is open
+        """
+        if "booking-list" in self.browser.current_url().lower():
+            return True
+            
+        self.logger.info("Not on booking list page, attempting to navigate")
+        
+        # Open the Bookings List directly when its URL is known
+        if self.booking_list_url:
+            wait_state = self._begin_step('session_probe')
+            if self.browser.navigate_to(self.booking_list_url):
+                self._wait_for_step('session_probe', wait_state)
+                if "login" not in self.browser.current_url().lower():
+                    return True
+                    
+        # Try to navigate to CRM module
+        if self.navigate_to_crm_module():
+            return True
+            
+        # Try to navigate to CRM directly
+        self.navigate_to_crm()
+        
+        # If we have credentials, try to login
+        if username and password:
+            self.login_to_crm(username, password)
+            return self.navigate_to_crm_module()
+            
+        return False
+    
     def navigate_to_crm(self):
         """
         Navigate to the CRM URL
@@ -189,6 +412,7 @@ class CRMAutomator:
             
         return self.browser.navigate_to(self.crm_url)
     
+    @timed('crm.search_invoice')
     def search_invoice(self, invoice_number):
         """
         Search for an invoice in the CRM system
@@ -199,13 +423,9 @@ class CRMAutomator:
         Returns:
             Boolean indicating if search was successful
         """
-        # Get field mappings from config
-        crm_config = self.config.get('crm', {})
-        field_mappings = crm_config.get('field_mappings', {})
-        
         # Get invoice number search field and search button
-        search_field_locator = field_mappings.get('invoice_number_search', {})
-        search_button_locator = field_mappings.get('search_button', {})
+        search_field_locator = self.locators.get('invoice_number_search')
+        search_button_locator = self.locators.get('search_button')
         
         # Check if search configuration is properly set
         if not search_field_locator or not search_button_locator:
@@ -217,61 +437,77 @@ class CRMAutomator:
             invoice_number = invoice_number[2:].strip()
         
         self.logger.info(f"Searching for invoice number: {invoice_number}")
+        self._search_matches = []
         
         # Take a screenshot before search
-        screenshot_path = f"screenshots/before_search_{invoice_number}_{int(time.time())}.png"
+        screenshot_path = f"before_search_{invoice_number}_{int(time.time())}.png"
         self.browser.take_screenshot(screenshot_path)
         
-        # Input the invoice number in the search field
-        locator_type = getattr(By, search_field_locator.get('type', 'XPATH').upper())
+        # Input the invoice number in the search field (the handle is reused across invoices)
         if not self.browser.input_text(
-            locator_type, 
-            search_field_locator.get('value'), 
+            search_field_locator.by, 
+            search_field_locator.value, 
             invoice_number,
-            clear_first=True
+            clear_first=True,
+            cached=True
         ):
             self.logger.error("Failed to input invoice number in search field")
             return False
             
         # Click the search button
-        locator_type = getattr(By, search_button_locator.get('type', 'XPATH').upper())
+        wait_state = self._begin_step('after_search')
         if not self.browser.click_element(
-            locator_type, 
-            search_button_locator.get('value'), 
-            wait_time=2
+            search_button_locator.by, 
+            search_button_locator.value,
+            cached=True
         ):
             self.logger.error("Failed to click search button")
             return False
             
-        # Give a moment for the results to load fully
-        time.sleep(3)
+        # Wait for the results table to re-render
+        self._wait_for_step('after_search', wait_state)
         
         # Take a screenshot after search
-        screenshot_path = f"screenshots/after_search_{invoice_number}_{int(time.time())}.png"
+        screenshot_path = f"after_search_{invoice_number}_{int(time.time())}.png"
         self.browser.take_screenshot(screenshot_path)
         
+        # Match the booking number against the whole results table at once
+        table = self.read_booking_table() if self.booking_table else None
+        if table is not None:
+            self._search_matches = table.get(invoice_number, [])
+            if len(self._search_matches) == 1:
+                return True
+                
+            if self._search_matches:
+                self.logger.error(f"{len(self._search_matches)} bookings match number {invoice_number}")
+            else:
+                self.logger.error(f"Invoice row not found for number: {invoice_number}")
+            screenshot_path = f"search_results_not_found_{invoice_number}_{int(time.time())}.png"
+            self.browser.take_screenshot(screenshot_path, kind='failure')
+            return False
+            
         # Try to find the booking row to make sure it exists
-        invoice_row_locator = field_mappings.get('invoice_row', {})
+        invoice_row_locator = self.locators.get('invoice_row')
         if invoice_row_locator:
-            row_locator_type = getattr(By, invoice_row_locator.get('type', 'XPATH').upper())
-            row_locator_value = invoice_row_locator.get('value', '').replace('{invoice_number}', invoice_number)
+            row_locator = invoice_row_locator.format(invoice_number=invoice_number)
             
             if not self.browser.wait_for_element(
-                row_locator_type, 
-                row_locator_value,
+                row_locator.by, 
+                row_locator.value,
                 timeout=5
             ):
                 self.logger.error(f"Invoice row not found for number: {invoice_number}")
                 
                 # Take a screenshot of the search results
-                screenshot_path = f"screenshots/search_results_not_found_{invoice_number}_{int(time.time())}.png"
-                self.browser.take_screenshot(screenshot_path)
-                self.logger.info(f"Saved search results screenshot to {screenshot_path}")
+                screenshot_path = f"search_results_not_found_{invoice_number}_{int(time.time())}.png"
+                if self.browser.take_screenshot(screenshot_path, kind='failure'):
+                    self.logger.info(f"Saved search results screenshot to {screenshot_path}")
                 
                 return False
                 
         return True
     
+    @timed('crm.open_invoice_for_editing')
     def open_invoice_for_editing(self, invoice_row_identifier):
         """
         Open an invoice for editing in the CRM system
@@ -282,74 +518,282 @@ class CRMAutomator:
         Returns:
             Boolean indicating if opening was successful
         """
-        # Get field mappings from config
-        crm_config = self.config.get('crm', {})
-        field_mappings = crm_config.get('field_mappings', {})
+        if not self.open_booking_row(invoice_row_identifier):
+            return False
+            
+        return self.open_actual_net_form(invoice_row_identifier)
+    
+    @timed('crm.open_booking_row')
+    def open_booking_row(self, invoice_row_identifier):
+        """
+        Open the booking details page by clicking its row in the search results
         
+        Args:
+            invoice_row_identifier: Identifier for the invoice row
+            
+        Returns:
+            Boolean indicating if the booking details page was opened
+        """
         # Get locators from field mappings
-        invoice_row_locator = field_mappings.get('invoice_row', {})
-        add_actual_net_button_locator = field_mappings.get('add_actual_net_button', {})
+        invoice_row_locator = self.locators.get('invoice_row')
         
         # Check if edit configuration is properly set
-        if not invoice_row_locator or not add_actual_net_button_locator:
+        if not invoice_row_locator:
             self.logger.error("Edit configuration is incomplete")
             return False
         
         # Take a screenshot before clicking the invoice row
-        screenshot_path = f"screenshots/before_open_invoice_{invoice_row_identifier}_{int(time.time())}.png"
+        screenshot_path = f"before_open_invoice_{invoice_row_identifier}_{int(time.time())}.png"
         self.browser.take_screenshot(screenshot_path)
+        
+        # The search already read the row's link, open it without locating the row again
+        match = BOOKING_NUMBER_PATTERN.search(invoice_row_identifier)
+        number = match.group(1) if match else invoice_row_identifier
+        if len(self._search_matches) == 1 and self._search_matches[0]['number'] == number:
+            wait_state = self._begin_step('after_open_invoice')
+            if self.browser.navigate_to(self._search_matches[0]['href']):
+                self._wait_for_step('after_open_invoice', wait_state)
+                return True
             
         # Find and click the invoice row (booking link)
         # The row should already be found during the search_invoice call
         # but we'll try to click on it directly here
-        row_locator_type = getattr(By, invoice_row_locator.get('type', 'XPATH').upper())
-        row_locator_value = invoice_row_locator.get('value', '')
-        
         # Replace the placeholder with the actual identifier
-        row_locator_value = row_locator_value.replace('{invoice_number}', invoice_row_identifier)
+        row_locator = invoice_row_locator.format(invoice_number=invoice_row_identifier)
         
-        self.logger.info(f"Looking for invoice row with: {row_locator_value}")
+        self.logger.info(f"Looking for invoice row with: {row_locator.value}")
         
         # Wait for the invoice row to be visible and click it
+        wait_state = self._begin_step('after_open_invoice')
         if not self.browser.click_element(
-            row_locator_type, 
-            row_locator_value, 
-            wait_time=3
+            row_locator.by, 
+            row_locator.value
         ):
             self.logger.error(f"Invoice row not found: {invoice_row_identifier}")
+            screenshot_path = f"invoice_row_not_found_{invoice_row_identifier}_{int(time.time())}.png"
+            self.browser.take_screenshot(screenshot_path, kind='failure')
             return False
         
-        # Wait for the page to load after clicking the invoice
-        time.sleep(5)
+        # Wait for the booking details page to load after clicking the invoice
+        self._wait_for_step('after_open_invoice', wait_state)
         
         # Take a screenshot after opening the booking details
-        screenshot_path = f"screenshots/after_open_invoice_{invoice_row_identifier}_{int(time.time())}.png"
+        screenshot_path = f"after_open_invoice_{invoice_row_identifier}_{int(time.time())}.png"
         self.browser.take_screenshot(screenshot_path)
         
+        return True
+    
+    @timed('crm.open_booking_from_index')
+    def open_booking_from_index(self, invoice_number):
+        """
+        Open the booking details page directly using the local booking index
+        
+        Args:
+            invoice_number: The invoice number (with or without "SZ" prefix)
+            
+        Returns:
+            Boolean indicating if the booking was indexed and its page opened
+        """
+        if not self.booking_index:
+            return False
+            
+        booking_url = self.booking_index.get(invoice_number)
+        if not booking_url:
+            return False
+            
+        self.logger.info(f"Opening indexed booking page for {invoice_number}: {booking_url}")
+        wait_state = self._begin_step('after_open_invoice')
+        handle = self._prefetched.pop(booking_url, None)
+        if handle and self.browser.switch_to_tab(handle):
+            self.logger.info(f"Using the booking page prefetched for {invoice_number}")
+        elif not self.browser.navigate_to(booking_url):
+            return False
+        self._wait_for_step('after_open_invoice', wait_state)
+        
+        if "login" in self.browser.current_url().lower():
+            self.logger.warning("Redirected to login page while opening indexed booking")
+            return False
+            
+        return True
+    
+    def prefetch_upcoming(self):
+        """
+        Start loading the booking pages of the next invoices in spare tabs
+        
+        Only indexed bookings can be prefetched. Up to crm.pipeline.depth extra
+        tabs are used; open_booking_from_index switches to a prefetched tab
+        instead of navigating.
+        
+        Returns:
+            Number of booking pages that started loading
+        """
+        if not self.pipeline_depth or not self.upcoming_invoices or not self.booking_index or self.http_engine:
+            return 0
+            
+        urls = []
+        for invoice_number in self.upcoming_invoices():
+            booking_url = self.booking_index.get(invoice_number)
+            if booking_url:
+                urls.append(booking_url)
+                
+        # Tabs prefetched for invoices that are no longer coming up can be reused
+        for booking_url in list(self._prefetched):
+            if booking_url not in urls:
+                del self._prefetched[booking_url]
+                
+        handles = self.browser.tab_handles()
+        busy = set(self._prefetched.values())
+        busy.add(self.browser.current_tab())
+        free = [handle for handle in handles if handle not in busy]
+        
+        started = 0
+        for booking_url in urls:
+            if booking_url in self._prefetched:
+                continue
+            if free:
+                handle = free.pop(0)
+            elif len(handles) <= self.pipeline_depth:
+                handle = self.browser.open_tab()
+                if not handle:
+                    break
+                handles.append(handle)
+            else:
+                break
+                
+            if self.browser.load_in_tab(handle, booking_url):
+                self._prefetched[booking_url] = handle
+                started += 1
+        return started
+    
+    def remember_booking_url(self, invoice_number):
+        """
+        Store the URL of the currently open booking details page in the booking index
+        
+        Args:
+            invoice_number: The invoice number of the open booking
+        """
+        if not self.booking_index:
+            return
+            
+        current_url = self.browser.current_url()
+        if '/crm/booking/' in current_url:
+            self.booking_index.put(invoice_number, current_url)
+    
+    def crawl_booking_list(self, max_pages=0):
+        """
+        Fill the booking index from the paginated Bookings List
+        
+        Args:
+            max_pages: Maximum number of pages to crawl (0 means all pages)
+            
+        Returns:
+            Number of bookings added to or refreshed in the index
+        """
+        if not self.booking_index:
+            self.logger.error("Booking index is not enabled")
+            return 0
+            
+        if not self.navigate_to_booking_list():
+            self.logger.error("Failed to open the Bookings List for crawling")
+            return 0
+            
+        next_page = self.locators.get('next_page')
+        
+        total = 0
+        page = 0
+        seen_urls = set()
+        while True:
+            page += 1
+            entries = []
+            for number, rows in (self.read_booking_table() or {}).items():
+                for row in rows:
+                    if row['href'] not in seen_urls:
+                        seen_urls.add(row['href'])
+                        entries.append((number, row['href']))
+                    
+            # A page without new bookings means the last page was reached
+            stored = self.booking_index.put_many(entries)
+            total += stored
+            self.logger.info(f"Indexed {stored} bookings from page {page}")
+            
+            if not stored or not next_page or (max_pages and page >= max_pages):
+                break
+                
+            wait_state = self._begin_step('after_next_page')
+            if not self.browser.click_element(next_page.by, next_page.value):
+                break
+            if not self._wait_for_step('after_next_page', wait_state):
+                break
+            
+        self.logger.info(f"Booking index now holds {self.booking_index.count()} bookings")
+        return total
+    
+    def read_booking_table(self):
+        """
+        Read the Bookings List table of the current page in one script call
+        
+        Returns:
+            Dictionary mapping booking numbers (without "SZ" prefix) to the list of
+            rows with that number, each a dictionary with 'number', 'href' and
+            'cells' (rows without a booking link are left out), or None if the
+            table could not be read
+        """
+        rows = self.browser.extract_table(self.table_row_selector, self.table_link_selector)
+        if rows is None:
+            return None
+            
+        table = {}
+        for row in rows:
+            match = BOOKING_NUMBER_PATTERN.search(' '.join(row.get('cells') or []))
+            if not match or not row.get('href'):
+                continue
+            matches = table.setdefault(match.group(1), [])
+            # The same booking can show its link more than once
+            if all(item['href'] != row['href'] for item in matches):
+                matches.append({'number': match.group(1), 'href': row['href'], 'cells': row['cells']})
+        return table
+    
+    @timed('crm.open_actual_net_form')
+    def open_actual_net_form(self, invoice_row_identifier):
+        """
+        Open the Add Actual Net form on the booking details page
+        
+        Args:
+            invoice_row_identifier: Identifier for the invoice row (used for screenshots)
+            
+        Returns:
+            Boolean indicating if the form was opened
+        """
+        add_actual_net_button_locator = self.locators.get('add_actual_net_button')
+        
+        if not add_actual_net_button_locator:
+            self.logger.error("Edit configuration is incomplete")
+            return False
+        
         # Click the Add Actual Net button
-        add_net_button_type = getattr(By, add_actual_net_button_locator.get('type', 'XPATH').upper())
+        wait_state = self._begin_step('after_add_actual_net')
         if not self.browser.click_element(
-            add_net_button_type, 
-            add_actual_net_button_locator.get('value'), 
-            wait_time=3
+            add_actual_net_button_locator.by, 
+            add_actual_net_button_locator.value
         ):
             self.logger.error("Add Actual Net button not found")
             
             # Take a screenshot if button not found
-            screenshot_path = f"screenshots/add_net_button_not_found_{int(time.time())}.png"
-            self.browser.take_screenshot(screenshot_path)
+            screenshot_path = f"add_net_button_not_found_{int(time.time())}.png"
+            self.browser.take_screenshot(screenshot_path, kind='failure')
             
             return False
         
         # Wait for form fields to load after clicking Add Actual Net button
-        time.sleep(2)
+        self._wait_for_step('after_add_actual_net', wait_state)
         
         # Take a screenshot after clicking Add Actual Net button
-        screenshot_path = f"screenshots/after_click_add_net_{invoice_row_identifier}_{int(time.time())}.png"
+        screenshot_path = f"after_click_add_net_{invoice_row_identifier}_{int(time.time())}.png"
         self.browser.take_screenshot(screenshot_path)
         
         return True
     
+    @timed('crm.update_field')
     def update_field(self, field_key, field_value):
         """
         Update a specific field in the invoice form
@@ -361,44 +805,85 @@ class CRMAutomator:
         Returns:
             Boolean indicating if update was successful
         """
-        # Get field mappings from config
-        crm_config = self.config.get('crm', {})
-        field_mappings = crm_config.get('field_mappings', {})
-        
-        if field_key not in field_mappings:
+        if field_key not in self.field_mappings:
+            field_key = FIELD_ALIASES.get(field_key, field_key)
+        if field_key not in self.field_mappings:
             self.logger.error(f"Field mapping not found for: {field_key}")
             return False
             
-        field_config = field_mappings[field_key]
-        field_locator_type = getattr(By, field_config.get('type', 'NAME').upper())
-        field_locator_value = field_config.get('value')
-        
         # Check if the field configuration is valid
-        if not field_locator_value:
+        field_locator = self.locators.get(field_key)
+        if not field_locator:
             self.logger.error(f"Invalid field configuration for: {field_key}")
             return False
         
         # Take a screenshot before updating the field
-        screenshot_path = f"screenshots/before_update_{field_key}_{int(time.time())}.png"
+        screenshot_path = f"before_update_{field_key}_{int(time.time())}.png"
         self.browser.take_screenshot(screenshot_path)
             
         # For simplicity, assume all fields are text input fields
         # You can extend this to handle dropdowns, checkboxes, etc.
         if not self.browser.input_text(
-            field_locator_type, 
-            field_locator_value, 
+            field_locator.by, 
+            field_locator.value, 
             str(field_value),
             clear_first=True
         ):
             self.logger.error(f"Failed to input value into field: {field_key}")
+            screenshot_path = f"update_failed_{field_key}_{int(time.time())}.png"
+            self.browser.take_screenshot(screenshot_path, kind='failure')
             return False
         
         # Take a screenshot after updating the field
-        screenshot_path = f"screenshots/after_update_{field_key}_{int(time.time())}.png"
+        screenshot_path = f"after_update_{field_key}_{int(time.time())}.png"
         self.browser.take_screenshot(screenshot_path)
             
         return True
     
+    @timed('crm.fill_form')
+    def fill_form(self, invoice_data):
+        """
+        Fill the supplier and actual net cost fields of the open form
+        
+        With crm.bulk_fill all fields are set and read back in one script call;
+        fields whose read-back value does not match are typed in with update_field.
+        
+        Args:
+            invoice_data: Dictionary with invoice data
+            
+        Raises:
+            InvoiceError: If a field could not be updated
+        """
+        fields = [
+            (field, value) for field, value in (
+                ('supplier', invoice_data.get('supplier', '')),
+                ('actual_net_cost', invoice_data.get('actual_net_cost', ''))
+            ) if value
+        ]
+        
+        remaining = fields
+        if self.bulk_fill and fields:
+            locators = [self.locators.get(FIELD_ALIASES[field]) for field, _ in fields]
+            values = None
+            if all(locators):
+                self.logger.info(f"Filling fields: {', '.join(f'{field}={value}' for field, value in fields)}")
+                values = self.browser.fill_fields([
+                    (locator.by, locator.value, value) for locator, (_, value) in zip(locators, fields)
+                ])
+            if values is not None:
+                remaining = [
+                    (field, value) for (field, value), actual in zip(fields, values)
+                    if actual is None or not values_match(field, actual, value)
+                ]
+                for field, _ in remaining:
+                    self.logger.warning(f"Field {field} did not take the value, typing it instead")
+                    
+        for field, value in remaining:
+            self.logger.info(f"Updating {field}: {value}")
+            if not self.update_field(field, value):
+                raise InvoiceError(f"Failed to update {field} field")
+    
+    @timed('crm.save_changes')
     def save_changes(self):
         """
         Save the changes made to the invoice by clicking the Save button
@@ -406,46 +891,177 @@ class CRMAutomator:
         Returns:
             Boolean indicating if save was successful
         """
-        # Get field mappings from config
-        crm_config = self.config.get('crm', {})
-        field_mappings = crm_config.get('field_mappings', {})
-        
         # Get save button locator from field mappings
-        save_button_locator = field_mappings.get('save_button', {})
+        save_button_locator = self.locators.get('save_button')
         
         # Check if save configuration is properly set
         if not save_button_locator:
             self.logger.error("Save button configuration is incomplete")
             return False
         
-        # Give a moment for fields to be properly set
-        time.sleep(1)
+        # Give the form a chance to register the new values
+        self._wait_for_step('before_save')
         
         # Take a screenshot before saving
-        screenshot_path = f"screenshots/before_save_{int(time.time())}.png"
-        self.browser.take_screenshot(screenshot_path)
-        self.logger.info(f"Saved pre-save screenshot to {screenshot_path}")
+        screenshot_path = f"before_save_{int(time.time())}.png"
+        if self.browser.take_screenshot(screenshot_path, kind='save'):
+            self.logger.info(f"Saved pre-save screenshot to {screenshot_path}")
             
         # Click the save button
-        save_button_locator_type = getattr(By, save_button_locator.get('type', 'XPATH').upper())
+        wait_state = self._begin_step('after_save')
         if not self.browser.click_element(
-            save_button_locator_type, 
-            save_button_locator.get('value'), 
-            wait_time=3
+            save_button_locator.by, 
+            save_button_locator.value
         ):
             self.logger.error("Failed to click save button")
+            screenshot_path = f"save_failed_{int(time.time())}.png"
+            self.browser.take_screenshot(screenshot_path, kind='failure')
             return False
         
-        # Give a moment for the save to process
-        time.sleep(2)
+        # Wait for the save to be processed
+        self._wait_for_step('after_save', wait_state)
                 
         # Take a screenshot after saving
-        screenshot_path = f"screenshots/after_save_{int(time.time())}.png"
-        self.browser.take_screenshot(screenshot_path)
-        self.logger.info(f"Saved post-save screenshot to {screenshot_path}")
+        screenshot_path = f"after_save_{int(time.time())}.png"
+        if self.browser.take_screenshot(screenshot_path, kind='save'):
+            self.logger.info(f"Saved post-save screenshot to {screenshot_path}")
+        
+        return True
+    
+    def _begin_step(self, step):
+        """
+        Capture the page state needed by the wait condition of a step
         
+        Args:
+            step: Name of the step in the 'waits' configuration
+            
+        Returns:
+            State to pass to _wait_for_step after the triggering action
+        """
+        return self.browser.begin_wait(self.waits.get(step, DEFAULT_WAIT))
+    
+    def _wait_for_step(self, step, state=None):
+        """
+        Wait for the readiness condition configured for a step
+        
+        Steps without a configured condition wait for document.readyState.
+        A step is never considered fatal here: the following element lookups
+        still have their own timeouts.
+        
+        Args:
+            step: Name of the step in the 'waits' configuration
+            state: State captured by _begin_step before the triggering action
+            
+        Returns:
+            Boolean indicating if the condition was met
+        """
+        condition = self.waits.get(step, DEFAULT_WAIT)
+        if not self.browser.wait_for_condition(condition, state):
+            self.logger.warning(f"Wait condition for step '{step}' was not met, continuing")
+            return False
         return True
     
+    @timed('crm.submit_via_http')
+    def submit_via_http(self, invoice_identifier, invoice_data):
+        """
+        Submit the Actual Net form over HTTP when the booking URL is indexed
+        
+        Args:
+            invoice_identifier: The invoice identifier (usually invoice number)
+            invoice_data: Dictionary with invoice data
+            
+        Returns:
+            'updated' or 'unchanged' if the invoice was handled over HTTP; None
+            means the browser path should be used instead
+        """
+        if not self.http_engine or not self.booking_index:
+            return None
+            
+        booking_url = self.booking_index.get(invoice_identifier)
+        if not booking_url:
+            return None
+            
+        if not self.http_engine.has_cookies:
+            if self.browser.is_running():
+                self.http_engine.sync_cookies(self.browser)
+            elif self.browser.cookie_file:
+                self.http_engine.load_cookie_jar(self.browser.cookie_file)
+                
+        self.logger.info(f"Submitting invoice {invoice_identifier} over HTTP")
+        try:
+            form = self.http_engine.fetch_form(booking_url) if self.http_engine.has_cookies else None
+            if form:
+                if self._compare_page() and is_unchanged(self.http_engine.current_values(form), invoice_data, self.compare_tolerance):
+                    self.logger.info(f"Invoice {invoice_identifier} already has these values, skipping save")
+                    return 'unchanged'
+                    
+                if self.http_engine.submit_form(
+                    form,
+                    booking_url,
+                    invoice_data.get('supplier', ''),
+                    invoice_data.get('actual_net_cost', '')
+                ):
+                    self.remember_written_values(invoice_identifier, invoice_data)
+                    self.logger.info(f"Successfully updated invoice over HTTP: {invoice_identifier}")
+                    return 'updated'
+        except Exception as e:
+            self.logger.warning(f"HTTP error for invoice {invoice_identifier}: {str(e)}")
+            
+        # Cookies may have expired, take fresh ones from the browser next time
+        self.http_engine.has_cookies = False
+        self.logger.info(f"HTTP fast path not possible for {invoice_identifier}, using the browser")
+        return None
+    
+    def _compare_page(self):
+        """Check if current values should be read from the CRM before writing"""
+        return self.compare_enabled and self.compare_source == 'page'
+    
+    @timed('crm.read_current_values')
+    def read_current_values(self):
+        """
+        Read the current supplier and actual net from the open booking details page
+        
+        Uses the 'supplier_value' and 'actual_net_value' locators of crm.current_values.
+        
+        Returns:
+            Dictionary with 'supplier' and 'actual_net_cost', or None if the
+            locators are not configured or the values could not be read
+        """
+        locators = {
+            'supplier': self.locators.get('supplier_value'),
+            'actual_net_cost': self.locators.get('actual_net_value')
+        }
+        if not all(locators.values()):
+            return None
+            
+        values = {}
+        try:
+            for field, locator in locators.items():
+                # Not waiting for visibility: an empty value renders as an invisible element
+                text = self.browser.get_text_content(locator.by, locator.value)
+                if text is None:
+                    return None
+                values[field] = text
+        except Exception as e:
+            self.logger.warning(f"Could not read current values: {str(e)}")
+            return None
+        return values
+    
+    def remember_written_values(self, invoice_identifier, invoice_data):
+        """
+        Remember the values written for an invoice for later cache comparisons
+        
+        Args:
+            invoice_identifier: The invoice identifier
+            invoice_data: Dictionary with the invoice data that was saved
+        """
+        if self.booking_index:
+            self.booking_index.put_written_values(
+                invoice_identifier,
+                invoice_data.get('supplier', ''),
+                invoice_data.get('actual_net_cost', '')
+            )
+    
     def update_invoice(self, invoice_identifier, invoice_data, username=None, password=None, max_retries=3):
         """
         Update an invoice in the CRM system
@@ -458,113 +1074,202 @@ class CRMAutomator:
             max_retries: Maximum number of retry attempts
             
         Returns:
-            Boolean indicating if update was successful
+            Boolean indicating if update was successful (also True when nothing had to change)
         """
-        if not self.browser.driver:
-            self.logger.error("Browser not initialized")
-            return False
+        return self.process_invoice(invoice_identifier, invoice_data, username, password, max_retries) != 'failed'
+    
+    def process_invoice(self, invoice_identifier, invoice_data, username=None, password=None, max_retries=3):
+        """
+        Update an invoice in the CRM system, skipping the save when nothing changed
+        
+        Retryable errors are retried after an exponential backoff (see RetryScheduler);
+        batches should use a RetryScheduler instead, so other invoices keep flowing.
+        
+        Args:
+            invoice_identifier: The invoice identifier (usually invoice number)
+            invoice_data: Dictionary with invoice data
+            username: Optional username for re-login if needed
+            password: Optional password for re-login if needed
+            max_retries: Maximum number of attempts
             
-        retry_count = 0
-        while retry_count < max_retries:
+        Returns:
+            'updated', 'unchanged' (the CRM already held the values) or 'failed'
+        """
+        scheduler = RetryScheduler(self.config)
+        for attempt in range(1, max_retries + 1):
             try:
-                # Check if we're on the right page
-                if "booking-list" not in self.browser.driver.current_url.lower():
-                    # Try to navigate to CRM module
-                    self.logger.info("Not on booking list page, attempting to navigate")
-                    if not self.navigate_to_crm_module():
-                        # Try to navigate to CRM directly
-                        self.navigate_to_crm()
-                        
-                        # If we have credentials, try to login
-                        if username and password:
-                            self.login_to_crm(username, password)
-                            self.navigate_to_crm_module()
-                
-                # Search for the invoice
-                self.logger.info(f"Searching for invoice: {invoice_identifier}")
-                if not self.search_invoice(invoice_identifier):
-                    self.logger.error(f"Invoice not found: {invoice_identifier}")
-                    return False
+                return self.attempt_invoice(invoice_identifier, invoice_data, username, password)
+            except Exception as e:
+                category = classify_error(e)
+                self.logger.error(f"Error updating invoice {invoice_identifier} ({category}): {str(e)}")
+                if category not in RETRYABLE_CATEGORIES or attempt >= max_retries:
+                    break
                     
-                # Wait a moment for the page to update
-                time.sleep(2)
+                delay = scheduler.backoff_delay(attempt)
+                self.logger.info(f"Retrying ({attempt}/{max_retries}) in {delay:.1f}s...")
+                recorder.sleep(delay, 'crm.retry_backoff')
+                self.recover(category, username, password)
                 
-                # Extract the row identifier from the invoice data
-                row_identifier = f"SZ{invoice_identifier}"
+        self.logger.error(f"Failed to update invoice {invoice_identifier}")
+        return 'failed'
+    
+    @timed('crm.attempt_invoice')
+    def attempt_invoice(self, invoice_identifier, invoice_data, username=None, password=None):
+        """
+        Make a single attempt to update an invoice
+        
+        Args:
+            invoice_identifier: The invoice identifier (usually invoice number)
+            invoice_data: Dictionary with invoice data
+            username: Optional username for re-login if needed
+            password: Optional password for re-login if needed
+            
+        Returns:
+            'updated' or 'unchanged'
+            
+        Raises:
+            InvoiceError: If the invoice could not be updated (see classify_error
+                for errors raised by Selenium)
+        """
+        self.last_attempt_path = 'cache'
+        if self.compare_enabled and self.compare_source == 'cache' and self.booking_index:
+            if is_unchanged(self.booking_index.get_written_values(invoice_identifier), invoice_data, self.compare_tolerance):
+                self.logger.info(f"Invoice {invoice_identifier} was already written with these values, skipping")
+                return 'unchanged'
                 
-                # Open invoice for editing
-                self.logger.info(f"Opening invoice for editing: {row_identifier}")
-                if not self.open_invoice_for_editing(row_identifier):
-                    self.logger.error(f"Failed to open invoice for editing: {row_identifier}")
-                    return False
-                    
-                # Update each field
-                update_success = True
+        self.last_attempt_path = 'http'
+        status = self.submit_via_http(invoice_identifier, invoice_data)
+        if status:
+            return status
+            
+        self.last_attempt_path = 'browser'
+            
+        if not self.browser.is_running():
+            raise InvoiceError("Browser not initialized", SESSION_EXPIRED)
+            
+        # Extract the row identifier from the invoice data
+        row_identifier = f"SZ{invoice_identifier}"
+        
+        # Open the booking directly when its URL is indexed, otherwise search for it
+        opened_from_index = self.open_booking_from_index(invoice_identifier)
+        if not opened_from_index:
+            self._search_and_open_booking(invoice_identifier, username, password)
+            
+        if self.journal:
+            self.journal.record(invoice_identifier, 'searched')
+            
+        if self._compare_page() and is_unchanged(self.read_current_values(), invoice_data, self.compare_tolerance):
+            self.logger.info(f"Invoice {invoice_identifier} already has these values, skipping save")
+            return 'unchanged'
+            
+        # Open the Add Actual Net form
+        if not self.open_actual_net_form(row_identifier):
+            if not opened_from_index:
+                raise InvoiceError(f"Failed to open invoice for editing: {row_identifier}")
                 
-                # Update supplier field
-                supplier = invoice_data.get('supplier', '')
-                if supplier:
-                    self.logger.info(f"Updating supplier: {supplier}")
-                    if not self.update_field('supplier', supplier):
-                        self.logger.error(f"Failed to update supplier field")
-                        update_success = False
-                        
-                # Update actual net cost field
-                actual_net_cost = invoice_data.get('actual_net_cost', '')
-                if actual_net_cost:
-                    self.logger.info(f"Updating actual net cost: {actual_net_cost}")
-                    if not self.update_field('actual_net_cost', actual_net_cost):
-                        self.logger.error(f"Failed to update actual net cost field")
-                        update_success = False
-                        
-                # Save changes
-                if update_success:
-                    self.logger.info("Saving changes")
-                    if not self.save_changes():
-                        self.logger.error("Failed to save changes")
-                        return False
-                        
-                    self.logger.info(f"Successfully updated invoice: {invoice_identifier}")
-                    return True
-                else:
-                    self.logger.error("One or more fields could not be updated, not saving")
-                    return False
-                    
-            except Exception as e:
-                self.logger.error(f"Error updating invoice: {str(e)}")
-                retry_count += 1
+            # The indexed URL is outdated, drop it and search instead
+            self.logger.warning(f"Indexed booking page for {invoice_identifier} is outdated, searching instead")
+            self.booking_index.remove(invoice_identifier)
+            self._search_and_open_booking(invoice_identifier, username, password)
+            if not self.open_actual_net_form(row_identifier):
+                raise InvoiceError(f"Failed to open invoice for editing: {row_identifier}")
                 
-                if retry_count < max_retries:
-                    self.logger.info(f"Retrying ({retry_count}/{max_retries})...")
-                    time.sleep(5)  # Wait before retrying
-                    
-                    # If we have credentials, try to re-login
-                    if username and password:
-                        self.logger.info("Attempting to re-login")
-                        self.navigate_to_crm()
-                        self.login_to_crm(username, password)
-                else:
-                    self.logger.error(f"Failed to update invoice after {max_retries} attempts")
-                    return False
-                    
-        return False
+        # Update supplier and actual net cost fields
+        self.fill_form(invoice_data)
+        
+        # The next booking pages load in other tabs while this one is saved
+        self.prefetch_upcoming()
+        
+        # Save changes
+        self.logger.info("Saving changes")
+        if not self.save_changes():
+            raise InvoiceError("Failed to save changes")
+            
+        self.remember_written_values(invoice_identifier, invoice_data)
+        self.logger.info(f"Successfully updated invoice: {invoice_identifier}")
+        return 'updated'
+    
+    def _search_and_open_booking(self, invoice_identifier, username=None, password=None):
+        """
+        Search the Bookings List for an invoice and open its booking details page
+        
+        Raises:
+            InvoiceError: If the invoice is not found or its page could not be opened
+        """
+        row_identifier = f"SZ{invoice_identifier}"
+        
+        # Check if we're on the right page
+        if not self.navigate_to_booking_list(username, password):
+            raise InvoiceError("Bookings List could not be opened", SESSION_EXPIRED)
+            
+        # Search for the invoice
+        self.logger.info(f"Searching for invoice: {invoice_identifier}")
+        if not self.search_invoice(invoice_identifier):
+            if len(self._search_matches) > 1:
+                raise InvoiceError(f"Multiple bookings match invoice {invoice_identifier}", NOT_FOUND)
+            raise InvoiceError(f"Invoice not found: {invoice_identifier}", NOT_FOUND)
+            
+        # Open the booking details page
+        self.logger.info(f"Opening invoice for editing: {row_identifier}")
+        if not self.open_booking_row(row_identifier):
+            raise InvoiceError(f"Failed to open invoice for editing: {row_identifier}")
+            
+        self.remember_booking_url(invoice_identifier)
     
-    def update_multiple_invoices(self, invoice_data_list, username=None, password=None):
+    def recover(self, category, username=None, password=None):
+        """
+        Bring the session back into a usable state after a failed attempt
+        
+        Args:
+            category: Error category from classify_error
+            username: Optional username for re-login
+            password: Optional password for re-login
+        """
+        if category == SESSION_EXPIRED and username and password and self.browser.is_running():
+            self.logger.info("Attempting to re-login")
+            self.navigate_to_crm()
+            self.login_to_crm(username, password)
+            
+    def update_multiple_invoices(self, invoice_data_list, username=None, password=None, workers=1, headless=False, login=True, journal=None, rate_controller=None, page_load_strategy=None):
         """
         Update multiple invoices with their respective data
         
         Args:
-            invoice_data_list: List of dictionaries, each containing invoice identifier and data
+            invoice_data_list: List of dictionaries, each containing invoice identifier and data,
+                or an iterator of them that is read while the invoices are processed
             username: Optional username for CRM login (if not provided, will need to be logged in already)
             password: Optional password for CRM login
+            workers: Number of parallel browser sessions; more than one runs a WorkerPool
+                with its own browsers instead of this automator's session
+            headless: Boolean indicating if worker browsers should run in headless mode
+            login: Boolean indicating if this session should log in first; pass False when
+                already logged in (credentials are then only used to re-login on errors)
+            journal: Optional ProgressJournal that records the state of every invoice
+            rate_controller: Optional RateController that paces the invoices (and, with
+                several workers, decides how many of them are active)
+            page_load_strategy: Optional page load strategy of worker browsers (defaults
+                to the one this session was started with)
             
         Returns:
             Dictionary with results for each invoice
         """
+        if workers > 1:
+            # Imported here to avoid a circular import with worker_pool
+            from worker_pool import WorkerPool
+            
+            pool = WorkerPool(
+                self.config,
+                workers=workers,
+                headless=headless,
+                page_load_strategy=page_load_strategy or self._start_options['page_load_strategy']
+            )
+            return pool.run(invoice_data_list, username, password, journal=journal, rate_controller=rate_controller)
+            
         results = {}
+        self.journal = journal
         
-        # Login to the CRM system if credentials are provided
-        if username and password:
+        # Login to the CRM system if credentials are provided and no saved session is valid
+        if login and username and password and not self.is_session_valid():
             if not self.login_to_crm(username, password):
                 self.logger.error("Failed to log in to CRM")
                 return {"error": "Login failed"}
@@ -574,27 +1279,91 @@ class CRMAutomator:
                 self.logger.error("Failed to navigate to CRM module")
                 return {"error": "Navigation to CRM module failed"}
                 
+        # Failed invoices wait in the scheduler's delayed queue while the others keep flowing
+        scheduler = RetryScheduler(self.config)
+        
+        def identified(invoices):
+            for invoice_data in invoices:
+                if not invoice_data.get('invoice_number'):
+                    self.logger.error("Invoice identifier not found in data")
+                    continue
+                yield invoice_data
+                
+        # A stream (e.g. ExcelProcessor.iter_invoices) is read in the background while invoices are processed
+        if isinstance(invoice_data_list, (list, tuple)):
+            scheduler.feed(identified(invoice_data_list))
+            total = len(invoice_data_list)
+        else:
+            read_ahead = self.config.get('excel', {}).get('read_ahead', 200)
+            threading.Thread(
+                target=scheduler.feed,
+                args=(identified(invoice_data_list), read_ahead),
+                name="invoice-feeder",
+                daemon=True
+            ).start()
+            total = None
+        self.upcoming_invoices = lambda: [item.get('invoice_number') for item in scheduler.peek(self.pipeline_depth)]
+        
         # Process each invoice
-        for invoice_data in invoice_data_list:
+        while True:
+            task = scheduler.get()
+            if task is None:
+                break
+            invoice_data, attempt = task
             invoice_identifier = invoice_data.get('invoice_number')
-            if not invoice_identifier:
-                self.logger.error("Invoice identifier not found in data")
-                continue
-                
+            self.logger.info(f"Processing invoice {len(results) + 1}/{total or '?'}: {invoice_identifier} (attempt {attempt})")
+            self.recycle_if_needed(username, password)
+            self.invoices_since_start += 1
+            
             # Remove the identifier from the data to update
             update_data = {k: v for k, v in invoice_data.items() if k != 'invoice_number'}
             
+            if rate_controller:
+                rate_controller.pace()
+            
             # Update the invoice (don't need to login again for each invoice)
-            success = self.update_invoice(invoice_identifier, update_data)
+            error = None
+            started = time.perf_counter()
+            try:
+                status = self.attempt_invoice(invoice_identifier, update_data, username=username, password=password)
+                scheduler.complete(invoice_data)
+                if rate_controller:
+                    rate_controller.observe(time.perf_counter() - started, True, self.last_attempt_path)
+            except Exception as e:
+                category = classify_error(e)
+                if rate_controller:
+                    rate_controller.observe(time.perf_counter() - started, category not in BREAKER_CATEGORIES, self.last_attempt_path)
+                self.logger.error(f"Error updating invoice {invoice_identifier} ({category}): {str(e)}")
+                if scheduler.defer(invoice_data, attempt, category):
+                    self.logger.info(f"Invoice {invoice_identifier} will be retried later")
+                    self.recover(category, username, password)
+                    continue
+                status = 'failed'
+                error = str(e)
+                
+            if journal:
+                if status == 'failed':
+                    journal.record(invoice_identifier, 'failed', error=error)
+                else:
+                    journal.record(invoice_identifier, 'saved' if status == 'updated' else 'unchanged', invoice_data=invoice_data)
             
             # Store the result
+            recorder.count_invoice()
             results[invoice_identifier] = {
-                'success': success,
+                'success': status != 'failed',
+                'status': status,
                 'timestamp': time.time()
             }
+            if error:
+                results[invoice_identifier]['error'] = error
             
         return results
     
     def close(self):
         """Close the browser session"""
-        self.browser.close()
\ No newline at end of file
+        self.browser.close()
+        if self.booking_index:
+            self.booking_index.close()
+            self.booking_index = None
+        if self.http_engine:
+            self.http_engine.close()
\ No newline at end of file
@@ -0,0 +1,249 @@
+"""
+Driver Lifecycle Module
+
+This module keeps track of the chromedriver/Chrome processes of every browser
+session, recycles sessions after a number of invoices or above a memory ceiling,
+and reaps processes left behind by crashed runs.
+"""
+import os
+import json
+import glob
+import signal
+import atexit
+import logging
+import weakref
+
+try:
+    import psutil
+except ImportError:  # Memory limits and process trees need psutil
+    psutil = None
+
+
+# Browser sessions that are still open, closed on interpreter exit
+_ACTIVE_BROWSERS = weakref.WeakSet()
+
+
+def _close_active_browsers():
+    """Close browser sessions that were not closed explicitly"""
+    for browser in list(_ACTIVE_BROWSERS):
+        try:
+            browser.close()
+        except Exception:
+            pass
+
+
+atexit.register(_close_active_browsers)
+
+
+def _pid_alive(pid):
+    """Check if a process exists"""
+    if psutil:
+        return psutil.pid_exists(pid)
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+class DriverLifecycle:
+    def __init__(self, config=None):
+        """
+        Initialize the lifecycle manager
+
+        Args:
+            config: Dictionary containing configuration options; the
+                'browser.lifecycle' section holds recycle_after_invoices,
+                max_rss_mb and pid_dir
+        """
+        lifecycle_config = (config or {}).get('browser', {}).get('lifecycle', {})
+        self.recycle_after = lifecycle_config.get('recycle_after_invoices', 0)
+        self.max_rss_mb = lifecycle_config.get('max_rss_mb', 0)
+        self.pid_dir = lifecycle_config.get('pid_dir', '.driver_pids')
+        self.logger = logging.getLogger(__name__)
+
+        if self.max_rss_mb and not psutil:
+            self.logger.warning("psutil is not installed, browser.lifecycle.max_rss_mb is ignored")
+
+    def register(self, browser):
+        """
+        Record the chromedriver process of a started session
+
+        Args:
+            browser: BrowserBackend with a running session
+        """
+        _ACTIVE_BROWSERS.add(browser)
+        driver_pid = self.driver_pid(browser)
+        if not driver_pid:
+            return
+
+        try:
+            os.makedirs(self.pid_dir, exist_ok=True)
+            with open(self._pid_file(driver_pid), 'w') as f:
+                json.dump({
+                    'owner_pid': os.getpid(),
+                    'driver_pid': driver_pid,
+                    'user_data_dir': browser.user_data_dir
+                }, f)
+        except Exception as e:
+            self.logger.warning(f"Could not write driver pid file: {str(e)}")
+
+    def unregister(self, browser, driver_pid=None):
+        """
+        Forget a session that was closed
+
+        Args:
+            browser: BrowserBackend that was closed
+            driver_pid: Process id of its chromedriver (read before closing)
+        """
+        _ACTIVE_BROWSERS.discard(browser)
+        if driver_pid:
+            try:
+                os.remove(self._pid_file(driver_pid))
+            except FileNotFoundError:
+                pass
+
+    def driver_pid(self, browser):
+        """
+        Get the process id of a session's chromedriver
+
+        Returns:
+            Process id, or None if the session has no local driver process
+            (e.g. Playwright sessions, whose browser Playwright shuts down itself)
+        """
+        try:
+            return browser.driver.service.process.pid
+        except Exception:
+            return None
+
+    def session_rss_mb(self, browser):
+        """
+        Get the memory used by a session's chromedriver and all Chrome processes below it
+
+        Returns:
+            Resident set size in MB, or None if it cannot be measured
+        """
+        driver_pid = self.driver_pid(browser)
+        if not psutil or not driver_pid:
+            return None
+
+        try:
+            process = psutil.Process(driver_pid)
+            rss = process.memory_info().rss
+            for child in process.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except psutil.Error:
+                    continue
+            return rss / (1024 * 1024)
+        except psutil.Error:
+            return None
+
+    def should_recycle(self, browser, invoices_since_start):
+        """
+        Check if a session should be replaced by a fresh one
+
+        Args:
+            browser: BrowserBackend of the session
+            invoices_since_start: Number of invoices processed since the session started
+
+        Returns:
+            Boolean indicating if the session should be recycled
+        """
+        if self.recycle_after and invoices_since_start >= self.recycle_after:
+            self.logger.info(f"Recycling browser after {invoices_since_start} invoices")
+            return True
+
+        if self.max_rss_mb and invoices_since_start:
+            rss_mb = self.session_rss_mb(browser)
+            if rss_mb and rss_mb > self.max_rss_mb:
+                self.logger.info(f"Recycling browser using {rss_mb:.0f} MB (limit {self.max_rss_mb} MB)")
+                return True
+        return False
+
+    def kill_process_tree(self, pid):
+        """
+        Kill a process and all processes below it
+
+        Args:
+            pid: Process id of the root process
+        """
+        if psutil:
+            try:
+                process = psutil.Process(pid)
+                processes = process.children(recursive=True) + [process]
+            except psutil.Error:
+                return
+            for item in processes:
+                try:
+                    item.kill()
+                except psutil.Error:
+                    continue
+            psutil.wait_procs(processes, timeout=5)
+            return
+
+        # Without psutil the Chrome processes below the driver cannot be found; only the driver is killed
+        try:
+            os.kill(pid, signal.SIGKILL if hasattr(signal, 'SIGKILL') else signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def reap_orphans(self, include_own=False):
+        """
+        Kill chromedriver processes (and their Chrome) left behind by runs that ended
+
+        Args:
+            include_own: Boolean indicating if sessions of this process are reaped
+                too (used on exit, after all sessions should have been closed)
+
+        Returns:
+            Number of driver processes killed
+        """
+        reaped = 0
+        pid_files = glob.glob(os.path.join(self.pid_dir, '*.json'))
+        if pid_files and not psutil:
+            # A recorded pid may belong to an unrelated process by now
+            self.logger.warning(
+                f"psutil is not installed, {len(pid_files)} recorded driver processes cannot be verified and are not killed"
+            )
+            return reaped
+
+        for pid_file in pid_files:
+            try:
+                with open(pid_file, 'r') as f:
+                    entry = json.load(f)
+            except Exception:
+                os.remove(pid_file)
+                continue
+
+            owner_pid = entry.get('owner_pid')
+            driver_pid = entry.get('driver_pid')
+            if owner_pid == os.getpid() and not include_own:
+                continue
+            if owner_pid != os.getpid() and _pid_alive(owner_pid):
+                continue
+
+            if driver_pid and _pid_alive(driver_pid) and self._is_driver(driver_pid):
+                self.logger.info(f"Killing stray chromedriver {driver_pid} (owner {owner_pid} has ended)")
+                self.kill_process_tree(driver_pid)
+                reaped += 1
+            try:
+                os.remove(pid_file)
+            except FileNotFoundError:
+                pass
+        return reaped
+
+    def _is_driver(self, pid):
+        """Check that a pid still belongs to a chromedriver (pids are reused); without psutil it cannot be verified"""
+        if not psutil:
+            return False
+        try:
+            return 'chromedriver' in psutil.Process(pid).name().lower()
+        except psutil.Error:
+            return False
+
+    def _pid_file(self, driver_pid):
+        """Path of the pid file of a driver process"""
+        return os.path.join(self.pid_dir, f"{os.getpid()}-{driver_pid}.json")
@@ -6,29 +6,51 @@ This module handles the extraction of data from Excel files for CRM updating.
 import os
 import pandas as pd
 import logging
+import openpyxl
+from openpyxl.cell.cell import ERROR_CODES
+
+from reader_engines import select_engine, normalize_frame, NA_VALUES
+
+
+# Workbook formats openpyxl can stream row by row
+STREAMING_EXTENSIONS = ('.xlsx', '.xlsm', '.xltx', '.xltm')
+
+# Streamed rows normalized together
+STREAM_CHUNK_SIZE = 500
 
 
 class ExcelProcessor:
-    def __init__(self, file_path=None):
+    def __init__(self, file_path=None, parse_cache=None, column_mapping=None, engine=None):
         """
         Initialize the Excel processor
         
         Args:
-            file_path: Optional path to the Excel file to load
+            file_path: Optional path to the Excel (.xlsx, .xls) or CSV/TSV file to load
+            parse_cache: Optional ParseCache for parsed workbooks; without one every
+                load parses the file
+            column_mapping: Optional mapping of CRM fields to Excel column names;
+                only these columns are loaded (see load_excel_file)
+            engine: Optional reader engine name (see reader_engines.ENGINES); None or
+                'auto' picks the fastest installed engine for the file type
         """
         self.data = None
         self.file_path = None
         self.column_mapping = {}
+        self.parse_cache = parse_cache
+        self.engine = engine
         
         if file_path:
-            self.load_excel_file(file_path)
+            self.load_excel_file(file_path, column_mapping=column_mapping)
 
-    def load_excel_file(self, file_path):
+    def load_excel_file(self, file_path, column_mapping=None):
         """
         Load an Excel file and store its data
         
         Args:
             file_path: Path to the Excel file
+            column_mapping: Optional mapping of CRM fields to Excel column names; when
+                given, only the mapped columns are read, as text like iter_invoices
+                reads them (no 1234 -> '1234.0' round trip; empty cells are '')
             
         Returns:
             Boolean indicating if loading was successful
@@ -38,13 +60,117 @@ class ExcelProcessor:
                 return False
                 
             # Try to load the file with pandas
-            self.data = pd.read_excel(file_path)
+            options = self._subset_options(file_path, column_mapping) if column_mapping else {}
+            data = self._read_excel(file_path, **options)
+            
+            # Empty cells of columns read as text are blank, not the text 'nan'
+            for excel_col in options.get('dtype', {}):
+                data[excel_col] = data[excel_col].fillna('')
+            self.data = data
             self.file_path = file_path
             return True
         except Exception as e:
             print(f"Error loading Excel file: {str(e)}")
             return False
             
+    def probe_headers(self, file_path=None):
+        """
+        Get the column names of a workbook without reading its rows
+        
+        Only the header row is read (streamed for .xlsx), so this stays cheap on
+        large files.
+        
+        Args:
+            file_path: Optional path to the Excel file (defaults to the loaded file)
+            
+        Returns:
+            List of column names, as pandas names them (e.g. "Unnamed: 3", "Supplier.1")
+            
+        Raises:
+            ValueError: If no file_path is given and no file has been loaded
+        """
+        file_path = file_path or self.file_path
+        if not file_path:
+            raise ValueError("No file to read headers from: pass file_path or load a file first")
+        if not file_path.lower().endswith(STREAMING_EXTENSIONS):
+            return select_engine(file_path, self.engine).read_headers(file_path)
+            
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            header = next(workbook.worksheets[0].iter_rows(max_row=1, values_only=True), None)
+        finally:
+            workbook.close()
+        return list(self._header_positions(header or ()))
+        
+    def _header_positions(self, header):
+        """
+        Name the columns of a header row the way pandas does
+        
+        Args:
+            header: Tuple of header cell values
+            
+        Returns:
+            Dictionary mapping column names to column positions, in sheet order; empty
+            header cells become "Unnamed: <position>", repeated names get ".1", ".2", ...
+        """
+        positions = {}
+        for index, name in enumerate(header):
+            name = f"Unnamed: {index}" if name is None else name
+            base, count = name, 0
+            while name in positions:
+                count += 1
+                name = f"{base}.{count}"
+            positions[name] = index
+        return positions
+        
+    def _subset_options(self, file_path, column_mapping):
+        """
+        Build reader options that read only the mapped columns
+        
+        Args:
+            file_path: Path to the Excel file
+            column_mapping: Dictionary mapping CRM fields to Excel column names
+            
+        Returns:
+            Dictionary with usecols, names and dtype (every mapped column as text), or
+            an empty dictionary (read everything) when no mapped column exists
+        """
+        headers = self.probe_headers(file_path)
+        positions = {name: index for index, name in enumerate(headers)}
+        mapped = [excel_col for excel_col in column_mapping.values() if isinstance(excel_col, str) and excel_col in positions]
+        if not mapped:
+            return {}
+            
+        # Columns are selected by position and named explicitly, so repeated header
+        # names keep the names they have in the whole sheet
+        usecols = sorted({positions[excel_col] for excel_col in mapped})
+        names = [headers[index] for index in usecols]
+        return {'usecols': usecols, 'header': 0, 'names': names, 'dtype': {name: str for name in names}}
+            
+    def _read_excel(self, file_path, **options):
+        """
+        Read a file with the fastest reader engine, from the parse cache when it was read before
+        
+        Args:
+            file_path: Path to the Excel or CSV/TSV file
+            **options: Reader options (usecols, header, names, dtype; part of the cache key)
+            
+        Returns:
+            Normalized DataFrame with the first worksheet
+        """
+        engine = select_engine(file_path, self.engine)
+        key = None
+        if self.parse_cache and self.parse_cache.enabled:
+            key = self.parse_cache.key(file_path, dict(options, engine=engine.name))
+            data = self.parse_cache.load(key)
+            if data is not None:
+                return data
+                
+        data = normalize_frame(engine.read(file_path, **options))
+        if key:
+            self.parse_cache.store(key, data)
+        return data
+            
     def get_column_names(self):
         """
         Get the column names from the loaded Excel file
@@ -169,48 +295,246 @@ class ExcelProcessor:
             logging.error("No valid columns found in the mapping")
             return []
             
-        # Set the mapping and get all rows
+        # Set the mapping and normalize the mapped columns as a whole
         self.set_column_mapping(excel_to_crm)
-        rows = self.get_all_rows()
+        row_dtype = self._row_dtype()
+        columns = {}
+        for excel_col, crm_field in excel_to_crm.items():
+            column = self.data[excel_col]
+            # Values are converted as a row of the whole sheet would hold them
+            # (e.g. integers become floats when every column is numeric)
+            if row_dtype is not None and column.dtype != row_dtype:
+                column = column.astype(row_dtype)
+            columns[crm_field] = column
+            
+        return self._normalize_columns(columns)
         
-        # Process each row to normalize the data
-        result = []
-        for i, row in enumerate(rows):
-            try:
-                # Skip empty rows
-                if not row:
-                    continue
+    def _normalize_columns(self, columns):
+        """
+        Normalize mapped columns into invoice dictionaries
+        
+        Used by process_file for the loaded sheet and by iter_invoices for each
+        chunk of streamed rows, so both give the same invoices.
+        
+        Args:
+            columns: Dictionary mapping CRM fields to pandas Series with a common
+                index; index + 1 is the row number used in warnings
+                
+        Returns:
+            List of dictionaries, each containing data for one invoice; rows without a
+            valid invoice number are skipped with a warning
+        """
+        fields = list(columns)
+        index = next(iter(columns.values())).index
+        if 'invoice_number' in columns:
+            invoice_numbers, valid = self._normalize_invoice_numbers(columns['invoice_number'])
+        else:
+            invoice_numbers, valid = pd.Series([''] * len(index), index=index), pd.Series(True, index=index)
+            
+        values = []
+        for crm_field in fields:
+            if crm_field == 'invoice_number':
+                values.append(invoice_numbers.tolist())
+            else:
+                values.append(self._column_strings(columns[crm_field]).tolist())
+                
+        keep = (valid & (invoice_numbers != '')).tolist()
+        if not all(keep):
+            invoice_values = columns['invoice_number'].tolist() if 'invoice_number' in columns else None
+            for i, (row_index, is_valid, is_kept) in enumerate(zip(index, valid.tolist(), keep)):
+                if not is_valid:
+                    logging.warning(f"Invalid invoice number in row {row_index+1}: {invoice_values[i]}")
+                elif not is_kept:
+                    logging.warning(f"Missing invoice number in row {row_index+1}, skipping")
                     
-                # Extract invoice number and handle SZ prefix
-                invoice_number = row.get('invoice_number', '')
-                if isinstance(invoice_number, str) and invoice_number.upper().startswith('SZ'):
-                    invoice_number = invoice_number[2:]  # Remove 'SZ' prefix
-                elif not isinstance(invoice_number, (str, int, float)):
-                    logging.warning(f"Invalid invoice number in row {i+1}: {invoice_number}")
-                    continue
+        return [dict(zip(fields, row)) for row, is_kept in zip(zip(*values), keep) if is_kept]
+        
+    def _row_dtype(self):
+        """
+        Get the dtype a single row of the sheet has
+        
+        Returns:
+            The common numpy dtype when every column shares one that is not object
+            (e.g. float64 for a sheet of integer and float columns), otherwise None
+        """
+        dtype = self.data.iloc[:0].to_numpy().dtype
+        return None if dtype == object else dtype
+        
+    def _column_strings(self, column):
+        """
+        Convert a column to strings, with empty strings for missing values
+        
+        Args:
+            column: pandas Series
+            
+        Returns:
+            Series of str
+        """
+        if pd.api.types.is_integer_dtype(column.dtype) or pd.api.types.is_float_dtype(column.dtype):
+            strings = column.astype(str).astype(object)
+        else:
+            strings = column.map(str, na_action='ignore').astype(object)
+        return strings.where(column.notna(), '')
+        
+    def _normalize_invoice_numbers(self, column):
+        """
+        Normalize the invoice number column: strip the "SZ" prefix and whitespace
+        
+        Only text and plain int/float values are invoice numbers; a missing
+        (float NaN) value becomes 'nan' like any other float.
+        
+        Args:
+            column: pandas Series with the invoice numbers
+            
+        Returns:
+            Tuple (Series of invoice number strings, boolean Series of valid rows)
+        """
+        if pd.api.types.is_float_dtype(column.dtype) and not pd.api.types.is_extension_array_dtype(column.dtype):
+            return column.map(str).astype(object).str.strip(), pd.Series(True, index=column.index)
+        if column.dtype != object and not pd.api.types.is_string_dtype(column.dtype):
+            # Integer, boolean and date values are numpy/pandas scalars, not int/float
+            return pd.Series([''] * len(column), index=column.index, dtype=object), pd.Series(False, index=column.index)
+            
+        is_text = column.map(lambda value: isinstance(value, str))
+        valid = is_text | column.map(lambda value: isinstance(value, (int, float)))
+        
+        text = column[is_text].astype(object)
+        prefixed = text.str.upper().str.startswith('SZ').astype(bool)
+        text = text.where(~prefixed, text.str[2:])
+        
+        numbers = column.astype(object).map(str)
+        numbers[is_text] = text
+        return numbers.where(valid, '').str.strip(), valid.astype(bool)
+        
+    def iter_invoices(self, column_mapping, file_path=None):
+        """
+        Read invoices row by row without loading the whole sheet
+        
+        The first worksheet is streamed with openpyxl in read-only mode, so memory
+        stays bounded and the first invoices are available while the rest of the file
+        is still being read. Cells are converted to text the way load_excel_file reads
+        mapped columns and normalized like process_file does, so both give the same
+        invoices. Formats openpyxl cannot stream (e.g. .xls) are loaded with
+        load_excel_file and process_file instead.
+        
+        Args:
+            column_mapping: Dictionary mapping CRM fields to Excel column names
+                (same as process_file)
+            file_path: Optional path to the Excel file (defaults to the loaded file)
+                
+        Yields:
+            Dictionaries, each containing data for one invoice
+        """
+        file_path = file_path or self.file_path
+        if not file_path or not os.path.exists(file_path):
+            logging.error(f"Excel file not found: {file_path}")
+            return
+            
+        if not isinstance(column_mapping, dict) or not column_mapping:
+            logging.error("Invalid column mapping: must be a non-empty dictionary")
+            return
+            
+        if not file_path.lower().endswith(STREAMING_EXTENSIONS):
+            if self.load_excel_file(file_path, column_mapping=column_mapping):
+                yield from self.process_file(column_mapping)
+            return
+            
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                logging.error("No Excel data loaded")
+                return
+            
+            positions = self._header_positions(header)
+            
+            fields = {}
+            missing_columns = []
+            for crm_field, excel_col in column_mapping.items():
+                if isinstance(excel_col, str) and excel_col in positions:
+                    fields[crm_field] = positions[excel_col]
+                else:
+                    missing_columns.append(excel_col)
                     
-                row['invoice_number'] = str(invoice_number).strip()
+            if missing_columns:
+                logging.warning(f"Columns not found in Excel file: {missing_columns}")
                 
-                # Convert numeric values to strings and handle NaN values
-                for key, value in row.items():
-                    if pd.isna(value):
-                        row[key] = ''
-                    elif isinstance(value, (int, float)):
-                        row[key] = str(value)
-                    elif not isinstance(value, str):
-                        # Convert any other type to string
-                        row[key] = str(value)
+            if not fields:
+                logging.error("No valid columns found in the mapping")
+                return
                 
-                # Validate required fields
-                if not row.get('invoice_number'):
-                    logging.warning(f"Missing invoice number in row {i+1}, skipping")
+            self.file_path = file_path
+            row_indexes, chunk = [], []
+            for row_index, values in enumerate(rows):
+                # Formatted but empty rows (e.g. at the end of the sheet) are not invoices
+                if all(value is None for value in values):
                     continue
-                    
-                # Add the processed row
-                result.append(row)
-                
-            except Exception as e:
-                logging.error(f"Error processing row {i+1}: {str(e)}")
-                continue
+                row_indexes.append(row_index)
+                chunk.append([self._cell_text(values[index]) if index < len(values) else '' for index in fields.values()])
+                if len(chunk) >= STREAM_CHUNK_SIZE:
+                    yield from self._normalize_chunk(fields, row_indexes, chunk)
+                    row_indexes, chunk = [], []
+            if chunk:
+                yield from self._normalize_chunk(fields, row_indexes, chunk)
+        finally:
+            workbook.close()
             
-        return result
\ No newline at end of file
+    def _normalize_chunk(self, fields, row_indexes, chunk):
+        """
+        Normalize a chunk of streamed rows with _normalize_columns
+        
+        Args:
+            fields: Dictionary mapping CRM fields to column positions
+            row_indexes: Index of each row below the header
+            chunk: List of rows, each a list of cell texts in the order of fields
+            
+        Returns:
+            List of invoice dictionaries
+        """
+        columns = {
+            crm_field: pd.Series([row[position] for row in chunk], index=row_indexes, dtype=object)
+            for position, crm_field in enumerate(fields)
+        }
+        return self._normalize_columns(columns)
+        
+    def _cell_text(self, value):
+        """
+        Convert a streamed cell value to text the way pandas reads a column with dtype str
+        
+        Args:
+            value: Cell value from openpyxl
+            
+        Returns:
+            The value as a string; '' for empty cells, missing-value markers (e.g. 'N/A')
+            and error values (e.g. '#DIV/0!')
+        """
+        if value is None:
+            return ''
+        if isinstance(value, str):
+            return '' if value in NA_VALUES or value in ERROR_CODES else value
+        if isinstance(value, float) and value.is_integer():
+            # pandas reads whole numbers as integers
+            return str(int(value))
+        return str(value)
+            
+    def iter_invoice_batches(self, column_mapping, batch_size=100, file_path=None):
+        """
+        Read invoices row by row and group them into fixed-size batches
+        
+        Args:
+            column_mapping: Dictionary mapping CRM fields to Excel column names
+            batch_size: Maximum number of invoices per batch
+            file_path: Optional path to the Excel file (defaults to the loaded file)
+            
+        Yields:
+            Lists of invoice dictionaries (the last one may be shorter)
+        """
+        batch = []
+        for invoice in self.iter_invoices(column_mapping, file_path=file_path):
+            batch.append(invoice)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
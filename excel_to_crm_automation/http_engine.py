@@ -0,0 +1,310 @@
+"""
+HTTP Engine Module
+
+This module submits the Add Actual Net form with plain HTTP requests, reusing the
+cookies of an authenticated browser session, so no browser UI has to be driven.
+"""
+import json
+import logging
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class FormParser(HTMLParser):
+    """Collect the forms of an HTML page with their fields and default values"""
+
+    def __init__(self):
+        super().__init__()
+        self.forms = []
+        self.csrf_meta = None
+        self._form = None
+        self._select = None
+        self._option = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'meta' and attrs.get('name') == 'csrf-token':
+            self.csrf_meta = attrs.get('content')
+        elif tag == 'form':
+            self._form = {
+                'action': attrs.get('action', ''),
+                'method': (attrs.get('method') or 'get').lower(),
+                'fields': {},
+                'options': {}
+            }
+            self.forms.append(self._form)
+        elif self._form is None:
+            return
+        elif tag == 'input':
+            name = attrs.get('name')
+            input_type = (attrs.get('type') or 'text').lower()
+            if not name or input_type in ('submit', 'button', 'image', 'reset', 'file'):
+                return
+            if input_type in ('checkbox', 'radio') and 'checked' not in attrs:
+                self._form['fields'].setdefault(name, None)
+                return
+            self._form['fields'][name] = attrs.get('value', '')
+        elif tag == 'textarea' and attrs.get('name'):
+            self._form['fields'][attrs['name']] = ''
+        elif tag == 'select' and attrs.get('name'):
+            self._select = attrs['name']
+            self._form['fields'].setdefault(self._select, '')
+            self._form['options'][self._select] = {}
+        elif tag == 'option' and self._select:
+            self._option = {'value': attrs.get('value'), 'text': ''}
+            if 'selected' in attrs:
+                self._form['fields'][self._select] = attrs.get('value', '')
+
+    def handle_data(self, data):
+        if self._option is not None:
+            self._option['text'] += data
+
+    def handle_endtag(self, tag):
+        if tag == 'option' and self._option is not None:
+            text = self._option['text'].strip()
+            value = self._option['value'] if self._option['value'] is not None else text
+            self._form['options'][self._select][text.lower()] = value
+            self._option = None
+        elif tag == 'select':
+            self._select = None
+        elif tag == 'form':
+            self._form = None
+
+
+class HttpFormEngine:
+    def __init__(self, config=None):
+        """
+        Initialize the HTTP form engine
+
+        Args:
+            config: Dictionary containing configuration options (same as CRMAutomator)
+        """
+        self.config = config or {}
+        self.logger = logging.getLogger(__name__)
+
+        crm_config = self.config.get('crm', {})
+        http_config = crm_config.get('http_fast_path', {})
+        self.timeout = http_config.get('timeout', self.config.get('browser', {}).get('timeout', 15))
+
+        # The fast path can only fill fields that are addressed by their form name
+        field_mappings = crm_config.get('field_mappings', {})
+        self.supplier_field = self._field_name(field_mappings.get('supplier_field', {}))
+        self.actual_net_field = self._field_name(field_mappings.get('actual_net_field', {}))
+
+        pool_size = http_config.get('pool_size', 10)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.has_cookies = False
+
+    def _field_name(self, locator):
+        """Return the form field name of a locator, or None if it is not a name locator"""
+        if locator.get('type', '').lower() == 'name':
+            return locator.get('value')
+        return None
+
+    def is_available(self):
+        """
+        Check if the configured form fields can be submitted over HTTP
+
+        Returns:
+            Boolean indicating if the fast path can be used
+        """
+        return bool(self.supplier_field and self.actual_net_field)
+
+    def sync_cookies(self, driver):
+        """
+        Copy the cookies and user agent of a browser session into the HTTP session
+
+        Args:
+            driver: Selenium WebDriver or BrowserBackend of an authenticated session
+
+        Returns:
+            Boolean indicating if cookies were copied
+        """
+        try:
+            cookies = driver.get_cookies()
+            user_agent = driver.execute_script("return navigator.userAgent")
+        except Exception as e:
+            self.logger.error(f"Error reading browser cookies: {str(e)}")
+            return False
+
+        self._set_cookies(cookies)
+        if user_agent:
+            self.session.headers['User-Agent'] = user_agent
+        return self.has_cookies
+
+    def load_cookie_jar(self, file_path):
+        """
+        Load cookies saved by BrowserBackend.save_cookies
+
+        Args:
+            file_path: Path of the JSON cookie jar
+
+        Returns:
+            Boolean indicating if cookies were loaded
+        """
+        try:
+            with open(file_path, 'r') as f:
+                self._set_cookies(json.load(f))
+            return self.has_cookies
+        except Exception as e:
+            self.logger.warning(f"Could not load cookie jar {file_path}: {str(e)}")
+            return False
+
+    def _set_cookies(self, cookies):
+        """Replace the cookies of the HTTP session"""
+        self.session.cookies.clear()
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie['name'],
+                cookie['value'],
+                domain=cookie.get('domain', ''),
+                path=cookie.get('path', '/')
+            )
+        self.has_cookies = bool(cookies)
+
+    def fetch_form(self, booking_url):
+        """
+        Fetch a booking page and parse its Add Actual Net form
+
+        Args:
+            booking_url: URL of the booking details page
+
+        Returns:
+            Dictionary with 'action', 'method', 'fields', 'options' and 'csrf_meta',
+            or None if the page does not contain a matching form
+        """
+        response = self.session.get(booking_url, timeout=self.timeout)
+        if response.status_code >= 400 or 'login' in response.url.lower():
+            self.logger.warning(f"Could not fetch booking page {booking_url}: HTTP {response.status_code}")
+            return None
+
+        parser = FormParser()
+        parser.feed(response.text)
+
+        for form in parser.forms:
+            if self.supplier_field in form['fields'] and self.actual_net_field in form['fields']:
+                form['action'] = urljoin(response.url, form['action'] or response.url)
+                form['csrf_meta'] = parser.csrf_meta
+                return form
+
+        self.logger.warning(f"Add Actual Net form not found on {booking_url}")
+        return None
+
+    def submit_actual_net(self, booking_url, supplier, actual_net):
+        """
+        Submit supplier and actual net cost for a booking without the browser
+
+        Args:
+            booking_url: URL of the booking details page
+            supplier: Supplier name (may be empty to keep the current value)
+            actual_net: Actual net cost (may be empty to keep the current value)
+
+        Returns:
+            Boolean indicating if the form was submitted successfully; False means
+            the caller should fall back to the browser
+        """
+        if not self.is_available() or not self.has_cookies:
+            return False
+
+        try:
+            form = self.fetch_form(booking_url)
+            if not form:
+                return False
+            return self.submit_form(form, booking_url, supplier, actual_net)
+        except requests.RequestException as e:
+            self.logger.error(f"HTTP error submitting form for {booking_url}: {str(e)}")
+            return False
+
+    def current_values(self, form):
+        """
+        Get the values a fetched Add Actual Net form currently holds
+
+        Args:
+            form: Parsed form dictionary as returned by fetch_form
+
+        Returns:
+            Dictionary with 'supplier' and 'actual_net_cost'
+        """
+        supplier = form['fields'].get(self.supplier_field) or ''
+        # A select submits option values; compare the visible text instead
+        for text, value in form['options'].get(self.supplier_field, {}).items():
+            if value == supplier:
+                supplier = text
+                break
+        return {
+            'supplier': supplier,
+            'actual_net_cost': form['fields'].get(self.actual_net_field) or ''
+        }
+
+    def submit_form(self, form, booking_url, supplier, actual_net):
+        """
+        Submit supplier and actual net cost with a form fetched by fetch_form
+
+        Args:
+            form: Parsed form dictionary as returned by fetch_form
+            booking_url: URL of the booking details page (sent as Referer)
+            supplier: Supplier name (may be empty to keep the current value)
+            actual_net: Actual net cost (may be empty to keep the current value)
+
+        Returns:
+            Boolean indicating if the form was submitted successfully
+        """
+        try:
+            data = {name: value for name, value in form['fields'].items() if value is not None}
+            if supplier:
+                supplier_value = self._option_value(form, self.supplier_field, supplier)
+                if supplier_value is None:
+                    self.logger.warning(f"Supplier '{supplier}' is not an option of the form")
+                    return False
+                data[self.supplier_field] = supplier_value
+            if actual_net:
+                data[self.actual_net_field] = str(actual_net)
+
+            headers = {'Referer': booking_url}
+            if form['csrf_meta']:
+                headers['X-CSRF-TOKEN'] = form['csrf_meta']
+
+            if form['method'] == 'post':
+                response = self.session.post(form['action'], data=data, headers=headers, timeout=self.timeout)
+            else:
+                response = self.session.get(form['action'], params=data, headers=headers, timeout=self.timeout)
+
+            if response.status_code >= 400 or 'login' in response.url.lower():
+                self.logger.warning(f"Form submission for {booking_url} failed: HTTP {response.status_code}")
+                return False
+
+            return True
+        except requests.RequestException as e:
+            self.logger.error(f"HTTP error submitting form for {booking_url}: {str(e)}")
+            return False
+
+    def _option_value(self, form, field_name, text):
+        """
+        Map a visible value to the value submitted for a field
+
+        Args:
+            form: Parsed form dictionary
+            field_name: Name of the form field
+            text: Value or visible option text
+
+        Returns:
+            Value to submit, or None if the field is a select without a matching option
+        """
+        options = form['options'].get(field_name)
+        if options is None:
+            return str(text)
+
+        text = str(text).strip()
+        if text in options.values():
+            return text
+        return options.get(text.lower())
+
+    def close(self):
+        """Close the HTTP session"""
+        self.session.close()
@@ -0,0 +1,102 @@
+"""
+Locators Module
+
+This module compiles the element locators from config.json once at startup into
+immutable Locator objects, so the automation does not re-parse them per invoice.
+"""
+import re
+from collections import namedtuple
+
+try:
+    from selenium.webdriver.common.by import By
+except ImportError:  # Playwright runs need no Selenium; these are Selenium's strategy names
+    class By:
+        ID = 'id'
+        XPATH = 'xpath'
+        LINK_TEXT = 'link text'
+        PARTIAL_LINK_TEXT = 'partial link text'
+        NAME = 'name'
+        TAG_NAME = 'tag name'
+        CLASS_NAME = 'class name'
+        CSS_SELECTOR = 'css selector'
+
+
+# Placeholders such as {invoice_number} in locator values
+PLACEHOLDER_PATTERN = re.compile(r'\{(\w+)\}')
+
+# Sections of the crm configuration that contain locators
+LOCATOR_SECTIONS = ('login', 'navigation', 'field_mappings', 'current_values')
+
+
+class Locator(namedtuple('Locator', ['by', 'value', 'template'])):
+    """
+    Immutable element locator
+
+    Attributes:
+        by: Selenium locator strategy (e.g. By.XPATH)
+        value: Locator value
+        template: Tuple of literal parts and placeholder names (odd positions)
+            when the value contains placeholders, otherwise None
+    """
+    __slots__ = ()
+
+    @classmethod
+    def compile(cls, locator_config, default_type='XPATH'):
+        """
+        Compile a locator dictionary from the configuration
+
+        Args:
+            locator_config: Dictionary with 'type' and 'value'
+            default_type: Locator type used when 'type' is missing
+
+        Returns:
+            Locator, or None if the configuration has no value
+        """
+        if not isinstance(locator_config, dict) or not locator_config.get('value'):
+            return None
+
+        by = getattr(By, locator_config.get('type', default_type).upper())
+        value = locator_config['value']
+        parts = PLACEHOLDER_PATTERN.split(value)
+        template = tuple(parts) if len(parts) > 1 else None
+        return cls(by, value, template)
+
+    def format(self, **values):
+        """
+        Fill in the placeholders of the locator value
+
+        Args:
+            **values: Placeholder values, e.g. invoice_number='SZ1234'
+
+        Returns:
+            Locator with the placeholders replaced (placeholders without a value are kept)
+        """
+        if not self.template:
+            return self
+
+        parts = []
+        for index, part in enumerate(self.template):
+            if index % 2:
+                parts.append(str(values[part]) if part in values else '{' + part + '}')
+            else:
+                parts.append(part)
+        return Locator(self.by, ''.join(parts), None)
+
+
+def compile_locators(crm_config):
+    """
+    Compile all locators of the crm configuration
+
+    Args:
+        crm_config: The 'crm' section of the configuration
+
+    Returns:
+        Dictionary mapping locator names (e.g. 'search_button') to Locator objects
+    """
+    locators = {}
+    for section in LOCATOR_SECTIONS:
+        for name, locator_config in crm_config.get(section, {}).items():
+            locator = Locator.compile(locator_config)
+            if locator:
+                locators[name] = locator
+    return locators
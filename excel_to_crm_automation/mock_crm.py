@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Mock CRM Server
+
+This script runs a small local stand-in for the CRM, reproducing the pages and
+locators from config.json (login form, Bookings List with search, booking details
+and the Add Actual Net form), so the automation can be tried without touching
+the production CRM. Server latency and failures can be injected to see how the
+automation copes with a slow or flaky CRM.
+"""
+
+import os
+import math
+import time
+import random
+import secrets
+import argparse
+import logging
+import threading
+from flask import Flask, request, redirect, url_for, session, render_template_string, abort, flash
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Create Flask app
+app = Flask(__name__)
+app.secret_key = os.environ.get("MOCK_CRM_SECRET_KEY", "mock_crm_key")
+
+# Configuration
+MOCK_USERNAME = os.environ.get("MOCK_CRM_USERNAME", "admin")
+MOCK_PASSWORD = os.environ.get("MOCK_CRM_PASSWORD", "admin")
+PAGE_SIZE = 25
+FIRST_BOOKING_NUMBER = 1001
+
+# Injected server behaviour, see configure()
+SETTINGS = {
+    'latency': 0.0,
+    'latency_jitter': 0.0,
+    'failure_rate': 0.0
+}
+
+# In-memory bookings: id -> booking dictionary
+BOOKINGS = {}
+BOOKINGS_LOCK = threading.Lock()
+
+SUPPLIERS = ['Saudi Airlines', 'Emirates', 'Qatar Airways', 'Turkish Airlines', 'British Airways']
+
+LAYOUT = """<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <meta name="csrf-token" content="{{ csrf_token }}">
+  <title>Mock CRM</title>
+</head>
+<body>
+{% with messages = get_flashed_messages() %}{% for message in messages %}
+  <div class="alert alert-success">{{ message }}</div>
+{% endfor %}{% endwith %}
+{{ body|safe }}
+</body>
+</html>"""
+
+LOGIN_PAGE = """
+<form method="post" action="{{ url_for('login') }}">
+  <input type="text" name="username">
+  <input type="password" name="password">
+  <button type="submit" class="btn btn-primary">Sign In</button>
+</form>
+{% if error %}<div class="alert alert-danger">{{ error }}</div>{% endif %}
+"""
+
+DASHBOARD_PAGE = """
+<div class="card">
+  <h4>Customer Relation Management System</h4>
+  <a class="btn btn-primary" href="{{ url_for('crm_module') }}">View Module</a>
+</div>
+"""
+
+CRM_MODULE_PAGE = """
+<nav><a href="{{ url_for('booking_list') }}">Bookings List</a></nav>
+"""
+
+BOOKING_LIST_PAGE = """
+<form method="get" action="{{ url_for('booking_list') }}">
+  <input type="text" name="booking_number" placeholder="Enter Booking Number" value="{{ query }}">
+  <button type="submit" class="btn btn-info">Search</button>
+</form>
+<table id="bookings">
+  <thead><tr><th>Booking #</th><th>Supplier</th><th>Actual Net</th><th>Status</th><th></th></tr></thead>
+  <tbody>
+  {% for booking in bookings %}
+    <tr>
+      <td>{{ booking.number }}</td>
+      <td>{{ booking.supplier }}</td>
+      <td>{{ booking.actual_net }}</td>
+      <td>{{ booking.status }}</td>
+      <td><a href="{{ url_for('booking_detail', booking_id=booking.id) }}">{{ booking.number }}</a></td>
+    </tr>
+  {% endfor %}
+  </tbody>
+</table>
+<ul class="pagination">
+  {% if page < pages %}<li><a rel="next" href="{{ url_for('booking_list', page=page + 1, booking_number=query) }}">Next</a></li>{% endif %}
+</ul>
+"""
+
+BOOKING_DETAIL_PAGE = """
+<h2>Booking #: {{ booking.number }}</h2>
+<div>PNR Details</div>
+<dl>
+  <dt>Supplier</dt><dd class="supplier">{{ booking.supplier }}</dd>
+  <dt>Actual Net</dt><dd class="actual-net">{{ booking.actual_net }}</dd>
+</dl>
+<a href="#" onclick="document.getElementById('actual-net-form').style.display='block'; return false;">Add Actual Net</a>
+<div id="actual-net-form" style="display: none">
+  <div>Add / Update Flight Actual Net</div>
+  <form method="post" action="{{ url_for('save_actual_net', booking_id=booking.id) }}">
+    <input type="hidden" name="_token" value="{{ csrf_token }}">
+    <input type="text" name="supplier_name" list="suppliers" value="{{ booking.supplier }}">
+    <datalist id="suppliers">
+      {% for supplier in suppliers %}<option value="{{ supplier }}">{% endfor %}
+    </datalist>
+    <input type="text" name="actual_net" value="{{ booking.actual_net }}">
+    <button type="submit" class="btn btn-success">Save</button>
+  </form>
+</div>
+"""
+
+
+def seed_bookings(count):
+    """
+    Create the in-memory bookings
+
+    Args:
+        count: Number of bookings to create
+    """
+    with BOOKINGS_LOCK:
+        BOOKINGS.clear()
+        for booking_id in range(1, count + 1):
+            BOOKINGS[booking_id] = {
+                'id': booking_id,
+                'number': f"SZ{FIRST_BOOKING_NUMBER + booking_id - 1}",
+                'supplier': '',
+                'actual_net': '',
+                'status': 'Confirmed'
+            }
+
+
+def configure(latency=0.0, latency_jitter=0.0, failure_rate=0.0):
+    """
+    Configure injected latency and failures
+
+    Args:
+        latency: Seconds added to every response
+        latency_jitter: Up to this many seconds are added randomly on top of latency
+        failure_rate: Fraction (0-1) of requests answered with HTTP 500
+    """
+    SETTINGS['latency'] = max(0.0, latency)
+    SETTINGS['latency_jitter'] = max(0.0, latency_jitter)
+    SETTINGS['failure_rate'] = min(1.0, max(0.0, failure_rate))
+
+
+def render_page(body, **context):
+    """Render a page body inside the shared layout"""
+    context['csrf_token'] = csrf_token()
+    return render_template_string(LAYOUT, body=render_template_string(body, **context), **context)
+
+
+def csrf_token():
+    """Get (or create) the CSRF token of the current session"""
+    if '_token' not in session:
+        session['_token'] = secrets.token_hex(16)
+    return session['_token']
+
+
+@app.before_request
+def inject_latency_and_failures():
+    """Delay the response and fail a share of the requests (never the login page)"""
+    delay = SETTINGS['latency'] + random.uniform(0, SETTINGS['latency_jitter'])
+    if delay:
+        time.sleep(delay)
+    if request.endpoint != 'login' and random.random() < SETTINGS['failure_rate']:
+        abort(500)
+
+
+@app.before_request
+def require_login():
+    """Redirect to the login page for every page except the login page itself"""
+    if request.endpoint not in ('login', 'static') and not session.get('user'):
+        return redirect(url_for('login'))
+
+
+@app.route('/login', methods=['GET', 'POST'])
+def login():
+    """Login page"""
+    error = None
+    if request.method == 'POST':
+        if request.form.get('username') == MOCK_USERNAME and request.form.get('password') == MOCK_PASSWORD:
+            session['user'] = MOCK_USERNAME
+            return redirect(url_for('dashboard'))
+        error = 'Invalid credentials'
+    return render_page(LOGIN_PAGE, error=error)
+
+
+@app.route('/')
+@app.route('/dashboard')
+def dashboard():
+    """Dashboard with the module cards"""
+    return render_page(DASHBOARD_PAGE)
+
+
+@app.route('/crm')
+def crm_module():
+    """CRM module start page"""
+    return render_page(CRM_MODULE_PAGE)
+
+
+@app.route('/crm/booking-list')
+def booking_list():
+    """Bookings List with search and pagination"""
+    query = request.args.get('booking_number', '').strip()
+    page = max(1, request.args.get('page', 1, type=int))
+
+    with BOOKINGS_LOCK:
+        bookings = list(BOOKINGS.values())
+    if query:
+        bookings = [booking for booking in bookings if query.upper() in booking['number']]
+
+    pages = max(1, math.ceil(len(bookings) / PAGE_SIZE))
+    start = (page - 1) * PAGE_SIZE
+    return render_page(
+        BOOKING_LIST_PAGE,
+        bookings=bookings[start:start + PAGE_SIZE],
+        query=query,
+        page=page,
+        pages=pages
+    )
+
+
+@app.route('/crm/booking/<int:booking_id>')
+def booking_detail(booking_id):
+    """Booking details page with the Add Actual Net form"""
+    booking = BOOKINGS.get(booking_id)
+    if not booking:
+        abort(404)
+    return render_page(BOOKING_DETAIL_PAGE, booking=booking, suppliers=SUPPLIERS)
+
+
+@app.route('/crm/booking/<int:booking_id>/actual-net', methods=['POST'])
+def save_actual_net(booking_id):
+    """Save supplier and actual net for a booking"""
+    booking = BOOKINGS.get(booking_id)
+    if not booking:
+        abort(404)
+    if request.form.get('_token') != session.get('_token'):
+        abort(403)
+
+    with BOOKINGS_LOCK:
+        booking['supplier'] = request.form.get('supplier_name', booking['supplier'])
+        booking['actual_net'] = request.form.get('actual_net', booking['actual_net'])
+
+    flash('Actual net saved successfully')
+    return redirect(url_for('booking_detail', booking_id=booking_id))
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='Mock CRM server for local testing')
+
+    parser.add_argument('--host', default='127.0.0.1', help='Host to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=5001, help='Port to listen on (default: 5001)')
+    parser.add_argument('--bookings', type=int, default=1000, help='Number of bookings to create (default: 1000)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response (default: 0)')
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help='Random extra latency in seconds (default: 0)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 500 (default: 0)')
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    seed_bookings(args.bookings)
+    configure(args.latency, args.latency_jitter, args.failure_rate)
+    logger.info(f"Mock CRM with {args.bookings} bookings at http://{args.host}:{args.port}/login")
+    app.run(host=args.host, port=args.port, threaded=True)
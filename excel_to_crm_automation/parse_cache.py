@@ -0,0 +1,179 @@
+"""
+Parse Cache Module
+
+This module keeps parsed workbooks on disk as uncompressed Feather files, keyed
+by the SHA-256 of the file bytes and the reader options, so the same upload is
+parsed once and later loads are memory-mapped columnar reads. The least recently
+used entries are evicted once the cache exceeds its size limit.
+"""
+import os
+import json
+import glob
+import hashlib
+import logging
+import threading
+
+import pandas as pd
+
+from reader_engines import normalize_frame
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # The cache needs pyarrow
+    pa = feather = None
+
+
+# Bytes read at a time while hashing a workbook
+HASH_CHUNK_SIZE = 1024 * 1024
+
+CACHE_SUFFIX = '.feather'
+
+
+class ParseCache:
+    def __init__(self, config=None):
+        """
+        Initialize the parse cache
+
+        Args:
+            config: Dictionary containing configuration options; the 'excel' section
+                holds 'cache' with enabled, directory and max_size_mb
+        """
+        cache_config = (config or {}).get('excel', {}).get('cache', {})
+        self.directory = cache_config.get('directory', '.parse_cache')
+        self.max_bytes = int(cache_config.get('max_size_mb', 512) * 1024 * 1024)
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        self.enabled = cache_config.get('enabled', True)
+        if self.enabled and feather is None:
+            self.logger.info("Parse cache disabled: pyarrow is not installed")
+            self.enabled = False
+
+    def key(self, file_path, options=None):
+        """
+        Compute the cache key of a workbook
+
+        Args:
+            file_path: Path to the workbook
+            options: Optional dictionary of reader options that change the parsed result
+
+        Returns:
+            Hex SHA-256 digest of the file bytes, the reader options and the pandas version
+        """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        payload = {'options': options or {}, 'pandas': pd.__version__}
+        digest.update(json.dumps(payload, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+    def load(self, key):
+        """
+        Read a cached DataFrame
+
+        Args:
+            key: Cache key from key()
+
+        Returns:
+            DataFrame, or None if the workbook is not cached
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            table = feather.read_table(path, memory_map=True)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable parse cache entry {path}: {str(e)}")
+            return None
+
+        # Marks the entry as recently used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return normalize_frame(table.to_pandas())
+
+    def store(self, key, frame):
+        """
+        Cache a parsed DataFrame
+
+        Frames Feather cannot hold exactly (e.g. columns mixing text and numbers,
+        non-text headers) are not cached. This is decided from the Arrow schema, so
+        the written file is not read back.
+
+        Args:
+            key: Cache key from key()
+            frame: DataFrame as returned by the reader
+
+        Returns:
+            Boolean indicating if the frame was cached
+        """
+        if not self.enabled:
+            return False
+
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if not isinstance(frame.index, pd.RangeIndex) or frame.index.start != 0 or frame.index.step != 1:
+                return False
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+
+            # Only keep frames that come back with the same column names and dtypes
+            # (an empty slice converts the schema without the data)
+            restored = table.slice(0, 0).to_pandas()
+            if list(restored.columns) != list(frame.columns) or not restored.dtypes.equals(frame.dtypes):
+                self.logger.debug(f"Not caching {key}: the frame does not survive a Feather round trip")
+                return False
+
+            os.makedirs(self.directory, exist_ok=True)
+            feather.write_feather(table, temp_path, compression='uncompressed')
+            os.replace(temp_path, path)
+        except Exception as e:
+            self.logger.debug(f"Not caching {key}: {str(e)}")
+            return False
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        self.evict()
+        return True
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits max_size_mb
+
+        Returns:
+            Number of removed entries
+        """
+        with self._lock:
+            entries = []
+            for path in glob.glob(os.path.join(self.directory, f"*{CACHE_SUFFIX}")):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(entry[1] for entry in entries)
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            if removed:
+                self.logger.info(f"Evicted {removed} entries from the parse cache")
+            return removed
+
+    def _path(self, key):
+        """Get the file path of a cache entry"""
+        return os.path.join(self.directory, f"{key}{CACHE_SUFFIX}")
@@ -0,0 +1,814 @@
+"""
+Playwright Controller Module
+
+This module drives the browser with Playwright's asyncio API. All sessions of a
+process share one event loop thread and, when no profile directory is configured,
+one Chromium process with a separate browser context per session, so many pages
+are driven concurrently without a chromedriver HTTP round-trip per command.
+"""
+import os
+import re
+import json
+import atexit
+import asyncio
+import fnmatch
+import weakref
+import itertools
+import threading
+
+from playwright.async_api import async_playwright, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+from timing import timed, recorder, WAIT
+from browser_backend import BrowserBackend, WAIT_CONDITIONS, PAGE_LOAD_STRATEGIES, FILL_FIELDS_SCRIPT
+
+
+# Playwright load state each page load strategy waits for
+WAIT_UNTIL = {
+    'normal': 'load',
+    'eager': 'domcontentloaded',
+    'none': 'commit',
+}
+
+LAUNCH_ARGS = ['--no-sandbox', '--disable-dev-shm-usage', '--disable-gpu']
+
+NAVIGATION_TIMEOUT_MS = 60000
+
+# Shared by all sessions of the process; only touched from the event loop thread
+_STATE = {'playwright': None, 'browsers': {}, 'lock': None, 'stopped': False}
+_LOOP = None
+_LOOP_LOCK = threading.Lock()
+
+# Sessions that are still open, closed before the event loop stops
+_SESSIONS = weakref.WeakSet()
+
+
+def _event_loop():
+    """Get the shared event loop, starting its thread on first use"""
+    global _LOOP
+    with _LOOP_LOCK:
+        if _STATE['stopped']:
+            raise RuntimeError("Playwright event loop has been stopped")
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, name="playwright-loop", daemon=True).start()
+        return _LOOP
+
+
+def _run(coroutine, timeout=None):
+    """
+    Run a coroutine on the shared event loop and wait for its result
+
+    Args:
+        coroutine: Coroutine to run
+        timeout: Optional maximum time to wait in seconds
+
+    Returns:
+        Result of the coroutine (its exception is raised here)
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, _event_loop()).result(timeout)
+
+
+async def _lock():
+    """Get the lock guarding the shared Playwright objects (created on the loop)"""
+    if _STATE['lock'] is None:
+        _STATE['lock'] = asyncio.Lock()
+    return _STATE['lock']
+
+
+async def _playwright():
+    """Get the Playwright instance of the process, starting it on first use"""
+    async with await _lock():
+        if _STATE['playwright'] is None:
+            _STATE['playwright'] = await async_playwright().start()
+        return _STATE['playwright']
+
+
+async def _shared_browser(headless):
+    """Get the Chromium process shared by sessions without a profile directory"""
+    playwright = await _playwright()
+    async with await _lock():
+        browser = _STATE['browsers'].get(headless)
+        if browser is None or not browser.is_connected():
+            browser = await playwright.chromium.launch(headless=headless, args=LAUNCH_ARGS)
+            _STATE['browsers'][headless] = browser
+        return browser
+
+
+def _shutdown():
+    """Close all sessions, the shared browsers and Playwright, then stop the event loop"""
+    if _LOOP is None or _STATE['stopped']:
+        return
+
+    for session in list(_SESSIONS):
+        try:
+            session.close()
+        except Exception:
+            pass
+
+    async def stop():
+        for browser in _STATE['browsers'].values():
+            try:
+                await browser.close()
+            except PlaywrightError:
+                pass
+        if _STATE['playwright']:
+            await _STATE['playwright'].stop()
+
+    try:
+        _run(stop(), timeout=30)
+    except Exception:
+        pass
+    _STATE['stopped'] = True
+    _LOOP.call_soon_threadsafe(_LOOP.stop)
+
+
+atexit.register(_shutdown)
+
+
+def _selector(locator_type, locator_value):
+    """
+    Convert a Selenium locator to a Playwright selector
+
+    Args:
+        locator_type: Selenium By value (e.g. 'xpath', 'css selector', 'id')
+        locator_value: Value of the locator
+
+    Returns:
+        Playwright selector string
+    """
+    if locator_type == 'xpath':
+        return f"xpath={locator_value}"
+    if locator_type in ('css selector', 'tag name'):
+        return f"css={locator_value}"
+    if locator_type == 'class name':
+        return f"css=.{locator_value}"
+    if locator_type in ('id', 'name'):
+        return f"css=[{locator_type}={json.dumps(locator_value)}]"
+    if locator_type == 'link text':
+        return f"css=a:text-is({json.dumps(locator_value)})"
+    if locator_type == 'partial link text':
+        return f"css=a:has-text({json.dumps(locator_value)})"
+    raise ValueError(f"Unsupported locator type: {locator_type}")
+
+
+def _config_selector(locator):
+    """Convert a locator dictionary from the configuration (e.g. type 'CSS_SELECTOR') to a selector"""
+    locator_type = locator.get('type', 'XPATH').lower().replace('_', ' ')
+    return _selector(locator_type, locator.get('value', ''))
+
+
+class PlaywrightController(BrowserBackend):
+    def __init__(self, config=None, worker_id=None):
+        """
+        Initialize the Playwright controller
+
+        Args:
+            config: Dictionary containing configuration options
+            worker_id: Optional worker index; with browser.user_data_dir each worker
+                gets its own profile (and with it its own Chromium process)
+        """
+        self.context = None
+        super().__init__(config, worker_id)
+        self.page = None
+        self._pages = {}
+        self._current_handle = None
+        self._handle_numbers = itertools.count(1)
+        self._wait_until = WAIT_UNTIL['normal']
+
+        # Playwright does not expose the process id of its browser, so the memory
+        # of a session cannot be measured; only recycle_after_invoices applies
+        if self.lifecycle.max_rss_mb:
+            self.logger.warning("browser.lifecycle.max_rss_mb is ignored by the Playwright backend")
+
+    @timed('browser.start_browser')
+    def start_browser(self, headless=False, page_load_strategy=None):
+        """
+        Start the browser session
+
+        Args:
+            headless: Boolean indicating if browser should run in headless mode
+            page_load_strategy: Optional page load strategy ('normal', 'eager' or 'none'),
+                defaults to browser.page_load_strategy
+
+        Returns:
+            Boolean indicating if browser was started successfully
+        """
+        strategy = page_load_strategy or self.page_load_strategy
+        if strategy not in PAGE_LOAD_STRATEGIES:
+            self.logger.warning(f"Unknown page load strategy '{strategy}', using 'normal'")
+            strategy = 'normal'
+        self._wait_until = WAIT_UNTIL[strategy]
+
+        try:
+            _run(self._start(headless))
+            _SESSIONS.add(self)
+            # Only closes the session at exit: without a driver process there is no
+            # pid file, and Playwright shuts down the browsers it launched itself
+            self.lifecycle.register(self)
+            return True
+        except Exception as e:
+            self.logger.error(f"Error starting browser: {str(e)}")
+            if self.context:
+                try:
+                    _run(self.context.close(), timeout=30)
+                except Exception:
+                    pass
+                self.context = None
+            return False
+
+    async def _start(self, headless):
+        """Create the browser context and its first page"""
+        options = {'viewport': {'width': 1920, 'height': 1080}}
+        if self.user_data_dir:
+            # A persistent profile needs a Chromium process of its own
+            os.makedirs(self.user_data_dir, exist_ok=True)
+            playwright = await _playwright()
+            self.context = await playwright.chromium.launch_persistent_context(
+                self.user_data_dir, headless=headless, args=LAUNCH_ARGS, **options
+            )
+        else:
+            browser = await _shared_browser(headless)
+            self.context = await browser.new_context(**options)
+
+        self.context.set_default_timeout(self.timeout * 1000)
+        self.context.set_default_navigation_timeout(NAVIGATION_TIMEOUT_MS)
+
+        if self.block_resources and self.blocked_url_patterns:
+            await self._apply_resource_blocking()
+        if self.collect_stats:
+            self.context.on('requestfinished', self._count_request)
+        if self.cookie_file:
+            await self._load_cookies(self.cookie_file)
+
+        self._pages = {}
+        self.page = self.context.pages[0] if self.context.pages else await self.context.new_page()
+        self._current_handle = self._register_page(self.page)
+
+    async def _apply_resource_blocking(self):
+        """Abort requests matching the blocked URL patterns for the whole context"""
+        pattern = re.compile('|'.join(fnmatch.translate(item) for item in self.blocked_url_patterns))
+        await self.context.route(pattern, self._block_request)
+        self.logger.info(f"Blocking {len(self.blocked_url_patterns)} URL patterns")
+
+    async def _block_request(self, route):
+        """Abort a blocked request"""
+        self.network_stats['blocked_requests'] += 1
+        await route.abort('blockedbyclient')
+
+    async def _count_request(self, request):
+        """Add a finished request to the network stats"""
+        try:
+            sizes = await request.sizes()
+        except PlaywrightError:
+            return
+        self.network_stats['requests'] += 1
+        self.network_stats['transferred_bytes'] += max(0, sizes.get('responseHeadersSize', 0)) + max(0, sizes.get('responseBodySize', 0))
+
+    def collect_network_stats(self):
+        """
+        Get the network stats of the session
+
+        Returns:
+            Dictionary with 'requests', 'transferred_bytes', 'blocked_requests' and
+            'estimated_bytes_avoided'
+        """
+        return self._network_summary()
+
+    def close(self):
+        """Close the browser session"""
+        if self.context:
+            try:
+                if self.collect_stats:
+                    self._log_network_stats()
+                if self.cookie_file:
+                    self.save_cookies()
+                _run(self.context.close(), timeout=30)
+            except Exception as e:
+                self.logger.error(f"Error closing browser: {str(e)}")
+            finally:
+                self.context = None
+                self.page = None
+                self._pages = {}
+                _SESSIONS.discard(self)
+                self.lifecycle.unregister(self)
+
+        self._close_screenshot_writer()
+
+    def is_running(self):
+        """
+        Check if the browser session is started
+
+        Returns:
+            Boolean indicating if a browser context is open
+        """
+        return self.context is not None
+
+    def current_url(self):
+        """
+        Get the URL of the active tab
+
+        Returns:
+            Current URL, or an empty string if the browser is not running
+        """
+        return self.page.url if self.page else ''
+
+    @timed('browser.navigate_to')
+    def navigate_to(self, url):
+        """
+        Navigate to a specific URL
+
+        Args:
+            url: URL to navigate to
+
+        Returns:
+            Boolean indicating if navigation was successful
+        """
+        if not self.page:
+            return False
+
+        try:
+            _run(self.page.goto(url, wait_until=self._wait_until))
+            return True
+        except Exception as e:
+            self.logger.error(f"Error navigating to {url}: {str(e)}")
+            return False
+
+    def _register_page(self, page):
+        """Give a page a tab handle and forget it once it is closed"""
+        handle = f"tab-{next(self._handle_numbers)}"
+        self._pages[handle] = page
+        page.on('close', lambda _: self._pages.pop(handle, None))
+        return handle
+
+    def current_tab(self):
+        """
+        Get the handle of the active tab
+
+        Returns:
+            Tab handle, or None if the browser is not running
+        """
+        return self._current_handle if self.page else None
+
+    def tab_handles(self):
+        """
+        Get the handles of all open tabs
+
+        Returns:
+            List of tab handles
+        """
+        return list(self._pages)
+
+    def open_tab(self):
+        """
+        Open a new blank tab without leaving the active one
+
+        Returns:
+            Handle of the new tab, or None on error
+        """
+        if not self.context:
+            return None
+
+        try:
+            return self._register_page(_run(self.context.new_page()))
+        except Exception as e:
+            self.logger.error(f"Error opening a tab: {str(e)}")
+            return None
+
+    @timed('browser.load_in_tab')
+    def load_in_tab(self, handle, url):
+        """
+        Start loading a URL in another tab without waiting for the page to load
+
+        Args:
+            handle: Handle of the tab to load the URL in
+            url: URL to load
+
+        Returns:
+            Boolean indicating if the navigation was started
+        """
+        page = self._pages.get(handle)
+        if not page or page is self.page:
+            return False
+
+        try:
+            _run(page.evaluate("url => { window.location.href = url; }", url))
+            return True
+        except Exception as e:
+            self.logger.error(f"Error loading {url} in a background tab: {str(e)}")
+            return False
+
+    def switch_to_tab(self, handle):
+        """
+        Make another tab the active one
+
+        Args:
+            handle: Handle of the tab
+
+        Returns:
+            Boolean indicating if the tab is now active
+        """
+        page = self._pages.get(handle)
+        if not page:
+            self.logger.error(f"Error switching tabs: no open tab {handle}")
+            return False
+
+        self.page = page
+        self._current_handle = handle
+        return True
+
+    @timed('browser.wait_for_element', WAIT)
+    def wait_for_element(self, locator_type, locator_value, timeout=None):
+        """
+        Wait for an element to be visible on the page
+
+        Args:
+            locator_type: Type of locator (e.g., By.ID, By.XPATH)
+            locator_value: Value of the locator
+            timeout: Timeout in seconds (defaults to self.timeout)
+
+        Returns:
+            Playwright Locator of the first matching element if it became visible,
+            None otherwise
+        """
+        if not self.page:
+            return None
+
+        try:
+            locator = self.page.locator(_selector(locator_type, locator_value)).first
+            _run(locator.wait_for(state='visible', timeout=(timeout or self.timeout) * 1000))
+            return locator
+        except PlaywrightTimeoutError:
+            self.logger.warning(f"Timeout waiting for element: {locator_type}={locator_value}")
+            return None
+        except Exception as e:
+            self.logger.error(f"Error waiting for element: {str(e)}")
+            return None
+
+    @timed('browser.click_element')
+    def click_element(self, locator_type, locator_value, wait_time=0, cached=False):
+        """
+        Click on an element
+
+        Args:
+            locator_type: Type of locator (e.g., By.ID, By.XPATH)
+            locator_value: Value of the locator
+            wait_time: Time to wait after clicking (in seconds)
+            cached: Ignored; Playwright locators resolve the element on every use,
+                so there are no stale handles to cache
+
+        Returns:
+            Boolean indicating if click was successful
+        """
+        locator = self.wait_for_element(locator_type, locator_value)
+        if not locator:
+            return False
+
+        try:
+            _run(self._click(locator))
+            recorder.sleep(wait_time, 'browser.click_wait')
+            return True
+        except Exception as e:
+            self.logger.error(f"Error clicking element: {str(e)}")
+            return False
+
+    async def _click(self, locator):
+        """Click an element, falling back to a JavaScript click if the click is intercepted"""
+        try:
+            await locator.click()
+        except PlaywrightTimeoutError:
+            await locator.evaluate("element => element.click()")
+
+    @timed('browser.input_text')
+    def input_text(self, locator_type, locator_value, text, clear_first=True, cached=False):
+        """
+        Input text into an element
+
+        Args:
+            locator_type: Type of locator (e.g., By.ID, By.XPATH)
+            locator_value: Value of the locator
+            text: Text to input (for a select, the option label or value)
+            clear_first: Boolean indicating if field should be cleared first
+            cached: Ignored, see click_element
+
+        Returns:
+            Boolean indicating if input was successful
+        """
+        locator = self.wait_for_element(locator_type, locator_value)
+        if not locator:
+            return False
+
+        try:
+            _run(self._type(locator, str(text), clear_first))
+            return True
+        except Exception as e:
+            self.logger.error(f"Error inputting text: {str(e)}")
+            return False
+
+    async def _type(self, locator, text, clear_first):
+        """Type text into an element (or pick the option of a select)"""
+        if await locator.evaluate("element => element.tagName") == 'SELECT':
+            try:
+                await locator.select_option(label=text)
+            except PlaywrightError:
+                await locator.select_option(value=text)
+        elif clear_first:
+            await locator.fill(text)
+        else:
+            await locator.press_sequentially(text)
+
+    @timed('browser.fill_fields')
+    def fill_fields(self, fields):
+        """
+        Set several form fields in a single script call
+
+        Args:
+            fields: List of (locator_type, locator_value, text) tuples; locator types
+                other than XPATH, CSS_SELECTOR, ID, NAME, CLASS_NAME and TAG_NAME are
+                not supported
+
+        Returns:
+            List with the value each field holds afterwards (the visible option
+            text for selects, None for fields that were not found), or None if
+            the script failed
+        """
+        if not self.page:
+            return None
+
+        try:
+            return _run(self.page.evaluate(
+                "function () {" + FILL_FIELDS_SCRIPT + "}",
+                [[locator_type, locator_value, str(text)] for locator_type, locator_value, text in fields]
+            ))
+        except Exception as e:
+            self.logger.error(f"Error filling fields: {str(e)}")
+            return None
+
+    @timed('browser.get_text')
+    def get_text(self, locator_type, locator_value):
+        """
+        Get text from an element
+
+        Args:
+            locator_type: Type of locator (e.g., By.ID, By.XPATH)
+            locator_value: Value of the locator
+
+        Returns:
+            Text of the element if found, empty string otherwise
+        """
+        locator = self.wait_for_element(locator_type, locator_value)
+        if not locator:
+            return ""
+
+        try:
+            return _run(locator.inner_text())
+        except Exception as e:
+            self.logger.error(f"Error getting text: {str(e)}")
+            return ""
+
+    def get_text_content(self, locator_type, locator_value):
+        """
+        Get the textContent of an element without waiting for it to be visible
+
+        Args:
+            locator_type: Type of locator (e.g., By.ID, By.XPATH)
+            locator_value: Value of the locator
+
+        Returns:
+            textContent of the first matching element, or None if there is none
+        """
+        if not self.page:
+            return None
+
+        async def read():
+            element = await self.page.query_selector(_selector(locator_type, locator_value))
+            if not element:
+                return None
+            return await element.text_content() or ''
+        return _run(read())
+
+    @timed('browser.execute_script')
+    def execute_script(self, script, *args):
+        """
+        Execute JavaScript on the page
+
+        Args:
+            script: JavaScript function body, as for Selenium ('return ...', arguments[i])
+            *args: JSON-serializable arguments to pass to the script
+
+        Returns:
+            Result of the script execution, or None if there was an error
+        """
+        if not self.page:
+            return None
+
+        try:
+            # Runs the Selenium-style body with the arguments as its 'arguments'
+            wrapper = "function (args) { return (function () {\n" + script + "\n}).apply(null, args); }"
+            return _run(self.page.evaluate(wrapper, list(args)))
+        except Exception as e:
+            self.logger.error(f"Error executing script: {str(e)}")
+            return None
+
+    def get_cookies(self):
+        """
+        Get the cookies of the current session
+
+        Returns:
+            List of cookie dictionaries in Selenium's format, so cookie jars work
+            with either backend and the HTTP fast path
+        """
+        if not self.context:
+            return []
+
+        cookies = []
+        for cookie in _run(self.context.cookies()):
+            item = {
+                'name': cookie['name'],
+                'value': cookie['value'],
+                'domain': cookie.get('domain', ''),
+                'path': cookie.get('path', '/'),
+                'secure': cookie.get('secure', False),
+                'httpOnly': cookie.get('httpOnly', False)
+            }
+            if cookie.get('expires', -1) > 0:
+                item['expiry'] = int(cookie['expires'])
+            if cookie.get('sameSite'):
+                item['sameSite'] = cookie['sameSite']
+            cookies.append(item)
+        return cookies
+
+    @timed('browser.take_screenshot')
+    def take_screenshot(self, file_path, kind='step'):
+        """
+        Take a screenshot of the current page if the screenshot policy allows it
+
+        Args:
+            file_path: Path to save the screenshot; a bare file name is placed
+                in the configured screenshot directory
+            kind: Kind of screenshot: 'step', 'save' or 'failure'
+
+        Returns:
+            Boolean indicating if screenshot was taken successfully
+        """
+        if not self.page or not self._wants_screenshot(kind):
+            return False
+
+        try:
+            return self._submit_screenshot(file_path, _run(self.page.screenshot()))
+        except Exception as e:
+            self.logger.error(f"Error taking screenshot: {str(e)}")
+            return False
+
+    def begin_wait(self, condition):
+        """
+        Capture the page state a condition needs before the triggering action
+
+        Args:
+            condition: Condition dictionary (or list of them) from the configuration
+
+        Returns:
+            Dictionary with the captured state
+        """
+        state = {'url': None, 'anchors': {}}
+        if not self.page or not condition:
+            return state
+
+        try:
+            state['url'] = self.page.url
+            for index, item in enumerate(self._condition_list(condition)):
+                if item.get('type') == 'rows_rendered' and item.get('locator'):
+                    state['anchors'][index] = _run(self.page.query_selector(_config_selector(item['locator'])))
+        except Exception as e:
+            self.logger.warning(f"Could not capture page state before wait: {str(e)}")
+        return state
+
+    def wait_for_condition(self, condition, state=None):
+        """
+        Wait until a readiness condition (or all conditions in a list) holds
+
+        Args:
+            condition: Condition dictionary, e.g. {"type": "visible", "locator": {...}},
+                or a list of such dictionaries; each may set its own "timeout"
+            state: State captured by begin_wait before the triggering action
+
+        Returns:
+            Boolean indicating if the page became ready before the timeout
+        """
+        if not self.page:
+            return False
+        if not condition:
+            return True
+
+        state = state or {'url': None, 'anchors': {}}
+        for index, item in enumerate(self._condition_list(condition)):
+            if not self._wait_for_single_condition(item, state.get('url'), state['anchors'].get(index)):
+                return False
+        return True
+
+    def _wait_for_single_condition(self, condition, previous_url, anchor):
+        """
+        Wait for one readiness condition
+
+        Args:
+            condition: Condition dictionary
+            previous_url: URL before the triggering action (for 'url_changed')
+            anchor: First row element before the triggering action (for 'rows_rendered')
+
+        Returns:
+            Boolean indicating if the condition was met before the timeout
+        """
+        condition_type = condition.get('type', 'ready_state')
+        timeout = condition.get('timeout', self.timeout)
+
+        if condition_type == 'none':
+            return True
+        if condition_type == 'sleep':
+            recorder.sleep(condition.get('seconds', 0), 'browser.wait_sleep')
+            return True
+        if condition_type not in WAIT_CONDITIONS:
+            self.logger.error(f"Unknown wait condition: {condition_type}")
+            return False
+
+        try:
+            with recorder.span(f"browser.wait_{condition_type}", WAIT):
+                _run(self._until_condition(condition_type, condition, previous_url, anchor, timeout * 1000))
+            return True
+        except PlaywrightTimeoutError:
+            self.logger.warning(f"Timeout waiting for condition: {condition}")
+            return False
+        except Exception as e:
+            self.logger.error(f"Error waiting for condition {condition}: {str(e)}")
+            return False
+
+    async def _until_condition(self, condition_type, condition, previous_url, anchor, timeout):
+        """Wait until a (non-sleep) condition holds; raises PlaywrightTimeoutError otherwise"""
+        page = self.page
+        if condition_type == 'ready_state':
+            await page.wait_for_function("document.readyState === 'complete'", timeout=timeout)
+        elif condition_type == 'url_changed':
+            await page.wait_for_url(lambda url: url != previous_url, wait_until='commit', timeout=timeout)
+        elif condition_type == 'url_contains':
+            value = condition.get('value', '')
+            await page.wait_for_url(lambda url: value in url, wait_until='commit', timeout=timeout)
+        else:
+            locator = page.locator(_config_selector(condition.get('locator', {}))).first
+            if condition_type == 'visible':
+                await locator.wait_for(state='visible', timeout=timeout)
+            elif condition_type == 'spinner_gone':
+                await locator.wait_for(state='hidden', timeout=timeout)
+            elif condition_type == 'rows_rendered':
+                if anchor is not None:
+                    try:
+                        await page.wait_for_function("element => !element.isConnected", arg=anchor, timeout=timeout)
+                    except PlaywrightTimeoutError:
+                        raise
+                    except PlaywrightError:
+                        pass  # The page navigated away, so the old rows are gone
+                await locator.wait_for(state='attached', timeout=timeout)
+
+    def load_cookies(self, file_path=None):
+        """
+        Load cookies from a JSON cookie jar into the current session
+
+        Args:
+            file_path: Path of the cookie jar (defaults to browser.cookie_file)
+
+        Returns:
+            Boolean indicating if cookies were loaded
+        """
+        file_path = file_path or self.cookie_file
+        if not self.context or not file_path:
+            return False
+        return _run(self._load_cookies(file_path))
+
+    async def _load_cookies(self, file_path):
+        """Add the cookies of a Selenium-format cookie jar to the context"""
+        if not os.path.exists(file_path):
+            return False
+
+        try:
+            with open(file_path, 'r') as f:
+                cookies = json.load(f)
+
+            context_cookies = []
+            for cookie in cookies:
+                item = {
+                    'name': cookie['name'],
+                    'value': cookie['value'],
+                    'domain': cookie.get('domain', ''),
+                    'path': cookie.get('path', '/'),
+                    'secure': cookie.get('secure', False),
+                    'httpOnly': cookie.get('httpOnly', False)
+                }
+                if 'expiry' in cookie:
+                    item['expires'] = cookie['expiry']
+                if cookie.get('sameSite') in ('Strict', 'Lax', 'None'):
+                    item['sameSite'] = cookie['sameSite']
+                context_cookies.append(item)
+
+            await self.context.add_cookies(context_cookies)
+            self.logger.info(f"Loaded {len(context_cookies)} cookies from {file_path}")
+            return True
+        except Exception as e:
+            self.logger.warning(f"Could not load cookies from {file_path}: {str(e)}")
+            return False
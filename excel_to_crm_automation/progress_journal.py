@@ -0,0 +1,160 @@
+"""
+Progress Journal Module
+
+This module keeps an append-only JSONL journal of invoice state transitions
+(queued, searched, saved, unchanged, failed), so an interrupted run can be resumed with
+only the invoices that were not saved yet.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+
+# States an invoice passes through, in order
+STATES = ('queued', 'searched', 'saved', 'unchanged', 'failed')
+
+# States after which an invoice with the same data does not have to be processed again
+DONE_STATES = ('saved', 'unchanged')
+
+
+def invoice_fingerprint(invoice_data):
+    """
+    Fingerprint the data of an invoice
+
+    A saved invoice is only skipped on resume if its data did not change since.
+
+    Args:
+        invoice_data: Dictionary with invoice data as returned by ExcelProcessor.process_file
+
+    Returns:
+        Hex digest of the invoice data
+    """
+    payload = json.dumps(invoice_data, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class ProgressJournal:
+    def __init__(self, path):
+        """
+        Open (or create) the journal for appending
+
+        Args:
+            path: Path of the JSONL journal file
+        """
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+        # Terminate a line left half-written by a crash so new entries start on their own line
+        if self._file.tell() > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._file.write('\n')
+
+    def record(self, invoice_number, state, invoice_data=None, error=None):
+        """
+        Append a state transition of one invoice
+
+        Args:
+            invoice_number: Invoice identifier
+            state: One of STATES
+            invoice_data: Optional invoice data, fingerprinted for 'saved' and 'unchanged' entries
+            error: Optional error message for 'failed' entries
+        """
+        self.record_many([invoice_number], state, invoice_data=invoice_data, error=error)
+
+    def record_many(self, invoice_numbers, state, invoice_data=None, error=None):
+        """
+        Append the same state transition for several invoices with a single sync
+
+        Args:
+            invoice_numbers: Iterable of invoice identifiers
+            state: One of STATES
+            invoice_data: Optional invoice data, fingerprinted for 'saved' and 'unchanged' entries
+            error: Optional error message for 'failed' entries
+        """
+        if state not in STATES:
+            raise ValueError(f"Unknown journal state: {state}")
+
+        timestamp = time.time()
+        fingerprint = invoice_fingerprint(invoice_data) if invoice_data is not None else None
+
+        lines = []
+        for invoice_number in invoice_numbers:
+            entry = {'invoice_number': str(invoice_number), 'state': state, 'timestamp': timestamp}
+            if fingerprint:
+                entry['fingerprint'] = fingerprint
+            if error:
+                entry['error'] = error
+            lines.append(json.dumps(entry) + '\n')
+
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(''.join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def load(self):
+        """
+        Read the last recorded entry of every invoice
+
+        A partially written last line (e.g. after a crash) is ignored.
+
+        Returns:
+            Dictionary mapping invoice numbers to their last journal entry
+        """
+        last_entries = {}
+        if not os.path.exists(self.path):
+            return last_entries
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    self.logger.warning(f"Ignoring unreadable journal line {line_number} in {self.path}")
+                    continue
+                last_entries[entry['invoice_number']] = entry
+        return last_entries
+
+    def pending_invoices(self, invoice_data_list, only_failed=False, last_entries=None):
+        """
+        Rebuild the work list from the journal
+
+        Args:
+            invoice_data_list: List of dictionaries from ExcelProcessor.process_file
+            only_failed: Boolean indicating if only invoices whose last state is
+                'failed' should be returned
+            last_entries: Optional result of load(), so batches of a streamed file
+                do not read the journal again
+
+        Returns:
+            List of the invoice dictionaries that still have to be processed
+        """
+        if last_entries is None:
+            last_entries = self.load()
+        pending = []
+        for invoice_data in invoice_data_list:
+            entry = last_entries.get(str(invoice_data.get('invoice_number')))
+            if only_failed:
+                if entry and entry['state'] == 'failed':
+                    pending.append(invoice_data)
+            elif not (entry and entry['state'] in DONE_STATES and entry.get('fingerprint') == invoice_fingerprint(invoice_data)):
+                pending.append(invoice_data)
+        return pending
+
+    def close(self):
+        """Close the journal file"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
@@ -0,0 +1,174 @@
+"""
+Rate Controller Module
+
+This module adapts the number of active workers and the pause between invoices
+to the CRM's response latency and error rate (additive increase, multiplicative
+decrease), within configured limits and a time-of-day schedule, so the automation
+does not overload the shared CRM.
+"""
+import logging
+import threading
+from datetime import datetime
+from collections import deque
+
+from timing import recorder
+
+
+class RateController:
+    def __init__(self, config=None, max_workers=1, initial_delay=None):
+        """
+        Initialize the rate controller
+
+        Args:
+            config: Dictionary containing configuration options; the 'rate_control'
+                section holds the limits, the AIMD parameters and the schedule (with
+                enabled set to false all workers run with a fixed delay)
+            max_workers: Number of workers that exist (the ceiling can only be lower)
+            initial_delay: Optional pause between invoices to start with, in seconds
+        """
+        rate_config = (config or {}).get('rate_control', {})
+        self.enabled = rate_config.get('enabled', True)
+        self.logger = logging.getLogger(__name__)
+
+        self.min_workers = max(1, rate_config.get('min_workers', 1))
+        self.max_workers = max(self.min_workers, min(max_workers, rate_config.get('max_workers', max_workers)))
+        self.min_delay = rate_config.get('min_delay', 0.0)
+        self.max_delay = rate_config.get('max_delay', 10.0)
+        self.delay_step = rate_config.get('delay_step', 0.25)
+        self.decrease_factor = rate_config.get('decrease_factor', 0.5)
+        self.window = rate_config.get('window', 10)
+        self.error_threshold = rate_config.get('error_threshold', 0.2)
+        self.latency_factor = rate_config.get('latency_factor', 1.5)
+        self.baseline_smoothing = rate_config.get('baseline_smoothing', 0.2)
+        self.target_latency = rate_config.get('target_latency', 0)
+        self.schedule = rate_config.get('schedule', [])
+
+        # Start at the floor and grow while the CRM stays healthy
+        self.active_workers = self.min_workers if self.enabled else self.max_workers
+        self.delay = initial_delay if initial_delay is not None else rate_config.get('initial_delay', self.min_delay)
+
+        self._observations = deque(maxlen=self.window)
+        self._baseline_latency = None
+        self._workers = set()
+        self._condition = threading.Condition()
+
+    def _limits(self):
+        """
+        Get the limits that apply right now
+
+        Returns:
+            Tuple (min_workers, max_workers, min_delay) after applying the schedule
+        """
+        min_workers, max_workers, min_delay = self.min_workers, self.max_workers, self.min_delay
+        now = datetime.now().strftime('%H:%M')
+        for entry in self.schedule:
+            start, end = entry.get('start', '00:00'), entry.get('end', '24:00')
+            in_window = start <= now < end if start <= end else (now >= start or now < end)
+            if in_window:
+                max_workers = max(1, min(max_workers, entry.get('max_workers', max_workers)))
+                min_workers = min(min_workers, max_workers)
+                min_delay = max(min_delay, entry.get('min_delay', min_delay))
+        return min_workers, max_workers, min_delay
+
+    def observe(self, latency, success, path='browser'):
+        """
+        Record the outcome of one invoice attempt and adjust once a window is full
+
+        Args:
+            latency: Duration of the attempt in seconds
+            success: Boolean indicating if the attempt succeeded
+            path: Where the attempt was handled ('browser', 'http' or 'cache', see
+                CRMAutomator.last_attempt_path); only browser attempts are counted, as
+                HTTP submits and cache skips take a fraction of their time
+        """
+        if not self.enabled or path != 'browser':
+            return
+        with self._condition:
+            self._observations.append((latency, bool(success)))
+            if len(self._observations) < self.window:
+                return
+
+            latencies = [item[0] for item in self._observations]
+            mean_latency = sum(latencies) / len(latencies)
+            error_rate = sum(1 for item in self._observations if not item[1]) / len(self._observations)
+            self._observations.clear()
+
+            congested = (
+                error_rate > self.error_threshold
+                or (self._baseline_latency is not None and mean_latency > self._baseline_latency * self.latency_factor)
+                or (self.target_latency and mean_latency > self.target_latency)
+            )
+
+            # The baseline is a moving average of the windows without too many errors, so
+            # an unusually fast window cannot make every later one look congested
+            if self._baseline_latency is None:
+                self._baseline_latency = mean_latency
+            elif error_rate <= self.error_threshold:
+                self._baseline_latency += self.baseline_smoothing * (mean_latency - self._baseline_latency)
+            self._adjust(congested, mean_latency, error_rate)
+            self._condition.notify_all()
+
+    def _adjust(self, congested, mean_latency, error_rate):
+        """Apply the AIMD step (called with the condition held)"""
+        min_workers, max_workers, min_delay = self._limits()
+        workers, delay = self.active_workers, self.delay
+
+        if congested:
+            workers = max(min_workers, int(workers * self.decrease_factor))
+            delay = min(self.max_delay, max(delay / self.decrease_factor, self.delay_step))
+        else:
+            workers = min(max_workers, workers + 1)
+            delay = max(min_delay, delay - self.delay_step)
+
+        # The schedule may have changed the limits since the last adjustment
+        workers = min(max(workers, min_workers), max_workers)
+        delay = max(delay, min_delay)
+
+        if (workers, delay) != (self.active_workers, self.delay):
+            self.logger.info(
+                f"{'Backing off' if congested else 'Speeding up'}: {workers} workers, {delay:.2f}s between invoices "
+                f"(latency {mean_latency:.2f}s, errors {error_rate:.0%})"
+            )
+        self.active_workers, self.delay = workers, delay
+
+    def wait_turn(self, worker_id, stop=None):
+        """
+        Block a worker while it is not among the active workers
+
+        The workers that are ready (logged in) are ranked by their index; the
+        first active_workers of them run.
+
+        Args:
+            worker_id: Index of the worker
+            stop: Optional callable; waiting ends when it returns True
+
+        Returns:
+            Boolean indicating if the worker may continue (False when stopped)
+        """
+        with self._condition:
+            self._workers.add(worker_id)
+            while True:
+                _, max_workers, _ = self._limits()
+                rank = sorted(self._workers).index(worker_id)
+                if rank < min(self.active_workers, max_workers):
+                    return True
+                if stop and stop():
+                    return False
+                self._condition.wait(1.0)
+
+    def leave(self, worker_id):
+        """
+        Remove a worker that stopped, so a parked worker can take its place
+
+        Args:
+            worker_id: Index of the worker
+        """
+        with self._condition:
+            self._workers.discard(worker_id)
+            self._condition.notify_all()
+
+    def pace(self):
+        """Pause between two invoices of a worker for the current delay"""
+        _, _, min_delay = self._limits()
+        recorder.sleep(max(self.delay, min_delay), 'rate.pace')
+
@@ -0,0 +1,239 @@
+"""
+Reader Engines Module
+
+This module reads Excel workbooks and CSV/TSV exports into pandas DataFrames
+through interchangeable engines (calamine, openpyxl or xlrd for Excel; pyarrow or
+pandas' C parser for text files) and picks the fastest one that is installed.
+Every engine returns the same normalized frame for the same file.
+"""
+import os
+import logging
+import importlib.util
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+
+# Engines for each file extension, fastest first
+ENGINE_PREFERENCE = {
+    '.xlsx': ('calamine', 'openpyxl'),
+    '.xlsm': ('calamine', 'openpyxl'),
+    '.xls': ('calamine', 'xlrd'),
+    '.csv': ('pyarrow', 'c'),
+    '.tsv': ('pyarrow', 'c')
+}
+
+SUPPORTED_EXTENSIONS = tuple(ENGINE_PREFERENCE)
+
+# Field delimiters of the text formats
+DELIMITERS = {'.csv': ',', '.tsv': '\t'}
+
+# Text pandas reads as a missing value by default
+NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+]
+
+# Text pandas reads as booleans
+TRUE_VALUES = ['True', 'TRUE', 'true']
+FALSE_VALUES = ['False', 'FALSE', 'false']
+
+logger = logging.getLogger(__name__)
+
+
+def _pandas_version():
+    """Get the pandas major and minor version"""
+    return tuple(int(part) for part in pd.__version__.split('.')[:2])
+
+
+def normalize_frame(frame):
+    """
+    Normalize a frame read by any engine
+
+    Args:
+        frame: DataFrame as returned by an engine (or read back from the parse cache)
+
+    Returns:
+        The frame with a default index and NaN (not None) as the missing value of
+        object columns
+    """
+    if not isinstance(frame.index, pd.RangeIndex) or frame.index.start != 0 or frame.index.step != 1:
+        frame = frame.reset_index(drop=True)
+    for position in range(frame.shape[1]):
+        column = frame.iloc[:, position]
+        if column.dtype == object and column.isna().any():
+            frame.isetitem(position, column.where(column.notna(), np.nan))
+    return frame
+
+
+class ReaderEngine(ABC):
+    # Name used in ENGINE_PREFERENCE and the excel.engine setting
+    name = None
+
+    @abstractmethod
+    def available(self):
+        """
+        Check if the libraries the engine needs are installed
+
+        Returns:
+            Boolean indicating if the engine can be used
+        """
+
+    @abstractmethod
+    def read(self, file_path, **options):
+        """
+        Read the first worksheet (or the whole text file)
+
+        Args:
+            file_path: Path to the file
+            **options: pandas reader options: usecols (column positions), header,
+                names, dtype and nrows
+
+        Returns:
+            DataFrame
+        """
+
+    def read_headers(self, file_path):
+        """
+        Get the column names without reading the rows
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            List of column names, as pandas names them
+        """
+        return list(self.read(file_path, nrows=0).columns)
+
+
+class PandasExcelEngine(ReaderEngine):
+    def __init__(self, name, module, min_pandas=None):
+        """
+        Initialize an Excel engine of pandas.read_excel
+
+        Args:
+            name: pandas engine name
+            module: Module the engine needs
+            min_pandas: Optional (major, minor) pandas version that added the engine
+        """
+        self.name = name
+        self.module = module
+        self.min_pandas = min_pandas
+
+    def available(self):
+        if self.min_pandas and _pandas_version() < self.min_pandas:
+            return False
+        return importlib.util.find_spec(self.module) is not None
+
+    def read(self, file_path, **options):
+        return pd.read_excel(file_path, engine=self.name, **options)
+
+
+class PandasCsvEngine(ReaderEngine):
+    name = 'c'
+
+    def available(self):
+        return True
+
+    def read(self, file_path, **options):
+        delimiter = DELIMITERS[os.path.splitext(file_path)[1].lower()]
+        return pd.read_csv(file_path, sep=delimiter, engine='c', **options)
+
+
+class ArrowCsvEngine(ReaderEngine):
+    name = 'pyarrow'
+
+    def available(self):
+        return importlib.util.find_spec('pyarrow') is not None
+
+    def read_headers(self, file_path):
+        # The header row alone is cheapest with the C parser
+        return ENGINES['c'].read_headers(file_path)
+
+    def read(self, file_path, **options):
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+
+        nrows = options.pop('nrows', None)
+        if nrows is not None:
+            return ENGINES['c'].read(file_path, nrows=nrows, **options)
+
+        # Columns are named like pandas names them (e.g. "Supplier.1") and picked by position
+        headers = self.read_headers(file_path)
+        usecols = options.get('usecols')
+        include = [headers[position] for position in usecols] if usecols is not None else headers
+        names = options.get('names') or include
+        column_types = {
+            include[names.index(name)]: pa.string()
+            for name, dtype in (options.get('dtype') or {}).items()
+            if dtype is str and name in names
+        }
+
+        delimiter = DELIMITERS[os.path.splitext(file_path)[1].lower()]
+
+        def read_table(column_types):
+            return pa_csv.read_csv(
+                file_path,
+                read_options=pa_csv.ReadOptions(skip_rows=1, column_names=headers),
+                parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+                convert_options=pa_csv.ConvertOptions(
+                    include_columns=include,
+                    column_types=column_types,
+                    null_values=NA_VALUES,
+                    true_values=TRUE_VALUES,
+                    false_values=FALSE_VALUES,
+                    strings_can_be_null=True
+                )
+            )
+
+        table = read_table(column_types)
+
+        # Arrow recognizes dates and times in text; pandas keeps them as text
+        temporal = {field.name: pa.string() for field in table.schema if pa.types.is_temporal(field.type)}
+        if temporal:
+            table = read_table({**column_types, **temporal})
+
+        frame = table.to_pandas()
+        frame.columns = names
+        return frame
+
+
+# Every engine, by name
+ENGINES = {
+    'calamine': PandasExcelEngine('calamine', 'python_calamine', min_pandas=(2, 2)),
+    'openpyxl': PandasExcelEngine('openpyxl', 'openpyxl'),
+    'xlrd': PandasExcelEngine('xlrd', 'xlrd'),
+    'pyarrow': ArrowCsvEngine(),
+    'c': PandasCsvEngine()
+}
+
+
+def select_engine(file_path, preferred=None):
+    """
+    Pick the reader engine for a file
+
+    Args:
+        file_path: Path to the file; its extension decides the candidate engines
+        preferred: Optional engine name; None or 'auto' picks the fastest installed one
+
+    Returns:
+        ReaderEngine instance
+
+    Raises:
+        ValueError: If the file type is not supported or no engine for it is installed
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    names = ENGINE_PREFERENCE.get(extension)
+    if not names:
+        raise ValueError(f"Unsupported file type: {extension or file_path}")
+
+    if preferred and preferred != 'auto':
+        if preferred in names and ENGINES[preferred].available():
+            return ENGINES[preferred]
+        logger.warning(f"Reader engine '{preferred}' is not available for {extension} files, choosing automatically")
+
+    for name in names:
+        if ENGINES[name].available():
+            return ENGINES[name]
+    raise ValueError(f"No reader engine installed for {extension} files")
@@ -0,0 +1,343 @@
+"""
+Retry Scheduler Module
+
+This module hands out invoices to the sessions of a run and moves failed invoices
+to a delayed queue with jittered exponential backoff, so one flaky booking does not
+stall the batch. A circuit breaker pauses all sessions while the CRM error rate is
+too high.
+"""
+import heapq
+import random
+import time
+import logging
+import threading
+from collections import deque
+
+try:
+    from selenium.common.exceptions import (
+        StaleElementReferenceException,
+        TimeoutException,
+        InvalidSessionIdException,
+        NoSuchWindowException
+    )
+except ImportError:  # Playwright runs need no Selenium; errors are classified by message
+    StaleElementReferenceException = TimeoutException = ()
+    InvalidSessionIdException = NoSuchWindowException = ()
+
+from timing import recorder, SLEEP
+
+
+# Error categories; only the retryable ones are put back into the queue
+NOT_FOUND = 'not_found'
+STALE_ELEMENT = 'stale_element'
+SESSION_EXPIRED = 'session_expired'
+TIMEOUT = 'timeout'
+UNKNOWN = 'unknown'
+
+RETRYABLE_CATEGORIES = (STALE_ELEMENT, SESSION_EXPIRED, TIMEOUT, UNKNOWN)
+
+# Categories that say something about the health of the CRM (a missing booking does not)
+BREAKER_CATEGORIES = (SESSION_EXPIRED, TIMEOUT, UNKNOWN)
+
+
+class InvoiceError(Exception):
+    """Error while processing an invoice, with its error category"""
+
+    def __init__(self, message, category=UNKNOWN):
+        super().__init__(message)
+        self.category = category
+
+
+def classify_error(error):
+    """
+    Classify an error raised while processing an invoice
+
+    Args:
+        error: Exception (or error message)
+
+    Returns:
+        One of NOT_FOUND, STALE_ELEMENT, SESSION_EXPIRED, TIMEOUT or UNKNOWN
+    """
+    if isinstance(error, InvoiceError):
+        return error.category
+    if isinstance(error, StaleElementReferenceException):
+        return STALE_ELEMENT
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException)):
+        return SESSION_EXPIRED
+    if isinstance(error, TimeoutException):
+        return TIMEOUT
+
+    message = str(error).lower()
+    if 'stale element' in message:
+        return STALE_ELEMENT
+    if 'timed out' in message or 'timeout' in message:
+        return TIMEOUT
+    if 'login' in message or 'session' in message:
+        return SESSION_EXPIRED
+    if 'not found' in message:
+        return NOT_FOUND
+    return UNKNOWN
+
+
+class CircuitBreaker:
+    def __init__(self, window=20, error_rate=0.5, cooldown=30):
+        """
+        Initialize the circuit breaker
+
+        Args:
+            window: Number of recent outcomes the error rate is computed over
+            error_rate: Error rate (0-1) at which the breaker opens
+            cooldown: Seconds all sessions pause once the breaker opened
+        """
+        self.window = window
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self.logger = logging.getLogger(__name__)
+        self._outcomes = deque(maxlen=window)
+        self.open_until = 0
+
+    def record(self, success):
+        """
+        Record the outcome of one attempt
+
+        Args:
+            success: Boolean indicating if the attempt succeeded
+        """
+        self._outcomes.append(bool(success))
+        if len(self._outcomes) < self.window or time.time() < self.open_until:
+            return
+
+        failures = self._outcomes.count(False)
+        if failures / len(self._outcomes) >= self.error_rate:
+            self.open_until = time.time() + self.cooldown
+            self._outcomes.clear()
+            self.logger.warning(
+                f"{failures} of the last {self.window} attempts failed, pausing all sessions for {self.cooldown}s"
+            )
+
+    def remaining(self):
+        """
+        Get the remaining pause
+
+        Returns:
+            Seconds until the breaker closes again (0 when closed)
+        """
+        return max(0, self.open_until - time.time())
+
+
+class RetryScheduler:
+    def __init__(self, config=None):
+        """
+        Initialize the retry scheduler
+
+        Args:
+            config: Dictionary containing configuration options; the 'retry' section
+                holds max_attempts, base_delay, max_delay, jitter and circuit_breaker
+        """
+        retry_config = (config or {}).get('retry', {})
+        self.max_attempts = retry_config.get('max_attempts', 3)
+        self.base_delay = retry_config.get('base_delay', 2)
+        self.max_delay = retry_config.get('max_delay', 60)
+        self.jitter = retry_config.get('jitter', 0.5)
+        self.logger = logging.getLogger(__name__)
+
+        breaker_config = retry_config.get('circuit_breaker', {})
+        self.breaker = None
+        if breaker_config.get('enabled', True):
+            self.breaker = CircuitBreaker(
+                window=breaker_config.get('window', 20),
+                error_rate=breaker_config.get('error_rate', 0.5),
+                cooldown=breaker_config.get('cooldown', 30)
+            )
+
+        self._ready = deque()
+        self._delayed = []
+        self._sequence = 0
+        self._in_flight = 0
+        self._input_closed = False
+        self._condition = threading.Condition()
+
+    def backoff_delay(self, attempt):
+        """
+        Compute the delay before the next attempt
+
+        Args:
+            attempt: Number of attempts made so far (1 after the first failure)
+
+        Returns:
+            Delay in seconds: base_delay * 2^(attempt - 1), capped at max_delay,
+            randomized by +/- jitter
+        """
+        delay = min(self.max_delay, self.base_delay * (2 ** max(0, attempt - 1)))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def add(self, item):
+        """
+        Queue an item for its first attempt
+
+        Args:
+            item: Work item (e.g. invoice dictionary)
+        """
+        with self._condition:
+            self._ready.append((item, 1))
+            self._condition.notify()
+
+    def feed(self, items, max_ready=0):
+        """
+        Queue items from an iterable (e.g. a streaming Excel reader) and close the input
+
+        Meant to run in its own thread while the sessions already take items. Reading
+        pauses while max_ready items wait to be taken, so a large file is never held
+        in memory at once; it stops early once drain was called (the item it was
+        holding is still queued, so a second drain returns it).
+
+        Args:
+            items: Iterable of work items
+            max_ready: Maximum number of items waiting in the ready queue (0 for no limit)
+
+        Returns:
+            Number of items queued
+        """
+        count = 0
+        try:
+            for item in items:
+                with self._condition:
+                    while max_ready and len(self._ready) >= max_ready and not self._input_closed:
+                        self._condition.wait()
+                    self._ready.append((item, 1))
+                    count += 1
+                    self._condition.notify_all()
+                    if self._input_closed:
+                        break
+        except Exception as e:
+            self.logger.error(f"Error reading items after {count} were queued: {str(e)}")
+        finally:
+            self.close_input()
+        return count
+
+    def close_input(self):
+        """Signal that no more items will be added"""
+        with self._condition:
+            self._input_closed = True
+            self._condition.notify_all()
+
+    def get(self):
+        """
+        Take the next item to process
+
+        Blocks while only delayed items are waiting or the circuit breaker is open;
+        that time is recorded as sleeping in the timing report.
+
+        Returns:
+            Tuple (item, attempt), or None once all items are finished
+        """
+        started = None
+        with self._condition:
+            while True:
+                self._promote_due()
+                pause = self.breaker.remaining() if self.breaker else 0
+
+                if self._ready and not pause:
+                    self._in_flight += 1
+                    if started:
+                        recorder.record('scheduler.idle', time.perf_counter() - started, SLEEP)
+                    # Wakes a feed waiting for room in the ready queue
+                    self._condition.notify_all()
+                    return self._ready.popleft()
+
+                if not self._ready and not self._delayed and not self._in_flight and self._input_closed:
+                    return None
+
+                timeout = pause or None
+                if self._delayed and not pause:
+                    timeout = max(0, self._delayed[0][0] - time.time())
+                started = started or time.perf_counter()
+                self._condition.wait(timeout)
+
+    def complete(self, item):
+        """
+        Mark an item as finished successfully
+
+        Args:
+            item: Work item returned by get
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if self.breaker:
+                self.breaker.record(True)
+            self._condition.notify_all()
+
+    def defer(self, item, attempt, category):
+        """
+        Mark an attempt as failed and schedule a retry if possible
+
+        Args:
+            item: Work item returned by get
+            attempt: Attempt number returned by get
+            category: Error category from classify_error
+
+        Returns:
+            Boolean indicating if the item was scheduled again; False means it failed for good
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if self.breaker and category in BREAKER_CATEGORIES:
+                self.breaker.record(False)
+
+            retry = category in RETRYABLE_CATEGORIES and attempt < self.max_attempts
+            if retry:
+                due = time.time() + self.backoff_delay(attempt)
+                self._sequence += 1
+                heapq.heappush(self._delayed, (due, self._sequence, item, attempt + 1))
+            self._condition.notify_all()
+            return retry
+
+    def peek(self, count):
+        """
+        Get the items that will be handed out next, without taking them
+
+        Args:
+            count: Maximum number of items
+
+        Returns:
+            List of up to count items that are ready now
+        """
+        with self._condition:
+            self._promote_due()
+            return [item for item, _ in list(self._ready)[:count]]
+
+    def finished(self):
+        """
+        Check if all items are finished
+
+        Returns:
+            Boolean indicating if no item is waiting or in flight and no more will be added
+        """
+        with self._condition:
+            self._promote_due()
+            return self._input_closed and not self._ready and not self._delayed and not self._in_flight
+
+    def drain(self):
+        """
+        Remove all items that were not handed out yet (e.g. when no session is left)
+
+        Also closes the input, so a running feed stops reading.
+
+        Returns:
+            List of the removed items
+        """
+        with self._condition:
+            self._input_closed = True
+            items = [item for item, _ in self._ready]
+            items.extend(entry[2] for entry in sorted(self._delayed))
+            self._ready.clear()
+            self._delayed = []
+            self._condition.notify_all()
+            return items
+
+    def _promote_due(self):
+        """Move delayed items whose backoff has passed to the ready queue"""
+        now = time.time()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, item, attempt = heapq.heappop(self._delayed)
+            self._ready.append((item, attempt))
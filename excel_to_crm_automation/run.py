@@ -13,7 +13,13 @@ import logging
 import traceback
 
 from excel_processor import ExcelProcessor
+from parse_cache import ParseCache
 from crm_automator import CRMAutomator
+from worker_pool import WorkerPool
+from progress_journal import ProgressJournal
+from timing import recorder
+from driver_lifecycle import DriverLifecycle
+from rate_controller import RateController
 
 # Configure logging
 logging.basicConfig(
@@ -31,19 +37,26 @@ def parse_arguments():
     parser = argparse.ArgumentParser(description='Excel to CRM Automation Tool')
     
     parser.add_argument('--excel', '-e', required=True, help='Path to Excel file with invoice data')
+    parser.add_argument('--config', default='config.json', help='Path to the configuration file (default: config.json)')
     parser.add_argument('--headless', action='store_true', help='Run browser in headless mode')
     parser.add_argument('--column-mapping', help='Custom column mapping (JSON format)')
-    parser.add_argument('--delay', type=float, default=1.0, help='Delay in seconds between actions (default: 1.0)')
+    parser.add_argument('--delay', type=float, help='Initial pause in seconds between invoices; adapted to the CRM load afterwards (default: rate_control.initial_delay from config.json)')
     parser.add_argument('--username', help='Username for CRM login')
     parser.add_argument('--password', help='Password for CRM login')
     parser.add_argument('--no-login', action='store_true', help='Skip login (use if already logged in)')
+    parser.add_argument('--crawl-index', action='store_true', help='Crawl the Bookings List into the local booking index before updating')
+    parser.add_argument('--workers', type=int, default=1, help='Number of parallel browser sessions (default: 1, requires credentials if more)')
+    parser.add_argument('--journal', help='Path of the progress journal (default: journal.path from config.json)')
+    parser.add_argument('--resume', action='store_true', help='Skip invoices the progress journal records as saved with unchanged data')
+    parser.add_argument('--only-failed', action='store_true', help='Only process invoices the progress journal records as failed')
+    parser.add_argument('--timing-report', help='Path of the JSON latency report (default: timing.report_path from config.json)')
+    parser.add_argument('--stream', action='store_true', help='Read the Excel file row by row and start updating while it is still being read (default: excel.stream from config.json)')
+    parser.add_argument('--page-load-strategy', choices=['normal', 'eager', 'none'], help='Page load strategy (default: browser.page_load_strategy from config.json)')
     
     return parser.parse_args()
 
-def load_config():
-    """Load configuration from config.json"""
-    config_path = 'config.json'
-    
+def load_config(config_path='config.json'):
+    """Load configuration from a JSON file (config.json by default)"""
     if not os.path.exists(config_path):
         logger.error(f"Configuration file not found: {config_path}")
         sys.exit(1)
@@ -71,102 +84,201 @@ def load_column_mapping(args, config):
         "actual_net_cost": "Actual Net Cost"
     }
 
+def crawl_booking_index(crm_automator, config):
+    """Fill the local booking index from the Bookings List"""
+    max_pages = config.get('crm', {}).get('booking_index', {}).get('crawl_max_pages', 0)
+    logger.info("Crawling the Bookings List into the booking index...")
+    indexed = crm_automator.crawl_booking_list(max_pages=max_pages)
+    logger.info(f"Indexed {indexed} bookings")
+
+def stream_invoices(batches, journal, resume=False, only_failed=False):
+    """Yield the invoices of a streamed Excel file that still have to be processed, journaling them as queued"""
+    last_entries = journal.load() if resume or only_failed else None
+    for batch in batches:
+        if last_entries is not None:
+            batch = journal.pending_invoices(batch, only_failed=only_failed, last_entries=last_entries)
+        if batch:
+            journal.record_many([invoice['invoice_number'] for invoice in batch], 'queued')
+            yield from batch
+
 def main():
     """Main function to run the automation"""
     args = parse_arguments()
-    config = load_config()
+    config = load_config(args.config)
     column_mapping = load_column_mapping(args, config)
     
     logger.info(f"Starting Excel to CRM Automation with file: {args.excel}")
+    recorder.reset()
+    
+    # Kill chromedriver/Chrome processes left behind by crashed runs
+    lifecycle = DriverLifecycle(config)
+    reaped = lifecycle.reap_orphans()
+    if reaped:
+        logger.info(f"Reaped {reaped} stray browser sessions from earlier runs")
     
     # Check if Excel file exists
     if not os.path.exists(args.excel):
         logger.error(f"Excel file not found: {args.excel}")
         sys.exit(1)
     
-    try:
-        # Process Excel file
-        logger.info("Processing Excel file...")
-        excel_processor = ExcelProcessor(args.excel)
-        invoices_data = excel_processor.process_file(column_mapping)
-        
-        if not invoices_data:
-            logger.error("No valid invoice data found in Excel file")
+    crm_config = config.get('crm', {})
+    username = args.username if not args.no_login else None
+    password = args.password if not args.no_login else None
+    
+    if args.workers > 1:
+        # Each worker runs its own browser and has to log in by itself
+        # unless it can reuse a saved session
+        browser_config = config.get('browser', {})
+        has_saved_session = browser_config.get('user_data_dir') or browser_config.get('cookie_file')
+        if not (username and password) and not has_saved_session:
+            logger.error("Parallel workers need --username and --password to log in")
             sys.exit(1)
+    
+    # Launch the browser(s) in the background while the Excel file is parsed
+    pool = None
+    crm_automator = None
+    journal = None
+    if args.workers > 1:
+        pool = WorkerPool(config, workers=args.workers, headless=args.headless, page_load_strategy=args.page_load_strategy)
+        pool.prewarm()
+    else:
+        crm_automator = CRMAutomator(config)
+        crm_automator.start(headless=args.headless, page_load_strategy=args.page_load_strategy, background=True)
+    
+    try:
+        # Every state transition is journaled so an interrupted run can be resumed
+        journal_path = args.journal or config.get('journal', {}).get('path', 'progress_journal.jsonl')
+        journal = ProgressJournal(journal_path)
         
-        logger.info(f"Found {len(invoices_data)} invoices to process")
-        
-        # Initialize CRM automator
-        crm_config = config.get('crm', {})
-        crm_automator = CRMAutomator(crm_config)
+        excel_config = config.get('excel', {})
+        if args.stream or excel_config.get('stream', False):
+            # Invoices are handed to the browser(s) while the rest of the file is read
+            logger.info("Streaming Excel file...")
+            excel_processor = ExcelProcessor(engine=excel_config.get('engine'))
+            batches = excel_processor.iter_invoice_batches(
+                column_mapping,
+                batch_size=excel_config.get('batch_size', 100),
+                file_path=args.excel
+            )
+            invoices_data = stream_invoices(batches, journal, resume=args.resume, only_failed=args.only_failed)
+        else:
+            # Process Excel file
+            logger.info("Processing Excel file...")
+            excel_processor = ExcelProcessor(
+                args.excel,
+                parse_cache=ParseCache(config),
+                column_mapping=column_mapping,
+                engine=excel_config.get('engine')
+            )
+            invoices_data = excel_processor.process_file(column_mapping)
+            
+            if not invoices_data:
+                logger.error("No valid invoice data found in Excel file")
+                sys.exit(1)
+            
+            logger.info(f"Found {len(invoices_data)} invoices in Excel file")
+            
+            if args.resume or args.only_failed:
+                pending = journal.pending_invoices(invoices_data, only_failed=args.only_failed)
+                logger.info(f"Skipping {len(invoices_data) - len(pending)} invoices according to {journal_path}")
+                invoices_data = pending
+                if not invoices_data:
+                    logger.info("Nothing left to process")
+                    return
+            journal.record_many([invoice['invoice_number'] for invoice in invoices_data], 'queued')
+            
+            logger.info(f"Found {len(invoices_data)} invoices to process")
         
-        # Start automation
-        logger.info("Starting browser automation...")
-        crm_automator.start(headless=args.headless)
+        # Paces the invoices and decides how many workers are active, based on CRM latency and errors
+        rate_controller = RateController(config, max_workers=args.workers, initial_delay=args.delay)
         
-        # Handle login if credentials provided
-        if args.username and args.password and not args.no_login:
-            logger.info(f"Logging in with username: {args.username}")
-            if not crm_automator.login_to_crm(args.username, args.password):
-                logger.error("Failed to log in to CRM. Check your credentials.")
+        if pool:
+            if args.crawl_index:
+                # Crawl once with a separate session before the workers start
+                crm_automator = CRMAutomator(config)
+                crm_automator.start(headless=args.headless, page_load_strategy=args.page_load_strategy)
+                if crm_automator.ensure_logged_in(username, password):
+                    crawl_booking_index(crm_automator, config)
+                else:
+                    logger.error("Failed to log in to CRM for crawling the booking index")
                 crm_automator.close()
-                sys.exit(1)
+                crm_automator = None
                 
-            # Navigate to CRM module after login
-            logger.info("Navigating to CRM module")
-            if not crm_automator.navigate_to_crm_module():
-                logger.error("Failed to navigate to CRM module after login")
-                crm_automator.close()
-                sys.exit(1)
+            logger.info(f"Starting browser automation with {args.workers} workers...")
+            results = pool.run(invoices_data, username, password, journal=journal, rate_controller=rate_controller)
         else:
-            # If no login credentials, just navigate to CRM
-            logger.info(f"Navigating to CRM: {crm_config.get('url')}")
-            crm_automator.navigate_to_crm()
-            
-            if not args.no_login:
-                logger.warning("No login credentials provided. You may need to log in manually.")
-                input("Press Enter after logging in manually...")
-        
-        # Process each invoice
-        successful = 0
-        failed = 0
-        
-        for i, invoice_data in enumerate(invoices_data, 1):
-            invoice_id = invoice_data.get('invoice_number', 'Unknown')
-            logger.info(f"Processing invoice {i}/{len(invoices_data)}: {invoice_id}")
+            # Start automation
+            logger.info("Starting browser automation...")
+            if not crm_automator.wait_until_started():
+                logger.error("Failed to start the browser")
+                sys.exit(1)
             
-            try:
-                # Update invoice in CRM, pass credentials again for re-login if needed
-                result = crm_automator.update_invoice(
-                    invoice_id, 
-                    invoice_data,
-                    username=args.username if not args.no_login else None,
-                    password=args.password if not args.no_login else None
-                )
+            # Reuse the saved session if it is still valid, otherwise log in
+            if crm_automator.is_session_valid():
+                logger.info("Already logged in to CRM")
+            elif username and password:
+                logger.info(f"Logging in with username: {args.username}")
+                if not crm_automator.login_to_crm(args.username, args.password):
+                    logger.error("Failed to log in to CRM. Check your credentials.")
+                    sys.exit(1)
+                    
+                # Navigate to CRM module after login
+                logger.info("Navigating to CRM module")
+                if not crm_automator.navigate_to_crm_module():
+                    logger.error("Failed to navigate to CRM module after login")
+                    sys.exit(1)
+            else:
+                # If no login credentials, just navigate to CRM
+                logger.info(f"Navigating to CRM: {crm_config.get('url')}")
+                crm_automator.navigate_to_crm()
                 
-                if result:
-                    logger.info(f"Successfully updated invoice: {invoice_id}")
-                    successful += 1
-                else:
-                    logger.error(f"Failed to update invoice: {invoice_id}")
-                    failed += 1
-            except Exception as e:
-                logger.error(f"Error updating invoice {invoice_id}: {str(e)}")
-                failed += 1
+                if not args.no_login:
+                    logger.warning("No login credentials provided. You may need to log in manually.")
+                    input("Press Enter after logging in manually...")
+                    crm_automator.save_session()
+            
+            if args.crawl_index:
+                crawl_booking_index(crm_automator, config)
+            
+            # Process each invoice, passing credentials again for re-login if needed
+            results = crm_automator.update_multiple_invoices(
+                invoices_data,
+                username=username,
+                password=password,
+                login=False,
+                journal=journal,
+                rate_controller=rate_controller
+            )
         
-        # Close browser
-        crm_automator.close()
+        successful = sum(1 for result in results.values() if result.get('success'))
+        unchanged = sum(1 for result in results.values() if result.get('status') == 'unchanged')
+        failed = len(results) - successful
         
         # Summary
         logger.info("Automation completed!")
-        logger.info(f"Total invoices: {len(invoices_data)}")
-        logger.info(f"Successfully updated: {successful}")
+        logger.info(f"Total invoices: {len(results)}")
+        logger.info(f"Successfully updated: {successful - unchanged}")
+        logger.info(f"Unchanged (save skipped): {unchanged}")
         logger.info(f"Failed: {failed}")
         
+        # Per-step latency report, also written as JSON for dashboards
+        report_path = args.timing_report or config.get('timing', {}).get('report_path', 'timing_report.json')
+        logger.info("Step timings (seconds):\n" + recorder.format_report(recorder.write_report(report_path)))
+        logger.info(f"Timing report written to {report_path}")
+        
     except Exception as e:
         logger.error(f"Automation failed: {str(e)}")
         logger.debug(traceback.format_exc())
         sys.exit(1)
+    finally:
+        # Close browser(s), including pre-warmed ones that were never used
+        if crm_automator:
+            crm_automator.close()
+        if pool:
+            pool.close()
+        if journal:
+            journal.close()
+        lifecycle.reap_orphans(include_own=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -13,6 +13,7 @@ import traceback
 import logging
 
 from excel_processor import ExcelProcessor
+from parse_cache import ParseCache
 from crm_automator import CRMAutomator
 
 # Configure logging
@@ -70,10 +71,6 @@ def main():
                 }
             }
         
-        # Process Excel file
-        logger.info(f"Processing Excel file: {args.excel}")
-        excel_processor = ExcelProcessor(args.excel)
-        
         # Get column mapping from config or use defaults
         column_mapping = config.get('excel', {}).get('column_mapping', {})
         if not column_mapping:
@@ -84,6 +81,15 @@ def main():
                 'actual_net_cost': 'Actual Net Cost'
             }
         
+        # Process Excel file, reading only the mapped columns
+        logger.info(f"Processing Excel file: {args.excel}")
+        excel_processor = ExcelProcessor(
+            args.excel,
+            parse_cache=ParseCache(config),
+            column_mapping=column_mapping,
+            engine=config.get('excel', {}).get('engine')
+        )
+        
         # Get invoice data from Excel
         invoices = excel_processor.process_file(column_mapping)
         if not invoices:
@@ -0,0 +1,67 @@
+"""
+Screenshot Writer Module
+
+This module writes screenshots to disk on a background thread, so capturing
+a screenshot does not block the automation on disk I/O.
+"""
+import os
+import queue
+import logging
+import threading
+
+
+class ScreenshotWriter:
+    def __init__(self, max_pending=100):
+        """
+        Initialize the screenshot writer
+
+        Args:
+            max_pending: Maximum number of screenshots waiting to be written;
+                further screenshots are dropped instead of blocking the automation
+        """
+        self.logger = logging.getLogger(__name__)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="screenshot-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, file_path, png_data):
+        """
+        Queue a screenshot for writing
+
+        Args:
+            file_path: Path to save the screenshot
+            png_data: PNG bytes as returned by get_screenshot_as_png
+
+        Returns:
+            Boolean indicating if the screenshot was queued
+        """
+        try:
+            self._queue.put_nowait((file_path, png_data))
+            return True
+        except queue.Full:
+            self.logger.warning(f"Screenshot queue is full, dropping {file_path}")
+            return False
+
+    def _run(self):
+        """Write queued screenshots until a stop marker is received"""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                file_path, png_data = item
+                directory = os.path.dirname(file_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(file_path, 'wb') as f:
+                    f.write(png_data)
+            except Exception as e:
+                self.logger.error(f"Error writing screenshot: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def close(self):
+        """Write all pending screenshots and stop the writer thread"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
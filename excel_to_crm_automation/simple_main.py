@@ -28,7 +28,7 @@ app.secret_key = os.environ.get("FLASK_SECRET_KEY", "development_key")
 
 # Configuration
 UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
+ALLOWED_EXTENSIONS = {'xlsx', 'xls', 'csv', 'tsv'}
 
 # Ensure upload folder exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -91,7 +91,7 @@ def upload_file():
             
             return redirect(url_for('excel_details'))
         else:
-            flash('Invalid file type. Please upload an Excel file (.xlsx or .xls)')
+            flash('Invalid file type. Please upload an Excel (.xlsx or .xls) or CSV/TSV file')
             return redirect(request.url)
             
     return render_template('upload.html')
@@ -113,9 +113,11 @@ def excel_details():
         
     try:
         from excel_processor import ExcelProcessor
+        from parse_cache import ParseCache
         
-        # Process Excel file to get column info
-        processor = ExcelProcessor(file_path)
+        # Process Excel file to get column info (parsed once, then read from the parse cache)
+        config = load_config()
+        processor = ExcelProcessor(file_path, parse_cache=ParseCache(config), engine=config.get('excel', {}).get('engine'))
         columns = processor.get_column_names()
         row_count = processor.get_row_count()
         
@@ -151,10 +153,12 @@ def map_columns():
         
     try:
         from excel_processor import ExcelProcessor
+        from parse_cache import ParseCache
         
-        # Process Excel file to get column info
-        processor = ExcelProcessor(file_path)
-        columns = processor.get_column_names()
+        # Only the header row is needed to map the columns
+        config = load_config()
+        processor = ExcelProcessor(parse_cache=ParseCache(config), engine=config.get('excel', {}).get('engine'))
+        columns = processor.probe_headers(file_path)
         
         if request.method == 'POST':
             # Get column mapping from form
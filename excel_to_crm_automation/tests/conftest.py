@@ -0,0 +1,30 @@
+"""
+Shared test fixtures
+
+The modules are imported flat, the way run.py imports them.
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def mock_crm_url():
+    """Run the mock CRM with 30 bookings on a free local port and yield its base URL"""
+    from werkzeug.serving import make_server
+    import mock_crm as server
+
+    server.seed_bookings(30)
+    server.configure()
+    httpd = make_server('127.0.0.1', 0, server.app, threaded=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_port}"
+    finally:
+        httpd.shutdown()
+        thread.join()
@@ -0,0 +1,65 @@
+"""Tests for CRMAutomator on each browser backend against the mock CRM"""
+import os
+import json
+import time
+
+import pytest
+
+import mock_crm
+from benchmark import mock_config, SCRIPT_DIR
+from crm_automator import CRMAutomator
+
+# Library each backend needs, besides a browser it can start
+BACKEND_MODULES = {
+    'selenium': 'webdriver_manager',
+    'playwright': 'playwright'
+}
+
+
+@pytest.fixture(params=sorted(BACKEND_MODULES))
+def automator(request, mock_crm_url, tmp_path):
+    """Started CRMAutomator for each backend, pointed at the mock CRM"""
+    pytest.importorskip(BACKEND_MODULES[request.param])
+
+    with open(os.path.join(SCRIPT_DIR, 'config.json'), 'r') as f:
+        config = mock_config(json.load(f), mock_crm_url, str(tmp_path), backend=request.param)
+    # Submissions must go through the browser
+    config['crm']['http_fast_path']['enabled'] = False
+
+    automator = CRMAutomator(config)
+    if not automator.start(headless=True):
+        automator.close()
+        pytest.skip(f"No browser available for the {request.param} backend")
+    try:
+        yield automator
+    finally:
+        automator.close()
+
+
+def test_updates_invoice(automator):
+    assert automator.login_to_crm(mock_crm.MOCK_USERNAME, mock_crm.MOCK_PASSWORD)
+
+    assert automator.update_invoice('1005', {'supplier': 'Emirates', 'actual_net_cost': '250.5'})
+
+    with mock_crm.BOOKINGS_LOCK:
+        booking = dict(mock_crm.BOOKINGS[5])
+    assert booking['supplier'] == 'Emirates'
+    assert float(booking['actual_net']) == 250.5
+
+
+def test_skips_unchanged_invoice(automator):
+    automator.compare_enabled = True
+    assert automator.login_to_crm(mock_crm.MOCK_USERNAME, mock_crm.MOCK_PASSWORD)
+    assert automator.process_invoice('1006', {'supplier': 'Qatar Airways', 'actual_net_cost': '80'}) == 'updated'
+
+    assert automator.process_invoice('1006', {'supplier': 'Qatar Airways', 'actual_net_cost': '80'}) == 'unchanged'
+
+
+def test_missing_invoice_fails_without_waiting_for_timeout(automator):
+    assert automator.login_to_crm(mock_crm.MOCK_USERNAME, mock_crm.MOCK_PASSWORD)
+
+    started = time.time()
+    assert automator.process_invoice('9999', {'supplier': 'Emirates', 'actual_net_cost': '10'}, max_retries=1) == 'failed'
+
+    # The empty results table ends the after_search wait
+    assert time.time() - started < automator.browser.timeout
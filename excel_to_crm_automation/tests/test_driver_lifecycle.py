@@ -0,0 +1,58 @@
+"""Tests for reaping driver processes of runs that ended"""
+import os
+import json
+import subprocess
+import sys
+
+import pytest
+
+import driver_lifecycle
+from driver_lifecycle import DriverLifecycle
+
+
+def write_pid_file(pid_dir, owner_pid, driver_pid):
+    """Record a driver the way DriverLifecycle.register does"""
+    os.makedirs(pid_dir, exist_ok=True)
+    with open(os.path.join(pid_dir, f"{owner_pid}-{driver_pid}.json"), 'w') as f:
+        json.dump({'owner_pid': owner_pid, 'driver_pid': driver_pid}, f)
+
+
+def ended_pid():
+    """Get the pid of a process that has exited"""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_reused_pid_is_not_killed_without_psutil(tmp_path, monkeypatch):
+    monkeypatch.setattr(driver_lifecycle, 'psutil', None)
+    pid_dir = str(tmp_path / 'pids')
+    # The recorded driver pid now belongs to an unrelated process
+    unrelated = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+    try:
+        write_pid_file(pid_dir, ended_pid(), unrelated.pid)
+
+        lifecycle = DriverLifecycle({'browser': {'lifecycle': {'pid_dir': pid_dir}}})
+
+        assert lifecycle.reap_orphans() == 0
+        assert unrelated.poll() is None
+    finally:
+        unrelated.kill()
+        unrelated.wait()
+
+
+@pytest.mark.skipif(driver_lifecycle.psutil is None, reason="psutil is not installed")
+def test_reused_pid_is_not_killed_with_psutil(tmp_path):
+    pid_dir = str(tmp_path / 'pids')
+    unrelated = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+    try:
+        write_pid_file(pid_dir, ended_pid(), unrelated.pid)
+
+        lifecycle = DriverLifecycle({'browser': {'lifecycle': {'pid_dir': pid_dir}}})
+
+        assert lifecycle.reap_orphans() == 0
+        assert unrelated.poll() is None
+        assert not os.listdir(pid_dir)
+    finally:
+        unrelated.kill()
+        unrelated.wait()
@@ -0,0 +1,188 @@
+"""Tests for ExcelProcessor, compared with the row-by-row processing it replaced"""
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from excel_processor import ExcelProcessor
+from parse_cache import ParseCache
+from reader_engines import ENGINE_PREFERENCE, ENGINES
+
+MAPPING = {'invoice_number': 'Booking No', 'supplier': 'Supplier', 'actual_net_cost': 'Actual Net'}
+
+# Sample sheets: prefixed booking numbers with text around them, plain numeric
+# booking numbers in an all-numeric sheet, and a mixed sheet with blank cells
+SHEETS = {
+    'prefixed': pd.DataFrame({
+        'Date': ['2024-01-05', '2024-01-06', '2024-01-07', '2024-01-08'],
+        'Booking No': ['SZ1001', 'sz1002 ', ' 1003', 'SZ1004'],
+        'Supplier': ['Emirates', 'Qatar Airways', None, 'Saudia'],
+        'Actual Net': [250.5, None, 80.0, 1200.25],
+        'Notes': ['', 'late', None, 'ok']
+    }),
+    'numeric': pd.DataFrame({
+        'Booking No': [1001, 1002, 1003],
+        'Supplier': [7, 8, 9],
+        'Actual Net': [100, 200, 300],
+        'Pax': [2.5, 1.0, 3.0]
+    }),
+    'mixed': pd.DataFrame({
+        'Booking No': [1001, None, 1003, 1004],
+        'Supplier': ['Emirates', 'Saudia', 12, None],
+        'Actual Net': [100, 200, None, 300],
+        'Departure': [datetime(2024, 3, 1), datetime(2024, 3, 2), None, datetime(2024, 3, 4)]
+    })
+}
+
+
+def baseline_process_file(data, column_mapping):
+    """process_file as it was before it worked on whole columns (row by row)"""
+    excel_to_crm = {
+        excel_col: crm_field for crm_field, excel_col in column_mapping.items()
+        if isinstance(excel_col, str) and excel_col in data.columns
+    }
+    result = []
+    for i in range(len(data)):
+        source = data.iloc[i]
+        row = {crm_field: source[excel_col] for excel_col, crm_field in excel_to_crm.items()}
+        if not row:
+            continue
+
+        invoice_number = row.get('invoice_number', '')
+        if isinstance(invoice_number, str) and invoice_number.upper().startswith('SZ'):
+            invoice_number = invoice_number[2:]
+        elif not isinstance(invoice_number, (str, int, float)):
+            continue
+        row['invoice_number'] = str(invoice_number).strip()
+
+        for key, value in row.items():
+            if pd.isna(value):
+                row[key] = ''
+            elif isinstance(value, (int, float)):
+                row[key] = str(value)
+            elif not isinstance(value, str):
+                row[key] = str(value)
+
+        if not row.get('invoice_number'):
+            continue
+        result.append(row)
+    return result
+
+
+def baseline_read(file_path):
+    """Read a file the way load_excel_file did before the reader engines"""
+    if file_path.endswith('.csv'):
+        return pd.read_csv(file_path)
+    return pd.read_excel(file_path)
+
+
+def available_engines(extension):
+    return [name for name in ENGINE_PREFERENCE[extension] if ENGINES[name].available()]
+
+
+def make_processor(engine=None):
+    return ExcelProcessor(parse_cache=ParseCache({'excel': {'cache': {'enabled': False}}}), engine=engine)
+
+
+def write_sample(directory, name, extension):
+    """Write a sample sheet as .xlsx or .csv and return its path"""
+    path = str(directory / f"{name}{extension}")
+    if extension == '.csv':
+        SHEETS[name].to_csv(path, index=False)
+    else:
+        SHEETS[name].to_excel(path, index=False)
+    return path
+
+
+@pytest.fixture(params=sorted(SHEETS))
+def sample(request, tmp_path):
+    """Path of a sample sheet, once as .xlsx and once as .csv"""
+    return {extension: write_sample(tmp_path, request.param, extension) for extension in ('.xlsx', '.csv')}
+
+
+@pytest.mark.parametrize('extension', ['.xlsx', '.csv'])
+def test_process_file_matches_baseline(sample, extension):
+    file_path = sample[extension]
+    expected = baseline_process_file(baseline_read(file_path), MAPPING)
+    assert expected
+
+    for engine in available_engines(extension):
+        processor = make_processor(engine)
+        assert processor.load_excel_file(file_path)
+        assert processor.process_file(MAPPING) == expected, engine
+
+
+def test_process_file_matches_baseline_with_missing_columns(sample, caplog):
+    file_path = sample['.xlsx']
+    mapping = dict(MAPPING, supplier='Vendor', actual_net_cost=None)
+    processor = make_processor()
+    assert processor.load_excel_file(file_path)
+
+    with caplog.at_level(logging.WARNING):
+        assert processor.process_file(mapping) == baseline_process_file(baseline_read(file_path), mapping)
+    assert 'Columns not found' in caplog.text
+
+
+def test_process_file_matches_baseline_on_object_invoice_numbers():
+    # Cells of any type in one column, as a sheet without a dominant type is read
+    data = pd.DataFrame({
+        'Booking No': np.array(['SZ1001', 1002, 1003.0, None, datetime(2024, 1, 1), True, ''], dtype=object),
+        'Supplier': np.array(['Emirates', 'Saudia', 5, 6.5, None, 'Qatar Airways', 'x'], dtype=object),
+        'Actual Net': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]
+    })
+    processor = make_processor()
+    processor.data = data
+
+    assert processor.process_file(MAPPING) == baseline_process_file(data, MAPPING)
+
+
+@pytest.mark.parametrize('extension', ['.xlsx', '.csv'])
+def test_mapped_load_skips_blank_invoice_numbers(tmp_path, extension, caplog):
+    processor = make_processor()
+    assert processor.load_excel_file(write_sample(tmp_path, 'mixed', extension), column_mapping=MAPPING)
+
+    with caplog.at_level(logging.WARNING):
+        invoices = processor.process_file(MAPPING)
+
+    # The CSV holds the booking numbers as pandas wrote them (1001.0)
+    assert [float(invoice['invoice_number']) for invoice in invoices] == [1001, 1003, 1004]
+    assert 'Missing invoice number in row 2' in caplog.text
+
+
+@pytest.mark.parametrize('name', sorted(SHEETS))
+def test_streaming_matches_mapped_load(tmp_path, name):
+    file_path = write_sample(tmp_path, name, '.xlsx')
+    # Every column of the sheet, so dates and blank cells are compared too
+    mapping = {'invoice_number': 'Booking No', **{col: col for col in SHEETS[name].columns if col != 'Booking No'}}
+
+    streamed = list(make_processor().iter_invoices(mapping, file_path=file_path))
+    assert streamed
+
+    for engine in available_engines('.xlsx'):
+        processor = make_processor(engine)
+        assert processor.load_excel_file(file_path, column_mapping=mapping)
+        assert processor.process_file(mapping) == streamed, engine
+
+
+def test_streaming_matches_mapped_load_on_text_markers(tmp_path):
+    file_path = str(tmp_path / 'markers.xlsx')
+    pd.DataFrame({
+        'Booking No': ['SZ1001', 'N/A', 1003, 1004.5, None, 'SZ1006'],
+        'Supplier': ['NULL', 'Emirates', True, '', 'Saudia', 'n/a'],
+        'Actual Net': [1.0, 2.5, None, 4.0, 5.0, 6.0]
+    }).to_excel(file_path, index=False)
+
+    streamed = list(make_processor().iter_invoices(MAPPING, file_path=file_path))
+    processor = make_processor()
+    assert processor.load_excel_file(file_path, column_mapping=MAPPING)
+
+    assert processor.process_file(MAPPING) == streamed
+    assert [invoice['invoice_number'] for invoice in streamed] == ['1001', '1003', '1004.5', '1006']
+    assert [invoice['actual_net_cost'] for invoice in streamed] == ['1', '', '4', '6']
+
+
+def test_probe_headers_needs_a_file():
+    with pytest.raises(ValueError, match="load a file first"):
+        make_processor().probe_headers()
@@ -0,0 +1,86 @@
+"""Tests for the HTTP fast path against the mock CRM"""
+import requests
+
+import mock_crm
+from http_engine import HttpFormEngine
+
+
+def make_engine(supplier_field='supplier_name', actual_net_field='actual_net'):
+    """Create an engine for the mock CRM's Add Actual Net form"""
+    return HttpFormEngine({
+        'crm': {
+            'field_mappings': {
+                'supplier_field': {'type': 'name', 'value': supplier_field},
+                'actual_net_field': {'type': 'name', 'value': actual_net_field}
+            }
+        }
+    })
+
+
+def logged_in(engine, base_url):
+    """Log in with a separate session and hand its cookies to the engine, like sync_cookies does"""
+    browser = requests.Session()
+    browser.post(f"{base_url}/login", data={'username': mock_crm.MOCK_USERNAME, 'password': mock_crm.MOCK_PASSWORD})
+    engine._set_cookies([
+        {'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain, 'path': cookie.path}
+        for cookie in browser.cookies
+    ])
+    return engine
+
+
+def test_fetch_form_parses_action_and_csrf(mock_crm_url):
+    engine = logged_in(make_engine(), mock_crm_url)
+
+    form = engine.fetch_form(f"{mock_crm_url}/crm/booking/1")
+
+    assert form['action'] == f"{mock_crm_url}/crm/booking/1/actual-net"
+    assert form['method'] == 'post'
+    assert form['csrf_meta']
+    assert form['fields']['_token'] == form['csrf_meta']
+    assert {'supplier_name', 'actual_net'} <= set(form['fields'])
+
+
+def test_submit_saves_booking(mock_crm_url):
+    engine = logged_in(make_engine(), mock_crm_url)
+
+    assert engine.submit_actual_net(f"{mock_crm_url}/crm/booking/2", 'Emirates', '123.45')
+
+    booking = mock_crm_booking(2)
+    assert booking['supplier'] == 'Emirates'
+    assert booking['actual_net'] == '123.45'
+
+
+def test_falls_back_when_form_shape_differs(mock_crm_url):
+    engine = logged_in(make_engine(actual_net_field='net_amount'), mock_crm_url)
+
+    assert engine.fetch_form(f"{mock_crm_url}/crm/booking/3") is None
+    assert not engine.submit_actual_net(f"{mock_crm_url}/crm/booking/3", 'Emirates', '99')
+    assert mock_crm_booking(3)['actual_net'] == ''
+
+
+def test_falls_back_without_valid_session(mock_crm_url):
+    engine = make_engine()
+    engine._set_cookies([{'name': 'session', 'value': 'expired', 'domain': '127.0.0.1', 'path': '/'}])
+
+    assert not engine.submit_actual_net(f"{mock_crm_url}/crm/booking/4", 'Emirates', '99')
+    assert mock_crm_booking(4)['actual_net'] == ''
+
+
+def test_not_available_without_name_locators():
+    engine = HttpFormEngine({
+        'crm': {
+            'field_mappings': {
+                'supplier_field': {'type': 'xpath', 'value': "//input[@name='supplier_name']"},
+                'actual_net_field': {'type': 'name', 'value': 'actual_net'}
+            }
+        }
+    })
+
+    assert not engine.is_available()
+    assert not engine.submit_actual_net('http://127.0.0.1/crm/booking/1', 'Emirates', '1')
+
+
+def mock_crm_booking(booking_id):
+    """Get a booking of the mock CRM"""
+    with mock_crm.BOOKINGS_LOCK:
+        return dict(mock_crm.BOOKINGS[booking_id])
@@ -0,0 +1,107 @@
+"""Tests for the Feather parse cache"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from excel_processor import ExcelProcessor
+from parse_cache import ParseCache
+
+pytest.importorskip('pyarrow')
+
+
+def make_cache(tmp_path, max_size_mb=512):
+    return ParseCache({'excel': {'cache': {'directory': str(tmp_path / 'cache'), 'max_size_mb': max_size_mb}}})
+
+
+def test_cached_frames_load_unchanged(tmp_path):
+    cache = make_cache(tmp_path)
+    frame = pd.DataFrame({
+        'Booking No': ['SZ1001', None, 'SZ1003'],
+        'Actual Net': [250.5, np.nan, 80.0],
+        'Pax': [1, 2, 3],
+        'Paid': [True, False, True],
+        'Departure': pd.to_datetime(['2024-03-01', None, '2024-03-03'])
+    })
+
+    assert cache.store('key', frame)
+
+    restored = cache.load('key')
+    assert restored.dtypes.equals(frame.dtypes)
+    assert restored.equals(frame)
+
+
+@pytest.mark.parametrize('frame', [
+    pd.DataFrame({'Booking No': np.array(['SZ1001', 1002], dtype=object)}),
+    pd.DataFrame({'Departure': pd.Series([datetime(2024, 1, 1), None]).astype(object)}),
+    pd.DataFrame({2024: ['a', 'b']}),
+    pd.DataFrame({'Booking No': ['SZ1001', 'SZ1002']}, index=[3, 4])
+], ids=['mixed types', 'datetime objects', 'numeric header', 'index'])
+def test_frames_feather_cannot_hold_are_not_cached(tmp_path, frame):
+    cache = make_cache(tmp_path)
+
+    assert not cache.store('key', frame)
+    assert cache.load('key') is None
+
+
+def test_key_changes_with_content_and_options(tmp_path):
+    cache = make_cache(tmp_path)
+    path = tmp_path / 'book.csv'
+    path.write_text('Booking No\nSZ1001\n')
+    key = cache.key(str(path), {'engine': 'c'})
+
+    assert cache.key(str(path), {'engine': 'c'}) == key
+    assert cache.key(str(path), {'engine': 'pyarrow'}) != key
+    path.write_text('Booking No\nSZ1002\n')
+    assert cache.key(str(path), {'engine': 'c'}) != key
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = make_cache(tmp_path)
+    frame = pd.DataFrame({'Actual Net': np.arange(20000, dtype='float64')})
+    for key in ('old', 'used', 'new'):
+        assert cache.store(key, frame)
+    assert cache.load('used') is not None
+
+    # Room for two entries
+    cache.max_bytes = 2.5 * 20000 * 8
+    assert cache.evict() == 1
+
+    assert cache.load('old') is None
+    assert cache.load('used') is not None
+    assert cache.load('new') is not None
+
+
+def test_processor_without_cache_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'book.csv'
+    path.write_text('Booking No,Supplier\nSZ1001,Emirates\n')
+
+    processor = ExcelProcessor(str(path))
+
+    assert processor.get_row_count() == 1
+    assert not (tmp_path / '.parse_cache').exists()
+
+
+@pytest.mark.parametrize('extension', ['.xlsx', '.csv'])
+def test_cache_hit_matches_parsed_workbook(tmp_path, extension):
+    path = str(tmp_path / f"book{extension}")
+    sheet = pd.DataFrame({
+        'Booking No': ['SZ1001', 'SZ1002', None],
+        'Supplier': ['Emirates', None, 'Saudia'],
+        'Actual Net': [250.5, 100, None],
+        'Departure': [datetime(2024, 3, 1), None, datetime(2024, 3, 3)]
+    })
+    if extension == '.csv':
+        sheet.to_csv(path, index=False)
+    else:
+        sheet.to_excel(path, index=False)
+    cache = make_cache(tmp_path)
+
+    parsed = ExcelProcessor(path, parse_cache=cache).data
+    assert len(list((tmp_path / 'cache').iterdir())) == 1
+    cached = ExcelProcessor(path, parse_cache=cache).data
+
+    assert cached.dtypes.equals(parsed.dtypes)
+    assert cached.equals(parsed)
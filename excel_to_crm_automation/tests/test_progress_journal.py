@@ -0,0 +1,68 @@
+"""Tests for resuming runs from the progress journal"""
+import pytest
+
+from progress_journal import ProgressJournal, invoice_fingerprint
+
+INVOICES = [
+    {'invoice_number': '1001', 'supplier': 'Emirates', 'actual_net_cost': '100'},
+    {'invoice_number': '1002', 'supplier': 'Saudia', 'actual_net_cost': '200'},
+    {'invoice_number': '1003', 'supplier': 'Qatar Airways', 'actual_net_cost': '300'},
+    {'invoice_number': '1004', 'supplier': 'Emirates', 'actual_net_cost': '400'}
+]
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = ProgressJournal(str(tmp_path / 'journal.jsonl'))
+    yield journal
+    journal.close()
+
+
+def numbers(invoices):
+    return [invoice['invoice_number'] for invoice in invoices]
+
+
+def test_resume_skips_invoices_saved_with_the_same_data(journal):
+    journal.record_many(numbers(INVOICES), 'queued')
+    journal.record('1001', 'saved', invoice_data=INVOICES[0])
+    journal.record('1002', 'unchanged', invoice_data=INVOICES[1])
+    journal.record('1003', 'searched')
+
+    assert numbers(journal.pending_invoices(INVOICES)) == ['1003', '1004']
+
+
+def test_resume_processes_saved_invoices_whose_data_changed(journal):
+    journal.record('1001', 'saved', invoice_data=INVOICES[0])
+    changed = [dict(INVOICES[0], actual_net_cost='150')] + INVOICES[1:]
+
+    assert numbers(journal.pending_invoices(changed)) == numbers(INVOICES)
+
+
+def test_last_entry_wins(journal):
+    journal.record('1001', 'saved', invoice_data=INVOICES[0])
+    journal.record('1001', 'failed', error='Timed out')
+    journal.record('1002', 'failed', error='Timed out')
+    journal.record('1002', 'saved', invoice_data=INVOICES[1])
+
+    assert numbers(journal.pending_invoices(INVOICES)) == ['1001', '1003', '1004']
+    assert numbers(journal.pending_invoices(INVOICES, only_failed=True)) == ['1001']
+
+
+def test_load_ignores_half_written_line(journal):
+    journal.record('1001', 'saved', invoice_data=INVOICES[0])
+    journal.close()
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"invoice_number": "1002", "sta')
+
+    reopened = ProgressJournal(journal.path)
+    reopened.record('1003', 'failed', error='Timed out')
+    reopened.close()
+
+    entries = reopened.load()
+    assert sorted(entries) == ['1001', '1003']
+    assert entries['1001']['fingerprint'] == invoice_fingerprint(INVOICES[0])
+
+
+def test_unknown_state_is_rejected(journal):
+    with pytest.raises(ValueError):
+        journal.record('1001', 'done')
@@ -0,0 +1,125 @@
+"""Tests for the AIMD rate controller"""
+from rate_controller import RateController
+
+WINDOW = 5
+
+
+def make_controller(**rate_config):
+    config = {
+        'window': WINDOW,
+        'min_workers': 1,
+        'max_workers': 4,
+        'min_delay': 0,
+        'max_delay': 8,
+        'delay_step': 0.5,
+        'decrease_factor': 0.5,
+        'error_threshold': 0.2,
+        'latency_factor': 1.5,
+        'baseline_smoothing': 0.2
+    }
+    config.update(rate_config)
+    return RateController({'rate_control': config}, max_workers=4)
+
+
+def observe_window(controller, latency, success=True, path='browser'):
+    for _ in range(WINDOW):
+        controller.observe(latency, success, path)
+
+
+def test_speeds_up_while_healthy():
+    controller = make_controller(initial_delay=1.0)
+
+    for _ in range(3):
+        observe_window(controller, 1.0)
+
+    assert controller.active_workers == 4
+    assert controller.delay == 0
+
+
+def test_backs_off_on_errors_and_recovers():
+    controller = make_controller()
+    for _ in range(3):
+        observe_window(controller, 1.0)
+    assert controller.active_workers == 4
+
+    observe_window(controller, 1.0, success=False)
+    assert controller.active_workers == 2
+    assert controller.delay == 0.5
+
+    for _ in range(2):
+        observe_window(controller, 1.0)
+    assert controller.active_workers == 4
+    assert controller.delay == 0
+
+
+def test_backs_off_on_latency_and_recovers():
+    controller = make_controller()
+    for _ in range(3):
+        observe_window(controller, 1.0)
+
+    observe_window(controller, 3.0)
+    assert controller.active_workers == 2
+
+    # The baseline follows a lasting slowdown, so the controller does not stay at the floor
+    for _ in range(10):
+        observe_window(controller, 3.0)
+    assert controller.active_workers == 4
+
+
+def test_fast_windows_do_not_lower_the_baseline_for_good():
+    controller = make_controller()
+    observe_window(controller, 2.0)
+
+    # e.g. a run of invoices the CRM already had
+    for _ in range(3):
+        observe_window(controller, 0.05)
+    for _ in range(8):
+        observe_window(controller, 2.0)
+
+    assert controller.active_workers == 4
+    assert controller.delay == 0
+
+
+def test_attempts_without_the_browser_are_not_counted():
+    controller = make_controller()
+    observe_window(controller, 2.0)
+
+    observe_window(controller, 0.01, path='cache')
+    observe_window(controller, 0.2, path='http')
+    observe_window(controller, 2.0)
+
+    assert controller.active_workers == 3
+    assert controller._baseline_latency == 2.0
+
+
+def test_schedule_limits_workers_and_delay():
+    controller = make_controller(schedule=[{'start': '00:00', 'end': '24:00', 'max_workers': 2, 'min_delay': 1.5}])
+
+    for _ in range(3):
+        observe_window(controller, 1.0)
+
+    assert controller.active_workers == 2
+    assert controller.delay == 1.5
+
+
+def test_disabled_controller_runs_all_workers():
+    controller = make_controller(enabled=False, initial_delay=0.5)
+
+    observe_window(controller, 10.0, success=False)
+
+    assert controller.active_workers == 4
+    assert controller.delay == 0.5
+
+
+def test_benchmark_runs_without_rate_control(tmp_path):
+    from benchmark import mock_config
+
+    config = mock_config(
+        {'rate_control': {'enabled': True, 'schedule': [{'start': '00:00', 'end': '24:00', 'max_workers': 1, 'min_delay': 2}]}},
+        'http://127.0.0.1:5055',
+        str(tmp_path)
+    )
+    controller = RateController(config, max_workers=4, initial_delay=0)
+
+    assert controller._limits() == (1, 4, 0.0)
+    assert controller.active_workers == 4
@@ -0,0 +1,139 @@
+"""Tests for error classification, backoff, the circuit breaker and the retry scheduler"""
+import time
+import threading
+
+import pytest
+
+from retry_scheduler import (
+    RetryScheduler,
+    CircuitBreaker,
+    InvoiceError,
+    classify_error,
+    NOT_FOUND,
+    STALE_ELEMENT,
+    SESSION_EXPIRED,
+    TIMEOUT,
+    UNKNOWN
+)
+
+
+def make_scheduler(**retry_config):
+    retry_config.setdefault('jitter', 0)
+    retry_config.setdefault('circuit_breaker', {'enabled': False})
+    return RetryScheduler({'retry': retry_config})
+
+
+@pytest.mark.parametrize('error, category', [
+    (InvoiceError("Booking SZ1001 not found", NOT_FOUND), NOT_FOUND),
+    (InvoiceError("Failed to save changes"), UNKNOWN),
+    (Exception("stale element reference: element is not attached"), STALE_ELEMENT),
+    (Exception("Timed out waiting for the booking list"), TIMEOUT),
+    (Exception("Session expired, login required"), SESSION_EXPIRED),
+    (Exception("Invoice row not found"), NOT_FOUND),
+    (Exception("Something else"), UNKNOWN)
+])
+def test_classify_error(error, category):
+    assert classify_error(error) == category
+
+
+def test_backoff_doubles_up_to_max_delay():
+    scheduler = make_scheduler(base_delay=2, max_delay=10)
+
+    assert [scheduler.backoff_delay(attempt) for attempt in range(1, 5)] == [2, 4, 8, 10]
+
+
+def test_backoff_jitter_stays_within_bounds():
+    scheduler = make_scheduler(base_delay=4, jitter=0.5)
+
+    assert all(2 <= scheduler.backoff_delay(1) <= 6 for _ in range(100))
+
+
+def test_deferred_item_is_retried_after_backoff():
+    scheduler = make_scheduler(base_delay=0.2)
+    scheduler.add('1001')
+    scheduler.add('1002')
+    scheduler.close_input()
+
+    item, attempt = scheduler.get()
+    deferred_at = time.time()
+    assert scheduler.defer(item, attempt, TIMEOUT)
+
+    # Other items keep flowing while the failed one waits
+    assert scheduler.get() == ('1002', 1)
+    scheduler.complete('1002')
+
+    assert scheduler.get() == ('1001', 2)
+    assert time.time() - deferred_at >= 0.2
+    scheduler.complete('1001')
+    assert scheduler.get() is None
+
+
+def test_not_found_is_not_retried():
+    scheduler = make_scheduler(base_delay=0)
+    scheduler.add('1001')
+    scheduler.close_input()
+
+    item, attempt = scheduler.get()
+    assert not scheduler.defer(item, attempt, NOT_FOUND)
+    assert scheduler.finished()
+    assert scheduler.get() is None
+
+
+def test_retries_stop_after_max_attempts():
+    scheduler = make_scheduler(base_delay=0, max_attempts=3)
+    scheduler.add('1001')
+    scheduler.close_input()
+
+    attempts = []
+    while True:
+        task = scheduler.get()
+        if task is None:
+            break
+        attempts.append(task[1])
+        scheduler.defer(task[0], task[1], UNKNOWN)
+
+    assert attempts == [1, 2, 3]
+
+
+def test_breaker_opens_at_configured_error_rate():
+    breaker = CircuitBreaker(window=4, error_rate=0.5, cooldown=30)
+    for success in (True, True, True, False):
+        breaker.record(success)
+    assert breaker.remaining() == 0
+
+    for success in (True, False, True, False):
+        breaker.record(success)
+    assert 29 < breaker.remaining() <= 30
+
+
+def test_breaker_ignores_not_found():
+    scheduler = make_scheduler(base_delay=0, circuit_breaker={'window': 2, 'error_rate': 0.5, 'cooldown': 30})
+    for number in ('1001', '1002'):
+        scheduler.add(number)
+        item, attempt = scheduler.get()
+        scheduler.defer(item, attempt, NOT_FOUND)
+
+    assert scheduler.breaker.remaining() == 0
+
+
+def test_feed_stops_at_read_ahead_and_after_drain():
+    scheduler = make_scheduler()
+    read = []
+
+    def items():
+        for number in range(100):
+            read.append(number)
+            yield number
+
+    feeder = threading.Thread(target=scheduler.feed, args=(items(), 3), daemon=True)
+    feeder.start()
+    time.sleep(0.1)
+
+    # One item is held while the ready queue is full
+    assert len(read) == 4
+    assert scheduler.get() == (0, 1)
+
+    drained = scheduler.drain()
+    feeder.join(1)
+    assert not feeder.is_alive()
+    assert drained + scheduler.drain() == list(range(1, len(read)))
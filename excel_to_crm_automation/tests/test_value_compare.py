@@ -0,0 +1,60 @@
+"""Tests for comparing CRM values with invoice data"""
+import pytest
+
+from value_compare import is_unchanged, normalize_amount, values_match
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('£1,234.50', 1234.5),
+    ('1234.5', 1234.5),
+    (' -20 ', -20.0),
+    (99, 99.0),
+    ('', None),
+    ('n/a', None),
+    (None, None)
+])
+def test_normalize_amount(value, expected):
+    assert normalize_amount(value) == expected
+
+
+def test_values_match():
+    assert values_match('supplier', '  Qatar   AIRWAYS ', 'qatar airways')
+    assert not values_match('supplier', 'Qatar Airways', 'Emirates')
+    assert values_match('actual_net_cost', '£1,234.50', '1234.5')
+    assert values_match('actual_net_cost', '100.004', '100')
+    assert not values_match('actual_net_cost', '100.01', '100')
+    assert values_match('actual_net_cost', '100.01', '100', tolerance=0.02)
+
+
+def test_is_unchanged():
+    current = {'supplier': 'Emirates', 'actual_net_cost': '£250.50'}
+
+    assert is_unchanged(current, {'supplier': 'emirates', 'actual_net_cost': '250.5'})
+    assert not is_unchanged(current, {'supplier': 'Emirates', 'actual_net_cost': '251'})
+    assert not is_unchanged({'supplier': 'Emirates'}, {'supplier': 'Emirates', 'actual_net_cost': '250.5'})
+
+
+def test_empty_values_are_not_compared():
+    # Empty values are never written, so only the supplier decides
+    assert is_unchanged({'supplier': 'Emirates', 'actual_net_cost': '999'}, {'supplier': 'Emirates', 'actual_net_cost': ''})
+    # Nothing to compare means nothing is known to be stored
+    assert not is_unchanged({'supplier': 'Emirates'}, {'supplier': '', 'actual_net_cost': None})
+    assert not is_unchanged(None, {'supplier': 'Emirates'})
+
+
+def test_written_values_feed_cache_comparison(tmp_path):
+    from booking_index import BookingIndex
+
+    index = BookingIndex(str(tmp_path / 'index.sqlite3'))
+    try:
+        assert index.get_written_values('1001') is None
+        index.put_written_values('SZ1001', 'Emirates', '250.5')
+        # An empty value keeps the one written before
+        index.put_written_values('1001', '', '260')
+
+        written = index.get_written_values('1001')
+        assert written == {'supplier': 'Emirates', 'actual_net_cost': '260'}
+        assert is_unchanged(written, {'supplier': 'Emirates', 'actual_net_cost': '260.00'})
+        assert not is_unchanged(written, {'supplier': 'Emirates', 'actual_net_cost': '250.5'})
+    finally:
+        index.close()
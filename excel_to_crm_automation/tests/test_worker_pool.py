@@ -0,0 +1,53 @@
+"""Tests for WorkerPool without a browser"""
+import crm_automator
+from worker_pool import WorkerPool
+
+
+class BrokenAutomator:
+    """Stand-in for CRMAutomator whose browser never starts"""
+
+    closed = 0
+
+    def __init__(self, config=None, worker_id=None):
+        pass
+
+    def start(self, headless=False, page_load_strategy=None, background=False):
+        return False
+
+    def close(self):
+        BrokenAutomator.closed += 1
+
+
+def test_unread_stream_fails_when_no_worker_starts(monkeypatch):
+    monkeypatch.setattr(crm_automator, 'CRMAutomator', BrokenAutomator)
+    invoices = ({'invoice_number': str(1000 + i), 'supplier': 'Emirates'} for i in range(50))
+    pool = WorkerPool({'excel': {'read_ahead': 3}, 'rate_control': {'enabled': False}}, workers=2)
+
+    results = pool.run(invoices)
+
+    assert sorted(results) == [str(1000 + i) for i in range(50)]
+    assert all(result['error'] == "No worker available" for result in results.values())
+    assert BrokenAutomator.closed == 2
+
+
+def test_workers_use_page_load_strategy(monkeypatch):
+    import worker_pool
+    created = []
+
+    class RecordingPool:
+        def __init__(self, config=None, workers=2, headless=False, page_load_strategy=None):
+            created.append(page_load_strategy)
+
+        def run(self, invoice_data_list, username=None, password=None, journal=None, rate_controller=None):
+            return {}
+
+    monkeypatch.setattr(worker_pool, 'WorkerPool', RecordingPool)
+    # This session's browser is not used when workers run
+    monkeypatch.setattr(crm_automator, 'create_browser', lambda config, worker_id=None: None)
+    automator = crm_automator.CRMAutomator({})
+
+    automator.update_multiple_invoices([], workers=2, page_load_strategy='eager')
+    automator._start_options['page_load_strategy'] = 'none'
+    automator.update_multiple_invoices([], workers=2)
+
+    assert created == ['eager', 'none']
@@ -0,0 +1,204 @@
+"""
+Timing Module
+
+This module records how long each automation step takes, so slow invoices can be
+attributed to search, page open, form fill or save. At the end of a run it writes
+a latency report with percentiles per step, throughput and time spent sleeping
+versus waiting on the CRM.
+"""
+import os
+import json
+import time
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+
+
+# Span categories that are summed up separately in the report
+SLEEP = 'sleep'
+WAIT = 'wait'
+
+
+def percentile(sorted_values, pct):
+    """
+    Get a percentile of sorted values (nearest rank)
+
+    Args:
+        sorted_values: Sorted list of numbers
+        pct: Percentile between 0 and 100
+
+    Returns:
+        Value at the percentile, or 0 for an empty list
+    """
+    if not sorted_values:
+        return 0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.4999)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class TimingRecorder:
+    def __init__(self):
+        """Initialize an empty recorder"""
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget all recorded spans and start a new run"""
+        with self._lock:
+            self._durations = defaultdict(list)
+            self._category_seconds = defaultdict(float)
+            self.invoices = 0
+            self.started_at = time.time()
+
+    def record(self, name, seconds, category=None):
+        """
+        Record the duration of one span
+
+        Args:
+            name: Step name, e.g. 'crm.search_invoice'
+            seconds: Duration in seconds
+            category: Optional category (SLEEP or WAIT) the duration also counts towards
+        """
+        with self._lock:
+            self._durations[name].append(seconds)
+            if category:
+                self._category_seconds[category] += seconds
+
+    @contextmanager
+    def span(self, name, category=None):
+        """
+        Time the enclosed block
+
+        Args:
+            name: Step name
+            category: Optional category (SLEEP or WAIT)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, category)
+
+    def sleep(self, seconds, name='sleep'):
+        """
+        Sleep and record the time as sleeping
+
+        Args:
+            seconds: Time to sleep in seconds
+            name: Step name for the report
+        """
+        if seconds <= 0:
+            return
+        with self.span(name, SLEEP):
+            time.sleep(seconds)
+
+    def count_invoice(self):
+        """Count one finished invoice for the throughput figure"""
+        with self._lock:
+            self.invoices += 1
+
+    def summary(self):
+        """
+        Build the latency report
+
+        Returns:
+            Dictionary with 'run_seconds', 'invoices', 'invoices_per_minute',
+            'sleep_seconds', 'wait_seconds' and 'steps' (count, total, mean,
+            p50, p95, p99 and max per step, in seconds)
+        """
+        with self._lock:
+            durations = {name: sorted(values) for name, values in self._durations.items()}
+            category_seconds = dict(self._category_seconds)
+            invoices = self.invoices
+            run_seconds = time.time() - self.started_at
+
+        steps = {}
+        for name, values in sorted(durations.items()):
+            total = sum(values)
+            steps[name] = {
+                'count': len(values),
+                'total': round(total, 4),
+                'mean': round(total / len(values), 4),
+                'p50': round(percentile(values, 50), 4),
+                'p95': round(percentile(values, 95), 4),
+                'p99': round(percentile(values, 99), 4),
+                'max': round(values[-1], 4)
+            }
+
+        return {
+            'run_seconds': round(run_seconds, 2),
+            'invoices': invoices,
+            'invoices_per_minute': round(invoices / run_seconds * 60, 2) if run_seconds > 0 else 0,
+            'sleep_seconds': round(category_seconds.get(SLEEP, 0), 2),
+            'wait_seconds': round(category_seconds.get(WAIT, 0), 2),
+            'steps': steps
+        }
+
+    def format_report(self, summary=None):
+        """
+        Format the latency report as text
+
+        Args:
+            summary: Summary from summary() (built if not given)
+
+        Returns:
+            Multi-line string with one row per step
+        """
+        summary = summary or self.summary()
+        lines = [
+            f"{summary['invoices']} invoices in {summary['run_seconds']}s "
+            f"({summary['invoices_per_minute']} per minute), "
+            f"sleeping {summary['sleep_seconds']}s, waiting on the CRM {summary['wait_seconds']}s",
+            f"{'step':<40} {'count':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'total':>10}"
+        ]
+        for name, step in summary['steps'].items():
+            lines.append(
+                f"{name:<40} {step['count']:>7} {step['p50']:>8.3f} {step['p95']:>8.3f} "
+                f"{step['p99']:>8.3f} {step['total']:>10.2f}"
+            )
+        return '\n'.join(lines)
+
+    def write_report(self, file_path):
+        """
+        Write the latency report as JSON
+
+        Args:
+            file_path: Path of the JSON report
+
+        Returns:
+            The report summary dictionary
+        """
+        summary = self.summary()
+        try:
+            directory = os.path.dirname(file_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(file_path, 'w') as f:
+                json.dump(summary, f, indent=2)
+        except Exception as e:
+            self.logger.error(f"Error writing timing report {file_path}: {str(e)}")
+        return summary
+
+
+# Process-wide recorder shared by all sessions of a run
+recorder = TimingRecorder()
+
+
+def timed(name, category=None):
+    """
+    Decorator that records every call of a function as a span
+
+    Args:
+        name: Step name, e.g. 'crm.save_changes'
+        category: Optional category (SLEEP or WAIT)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with recorder.span(name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
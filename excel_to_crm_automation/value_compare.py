@@ -0,0 +1,101 @@
+"""
+Value Compare Module
+
+This module normalizes the values shown by the CRM and the values from the Excel
+file, so invoices whose values are already stored can skip the save cycle.
+"""
+import re
+
+
+# Fields compared before an invoice is updated, in invoice data keys
+COMPARED_FIELDS = ('supplier', 'actual_net_cost')
+
+# Fields compared as numbers instead of text
+NUMERIC_FIELDS = ('actual_net_cost',)
+
+
+def normalize_text(value):
+    """
+    Normalize a text value for comparison
+
+    Args:
+        value: Value as shown in the CRM or read from Excel
+
+    Returns:
+        Lower-case string with surrounding and repeated whitespace removed
+    """
+    if value is None:
+        return ''
+    return re.sub(r'\s+', ' ', str(value)).strip().casefold()
+
+
+def normalize_amount(value):
+    """
+    Normalize an amount for comparison
+
+    Args:
+        value: Amount as shown in the CRM (may contain currency symbols and
+            thousands separators) or read from Excel
+
+    Returns:
+        Float value, or None if the value is not a number
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    text = re.sub(r'[^\d.\-]', '', str(value))
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def values_match(field, current, wanted, tolerance=0.005):
+    """
+    Check if the current value of a field already equals the wanted value
+
+    Args:
+        field: Invoice data key, e.g. 'actual_net_cost'
+        current: Value currently stored in the CRM
+        wanted: Value from the Excel file
+        tolerance: Maximum difference for numeric fields
+
+    Returns:
+        Boolean indicating if the values are equal after normalization
+    """
+    if field in NUMERIC_FIELDS:
+        current_amount = normalize_amount(current)
+        wanted_amount = normalize_amount(wanted)
+        if current_amount is not None and wanted_amount is not None:
+            return abs(current_amount - wanted_amount) <= tolerance
+    return normalize_text(current) == normalize_text(wanted)
+
+
+def is_unchanged(current_values, invoice_data, tolerance=0.005):
+    """
+    Check if the CRM already holds all values of an invoice
+
+    Empty values in the invoice data are never written, so they are not compared.
+
+    Args:
+        current_values: Dictionary with the current values, keyed like the invoice data
+        invoice_data: Dictionary with invoice data
+        tolerance: Maximum difference for numeric fields
+
+    Returns:
+        Boolean indicating if nothing has to be saved
+    """
+    if not current_values:
+        return False
+
+    compared = False
+    for field in COMPARED_FIELDS:
+        wanted = invoice_data.get(field, '')
+        if wanted == '' or wanted is None:
+            continue
+        if field not in current_values or not values_match(field, current_values[field], wanted, tolerance):
+            return False
+        compared = True
+    return compared
@@ -0,0 +1,260 @@
+"""
+Worker Pool Module
+
+This module runs several independent browser sessions in parallel, each pulling
+invoices from a shared queue, so large sheets are not limited to one Chrome.
+"""
+import time
+import logging
+import threading
+
+from retry_scheduler import RetryScheduler, classify_error, BREAKER_CATEGORIES
+from timing import recorder
+
+
+class WorkerPool:
+    def __init__(self, config=None, workers=2, headless=False, page_load_strategy=None):
+        """
+        Initialize the worker pool
+
+        Args:
+            config: Dictionary containing configuration options (same as CRMAutomator)
+            workers: Number of browser sessions to run in parallel
+            headless: Boolean indicating if browsers should run in headless mode
+            page_load_strategy: Optional page load strategy ('normal', 'eager' or 'none')
+        """
+        self.config = config or {}
+        self.workers = max(1, int(workers))
+        self.headless = headless
+        self.page_load_strategy = page_load_strategy
+        self.logger = logging.getLogger(__name__)
+
+        self._results = {}
+        self._results_lock = threading.Lock()
+        self._prewarmed = {}
+        self.journal = None
+        self.rate_controller = None
+
+    def prewarm(self):
+        """
+        Launch the worker browsers in the background before run is called
+
+        Lets the browsers start while the Excel file is still being parsed.
+        """
+        # Imported here to avoid a circular import with crm_automator
+        from crm_automator import CRMAutomator
+
+        for worker_id in range(self.workers):
+            if worker_id not in self._prewarmed:
+                automator = CRMAutomator(self.config, worker_id=worker_id)
+                automator.start(headless=self.headless, page_load_strategy=self.page_load_strategy, background=True)
+                self._prewarmed[worker_id] = automator
+
+    def close(self):
+        """Close browsers that were pre-warmed but never used"""
+        while self._prewarmed:
+            _, automator = self._prewarmed.popitem()
+            automator.wait_until_started()
+            automator.close()
+
+    def run(self, invoice_data_list, username=None, password=None, journal=None, rate_controller=None):
+        """
+        Process invoices using all workers
+
+        Every worker starts its own browser, logs in and then takes invoices
+        from the shared RetryScheduler until all invoices are finished.
+
+        Args:
+            invoice_data_list: List of dictionaries, each containing invoice identifier and data,
+                or an iterator of them that is read while the workers run
+            username: Username for CRM login (each worker logs in separately
+                unless its saved session is still valid)
+            password: Password for CRM login
+            journal: Optional ProgressJournal that records the state of every invoice
+            rate_controller: Optional RateController; only the workers it allows take
+                invoices, and each pauses between invoices for its current delay
+
+        Returns:
+            Dictionary with results for each invoice, same format as
+            CRMAutomator.update_multiple_invoices
+        """
+        self._results = {}
+        self.journal = journal
+        self.rate_controller = rate_controller
+        scheduler = RetryScheduler(self.config)
+
+        def identified(invoices):
+            for invoice_data in invoices:
+                if not invoice_data.get('invoice_number'):
+                    self.logger.error("Invoice identifier not found in data")
+                    continue
+                yield invoice_data
+
+        # A stream (e.g. ExcelProcessor.iter_invoices) is read in the background
+        # while the workers already take invoices
+        feeder = None
+        pending = identified(invoice_data_list)
+        if isinstance(invoice_data_list, (list, tuple)):
+            total = scheduler.feed(pending)
+            worker_count = min(self.workers, total) or 1
+            self.logger.info(f"Starting {worker_count} workers for {total} invoices")
+        else:
+            total = None
+            read_ahead = self.config.get('excel', {}).get('read_ahead', 200)
+            feeder = threading.Thread(
+                target=scheduler.feed,
+                args=(pending, read_ahead),
+                name="invoice-feeder",
+                daemon=True
+            )
+            feeder.start()
+            worker_count = self.workers
+            self.logger.info(f"Starting {worker_count} workers while the invoices are read")
+
+        threads = []
+        for worker_id in range(worker_count):
+            thread = threading.Thread(
+                target=self._worker,
+                args=(worker_id, scheduler, username, password, total),
+                name=f"crm-worker-{worker_id}",
+                daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        # Fewer invoices than workers leaves pre-warmed browsers unused
+        self.close()
+
+        # Anything left in the scheduler could not be processed because every
+        # worker failed to start or log in; the unread rest of a stream is
+        # failed too, so the journal lists every invoice for --only-failed
+        remaining = scheduler.drain()
+        if feeder:
+            feeder.join()
+            remaining.extend(scheduler.drain())
+            remaining.extend(pending)
+        for invoice_data in remaining:
+            self._store_result(invoice_data.get('invoice_number'), False, error="No worker available")
+
+        return self._results
+
+    def _worker(self, worker_id, scheduler, username, password, total):
+        """
+        Worker loop: start a browser session, log in and take invoices until all are finished
+
+        Args:
+            worker_id: Index of the worker (used for logging and its browser profile)
+            scheduler: Shared RetryScheduler of invoice dictionaries
+            username: Username for CRM login
+            password: Password for CRM login
+            total: Total number of queued invoices (used for progress logging; None
+                while the invoices are still being read)
+        """
+        # Imported here to avoid a circular import with crm_automator
+        from crm_automator import CRMAutomator
+
+        automator = self._prewarmed.pop(worker_id, None)
+        try:
+            if automator:
+                started = automator.wait_until_started()
+            else:
+                automator = CRMAutomator(self.config, worker_id=worker_id)
+                started = automator.start(headless=self.headless, page_load_strategy=self.page_load_strategy)
+            if not started:
+                self.logger.error(f"Worker {worker_id}: failed to start browser")
+                return
+            automator.journal = self.journal
+            automator.upcoming_invoices = lambda: [
+                item.get('invoice_number') for item in scheduler.peek(automator.pipeline_depth)
+            ]
+
+            # Reuses the worker's saved session when it is still valid
+            if not automator.ensure_logged_in(username, password):
+                self.logger.error(f"Worker {worker_id}: failed to log in to CRM")
+                return
+
+            while True:
+                # Workers the rate controller has switched off park here
+                if self.rate_controller and not self.rate_controller.wait_turn(worker_id, stop=scheduler.finished):
+                    break
+                task = scheduler.get()
+                if task is None:
+                    break
+                invoice_data, attempt = task
+
+                invoice_identifier = invoice_data.get('invoice_number')
+                done = len(self._results) + 1
+                self.logger.info(f"Worker {worker_id}: processing invoice {done}/{total or '?'}: {invoice_identifier} (attempt {attempt})")
+
+                automator.recycle_if_needed(username, password)
+                automator.invoices_since_start += 1
+
+                if self.rate_controller:
+                    self.rate_controller.pace()
+
+                update_data = {k: v for k, v in invoice_data.items() if k != 'invoice_number'}
+                started = time.perf_counter()
+                try:
+                    status = automator.attempt_invoice(
+                        invoice_identifier,
+                        update_data,
+                        username=username,
+                        password=password
+                    )
+                    scheduler.complete(invoice_data)
+                    self._observe(started, True, automator.last_attempt_path)
+                    self._store_result(invoice_identifier, True, status=status, invoice_data=invoice_data)
+                except Exception as e:
+                    category = classify_error(e)
+                    self._observe(started, category not in BREAKER_CATEGORIES, automator.last_attempt_path)
+                    self.logger.error(f"Worker {worker_id}: error updating invoice {invoice_identifier} ({category}): {str(e)}")
+                    if scheduler.defer(invoice_data, attempt, category):
+                        automator.recover(category, username, password)
+                    else:
+                        self._store_result(invoice_identifier, False, error=str(e))
+        except Exception as e:
+            self.logger.error(f"Worker {worker_id}: stopped with error: {str(e)}")
+        finally:
+            if self.rate_controller:
+                self.rate_controller.leave(worker_id)
+            # Creating the automator itself may have failed
+            if automator:
+                automator.close()
+
+    def _observe(self, started, success, path):
+        """Report the duration of one attempt and where it was handled to the rate controller"""
+        if self.rate_controller:
+            self.rate_controller.observe(time.perf_counter() - started, success, path)
+
+    def _store_result(self, invoice_identifier, success, error=None, invoice_data=None, status=None):
+        """
+        Store the result for one invoice in the shared results dictionary
+
+        Args:
+            invoice_identifier: The invoice identifier
+            success: Boolean indicating if the update was successful
+            error: Optional error message
+            invoice_data: Invoice data recorded with 'saved' journal entries
+            status: 'updated', 'unchanged' or 'failed' (derived from success if not given)
+        """
+        status = status or ('updated' if success else 'failed')
+        if self.journal:
+            if status == 'failed':
+                self.journal.record(invoice_identifier, 'failed', error=error)
+            else:
+                self.journal.record(invoice_identifier, 'saved' if status == 'updated' else 'unchanged', invoice_data=invoice_data)
+
+        result = {
+            'success': success,
+            'status': status,
+            'timestamp': time.time()
+        }
+        if error:
+            result['error'] = error
+
+        recorder.count_invoice()
+        with self._results_lock:
+            self._results[invoice_identifier] = result